@@ -0,0 +1,59 @@
+"""Benchmark Aider ``read:`` registration against large .aider.conf.yml files.
+
+Run from the repository root::
+
+    PYTHONPATH=src python benchmarks/bench_aider_conf.py
+
+Each row registers ``langs`` rule files in one batched run against a config
+that already lists ``existing`` foreign ``read:`` entries. Time per run should
+grow roughly linearly with file size and stay flat as ``langs`` grows.
+"""
+from pathlib import Path
+import sys
+import tempfile
+import time
+
+from crules.ai_managers import AiderManager
+
+
+def _seed_conf(path: Path, existing: int) -> None:
+    lines = ["# shared aider settings", "model: gpt-4", "read:"]
+    lines += [f"  - docs/chapter_{i:04d}.md" for i in range(existing)]
+    path.write_text("\n".join(lines) + "\n")
+
+
+def bench(existing: int, langs: int, repeat: int = 5) -> float:
+    """Return the best wall time in seconds for one batched registration."""
+    best = float("inf")
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            _seed_conf(root / ".aider.conf.yml", existing)
+            manager = AiderManager({}, root)
+            manager.ensure_structure()
+            rule_paths = []
+            for i in range(langs):
+                rule = manager.target_dir / f"lang{i}.md"
+                rule.write_text("body\n")
+                rule_paths.append(rule)
+
+            start = time.perf_counter()
+            manager._sync_aider_conf_reads(rule_paths)
+            best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> int:
+    print(f"{'existing':>9} {'langs':>6} {'ms/run':>9} {'us/lang':>9}")
+    for existing in (0, 100, 1000):
+        for langs in (1, 10, 100):
+            seconds = bench(existing, langs)
+            print(
+                f"{existing:>9} {langs:>6} {seconds * 1e3:>9.3f} "
+                f"{seconds * 1e6 / langs:>9.1f}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""Measure peak Python memory while compiling very large rule files.
+
+Run from the repository root::
+
+    PYTHONPATH=src python benchmarks/bench_memory.py [--sizes 1,10,100]
+
+Each row writes one global rules file of ``size`` MB through all seven
+targets, then streams the legacy ``.cursorrules`` combine. Peak allocations
+are reported by ``tracemalloc``; they should stay flat (a few MB of chunk
+buffers) as the input grows, because bodies are copied from a memory map
+instead of being concatenated in memory.
+"""
+from pathlib import Path
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from crules import file_ops
+
+MB = 1024 * 1024
+TARGETS = ("cursor", "claude", "copilot", "cline", "roo", "windsurf", "aider")
+
+
+def _seed(path: Path, size: int) -> None:
+    line = b"- Prefer small, focused functions with descriptive names.\n"
+    block = line * (MB // len(line))
+    with open(path, "wb") as f:
+        written = 0
+        while written < size:
+            piece = block[: size - written]
+            f.write(piece)
+            written += len(piece)
+
+
+def _measure(action) -> tuple:
+    tracemalloc.start()
+    start = time.perf_counter()
+    action()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, elapsed
+
+
+def bench(size_mb: int) -> dict:
+    """Return peak traced bytes and seconds for the deploy and combine paths."""
+    with tempfile.TemporaryDirectory(prefix="crules-mem-") as tmp:
+        root = Path(tmp)
+        global_rules = root / "cursorrules"
+        lang_dir = root / "lang_rules"
+        lang_dir.mkdir()
+        _seed(global_rules, size_mb * MB)
+        cfg = {f"enable_{t}": True for t in TARGETS}
+        old_cwd = os.getcwd()
+        os.chdir(root)
+        try:
+            deploy = _measure(
+                lambda: file_ops.write_rules_to_ai_dirs(cfg, global_rules, lang_dir, [])
+            )
+            combine = _measure(
+                lambda: file_ops.write_combined_rules(
+                    root / ".cursorrules",
+                    global_rules,
+                    lang_dir,
+                    [],
+                    "\n# --- Delimiter ---\n",
+                )
+            )
+        finally:
+            os.chdir(old_cwd)
+    return {"deploy": deploy, "combine": combine}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1,10,100",
+                        help="Comma-separated input sizes in MB (default 1,10,100)")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    print(
+        f"{'size MB':>8} {'deploy peak MB':>15} {'deploy s':>9} "
+        f"{'combine peak MB':>16} {'combine s':>10}"
+    )
+    for size_mb in (int(s) for s in args.sizes.split(",")):
+        result = bench(size_mb)
+        (d_peak, d_s), (c_peak, c_s) = result["deploy"], result["combine"]
+        print(
+            f"{size_mb:>8} {d_peak / MB:>15.2f} {d_s:>9.3f} "
+            f"{c_peak / MB:>16.2f} {c_s:>10.3f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,310 @@
+"""Benchmark suite for the compile, bootstrap, sync and setup paths.
+
+Run from the repository root::
+
+    PYTHONPATH=src python benchmarks/suite.py run -o current.json [--quick] [-k PATTERN]
+    PYTHONPATH=src python benchmarks/suite.py compare \
+        benchmarks/baselines/quick.json current.json
+
+``run`` times each case against synthetic inputs in throwaway directories
+(``HOME`` is redirected, so the real ``~/.config/crules`` is never touched)
+and writes min/median wall times as JSON. ``compare`` prints the median
+ratio per case and exits non-zero when any case is slower than the
+baseline by more than ``--threshold`` (default 20%).
+"""
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import argparse
+import contextlib
+import datetime
+import fnmatch
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import crules
+from crules import file_ops
+
+KB = 1024
+MB = 1024 * KB
+TARGETS = ("cursor", "claude", "copilot", "cline", "roo", "windsurf", "aider")
+
+# (name, prepare, action); prepare runs untimed in a fresh sandbox.
+Case = Tuple[str, Callable[["Sandbox"], None], Callable[["Sandbox"], Any]]
+
+
+class Sandbox:
+    """Fake HOME with a crules config plus an empty repository as CWD."""
+
+    def __init__(self, base: Path):
+        self.home = base / "home"
+        self.repo = base / "repo"
+        self.config_dir = self.home / ".config" / "crules"
+        self.global_rules = self.config_dir / "cursorrules"
+        self.lang_rules_dir = self.config_dir / "lang_rules"
+        self.workflows_dir = self.config_dir / "workflows"
+        self.languages: List[str] = []
+        self.cfg: Dict[str, Any] = {
+            "global_rules_path": str(self.global_rules),
+            "language_rules_dir": str(self.lang_rules_dir),
+            "delimiter": "\n# --- Delimiter ---\n",
+            **{f"enable_{t}": True for t in TARGETS},
+        }
+        self.repo.mkdir(parents=True)
+        for d in (self.lang_rules_dir, self.workflows_dir):
+            d.mkdir(parents=True)
+
+    def seed_rules(self, languages: int, size: int, global_size: int = 10 * KB) -> None:
+        self.global_rules.write_text(_synthetic_rules("global", global_size))
+        self.languages = [f"lang{i:03d}" for i in range(languages)]
+        for lang in self.languages:
+            rules = _synthetic_rules(lang, size)
+            (self.lang_rules_dir / f"cursor.{lang}").write_text(rules)
+
+    def seed_workflows(self, count: int = 4, size: int = 8 * KB) -> None:
+        for i in range(count):
+            mode = _synthetic_rules(f"mode{i}", size)
+            (self.workflows_dir / f"MODE{i}.md").write_text(mode)
+
+
+def _synthetic_rules(name: str, size: int) -> str:
+    """Markdown-ish rules text of roughly ``size`` bytes."""
+    paragraph = (
+        f"## {name} guidance\n"
+        "- Prefer small, focused functions with descriptive names.\n"
+        "- Write tests alongside code and keep them deterministic.\n"
+        "- Document public interfaces and surface errors explicitly.\n\n"
+    )
+    return (paragraph * (size // len(paragraph) + 1))[:size]
+
+
+@contextlib.contextmanager
+def _sandbox():
+    old_cwd = os.getcwd()
+    old_home = os.environ.get("HOME")
+    with tempfile.TemporaryDirectory(prefix="crules-bench-") as tmp:
+        box = Sandbox(Path(tmp))
+        os.environ["HOME"] = str(box.home)
+        os.chdir(box.repo)
+        try:
+            yield box
+        finally:
+            os.chdir(old_cwd)
+            if old_home is None:
+                os.environ.pop("HOME", None)
+            else:
+                os.environ["HOME"] = old_home
+
+
+def _write_rules(box: Sandbox) -> bool:
+    return file_ops.write_rules_to_ai_dirs(
+        dict(box.cfg), box.global_rules, box.lang_rules_dir, box.languages
+    )
+
+
+def _combine_rules(box: Sandbox) -> str:
+    return file_ops.combine_rules(
+        box.global_rules, box.lang_rules_dir, box.languages, box.cfg["delimiter"]
+    )
+
+
+def _seeded(languages: int, size: int) -> Callable[[Sandbox], None]:
+    def prepare(box: Sandbox) -> None:
+        box.seed_rules(languages, size)
+    return prepare
+
+
+def _warm(languages: int, size: int) -> Callable[[Sandbox], None]:
+    def prepare(box: Sandbox) -> None:
+        box.seed_rules(languages, size)
+        _write_rules(box)
+    return prepare
+
+
+def _large_gitignore(box: Sandbox) -> None:
+    box.seed_rules(1, 10 * KB)
+    lines = [f"build/generated/module_{i:05d}/" for i in range(80_000)]
+    (box.repo / ".gitignore").write_text("\n".join(lines) + "\n")
+
+
+def _large_aider_conf(box: Sandbox) -> None:
+    box.seed_rules(20, 10 * KB)
+    reads = [f"  - docs/chapter_{i:04d}.md" for i in range(1000)]
+    lines = ["model: gpt-4", "read:"] + reads
+    (box.repo / ".aider.conf.yml").write_text("\n".join(lines) + "\n")
+
+
+def _bootstrap_ready(box: Sandbox) -> None:
+    box.seed_rules(0, 0)
+    box.seed_workflows()
+
+
+def _sync_ready(box: Sandbox) -> None:
+    _bootstrap_ready(box)
+    file_ops.bootstrap_swarm(dict(box.cfg), assume_yes=True)
+
+
+def _setup_done(box: Sandbox) -> None:
+    file_ops.setup_directory_structure()
+
+
+def build_cases(quick: bool) -> List[Case]:
+    """Return the benchmark matrix; ``quick`` drops the largest inputs."""
+    lang_counts = (1, 50) if quick else (1, 50, 500)
+    sizes = (10 * KB, 1 * MB) if quick else (10 * KB, 1 * MB, 10 * MB)
+
+    cases: List[Case] = []
+    for n in lang_counts:
+        cases.append(
+            (f"write_rules/cold/langs={n}/size=10KB", _seeded(n, 10 * KB), _write_rules)
+        )
+    for size in sizes[1:]:
+        label = f"{size // MB}MB"
+        cases.append(
+            (f"write_rules/cold/langs=1/size={label}", _seeded(1, size), _write_rules)
+        )
+    cases += [
+        ("write_rules/warm/langs=50/size=10KB", _warm(50, 10 * KB), _write_rules),
+        ("write_rules/gitignore=80k_lines", _large_gitignore, _write_rules),
+        ("write_rules/aider_conf=1000_reads/langs=20", _large_aider_conf, _write_rules),
+    ]
+    for n in lang_counts:
+        cases.append(
+            (f"combine_rules/langs={n}/size=10KB", _seeded(n, 10 * KB), _combine_rules)
+        )
+    cases += [
+        (
+            f"combine_rules/langs=1/size={sizes[-1] // MB}MB",
+            _seeded(1, sizes[-1]),
+            _combine_rules,
+        ),
+        ("bootstrap_swarm/fresh", _bootstrap_ready,
+         lambda box: file_ops.bootstrap_swarm(dict(box.cfg), assume_yes=True)),
+        ("sync_modes/unchanged", _sync_ready,
+         lambda box: file_ops.sync_modes(dict(box.cfg))),
+        ("setup_directory_structure/fresh", lambda box: shutil.rmtree(box.config_dir),
+         lambda box: file_ops.setup_directory_structure()),
+        ("setup_directory_structure/force", _setup_done,
+         lambda box: file_ops.setup_directory_structure(force=True)),
+    ]
+    return cases
+
+
+def run_case(case: Case, repeat: int) -> Dict[str, Any]:
+    """Time ``case`` ``repeat`` times, each in a freshly prepared sandbox."""
+    _, prepare, action = case
+    samples = []
+    for _ in range(repeat):
+        with _sandbox() as box:
+            prepare(box)
+            start = time.perf_counter()
+            action(box)
+            samples.append(time.perf_counter() - start)
+    return {
+        "min_s": min(samples),
+        "median_s": statistics.median(samples),
+        "repeat": repeat,
+    }
+
+
+def run(args: argparse.Namespace) -> int:
+    logging.disable(logging.CRITICAL)
+    cases = build_cases(args.quick)
+    if args.k:
+        cases = [c for c in cases if fnmatch.fnmatch(c[0], f"*{args.k}*")]
+    repeat = args.repeat or (3 if args.quick else 5)
+
+    results: Dict[str, Any] = {}
+    for case in cases:
+        results[case[0]] = run_case(case, repeat)
+        print(f"{case[0]:<48} median {results[case[0]]['median_s'] * 1e3:>10.2f} ms")
+
+    report = {
+        "meta": {
+            "crules_version": crules.__version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "quick": args.quick,
+        },
+        "results": results,
+    }
+    if args.output:
+        text = json.dumps(report, indent=2, sort_keys=True) + "\n"
+        Path(args.output).write_text(text)
+        print(f"\nWrote {args.output}")
+    return 0
+
+
+def compare(
+    baseline: Dict[str, Any], current: Dict[str, Any], threshold: float
+) -> List[str]:
+    """Print a comparison table and return the names of regressed cases."""
+    regressions = []
+    base_results = baseline.get("results", {})
+    print(f"{'case':<48} {'baseline ms':>12} {'current ms':>12} {'ratio':>7}")
+    for name, cur in sorted(current.get("results", {}).items()):
+        base = base_results.get(name)
+        if base is None:
+            print(f"{name:<48} {'-':>12} {cur['median_s'] * 1e3:>12.2f} {'new':>7}")
+            continue
+        ratio = cur["median_s"] / base["median_s"] if base["median_s"] else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(
+            f"{name:<48} {base['median_s'] * 1e3:>12.2f} "
+            f"{cur['median_s'] * 1e3:>12.2f} {ratio:>6.2f}x{flag}"
+        )
+    return regressions
+
+
+def compare_cmd(args: argparse.Namespace) -> int:
+    baseline = json.loads(Path(args.baseline).read_text())
+    current = json.loads(Path(args.current).read_text())
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print(
+            f"\n{len(regressions)} case(s) regressed by more than "
+            f"{args.threshold:.0%}"
+        )
+        return 1
+    print("\nNo regressions")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_p = sub.add_parser("run", help="Run the suite and optionally save JSON results")
+    run_p.add_argument("-o", "--output", help="Write results JSON to this path")
+    run_p.add_argument("--quick", action="store_true", help="Skip the largest inputs")
+    run_p.add_argument(
+        "--repeat", type=int, help="Samples per case (default 5, quick 3)"
+    )
+    run_p.add_argument("-k", help="Only run cases whose name contains this pattern")
+    run_p.set_defaults(func=run)
+
+    cmp_p = sub.add_parser("compare", help="Flag regressions against a baseline")
+    cmp_p.add_argument("baseline")
+    cmp_p.add_argument("current")
+    cmp_p.add_argument(
+        "--threshold", type=float, default=0.20,
+        help="Allowed slowdown before flagging, as a fraction (default 0.20)",
+    )
+    cmp_p.set_defaults(func=compare_cmd)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
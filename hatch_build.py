@@ -0,0 +1,26 @@
+"""Hatch build hook that regenerates ``crules/rules/resources.bundle``.
+
+The bundle is built from the raw ``cursor.*``, ``default_cursorrules`` and
+``workflows/*.md`` files before every build, so a wheel never ships a stale
+bundle. The committed copy is kept for source-tree runs and is checked by
+``tests/test_bundle.py``.
+"""
+from pathlib import Path
+import importlib.util
+
+from hatchling.builders.hooks.plugin.interface import BuildHookInterface
+
+
+class BundleBuildHook(BuildHookInterface):
+    PLUGIN_NAME = "custom"
+
+    def initialize(self, version, build_data):
+        package_dir = Path(self.root) / "src" / "crules"
+        # bundle.py only needs the standard library, so load it without crules.
+        spec = importlib.util.spec_from_file_location(
+            "_crules_bundle", package_dir / "bundle.py"
+        )
+        bundle = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(bundle)
+        path = bundle.write_bundle(package_dir / "rules")
+        self.app.display_info(f"Regenerated {path.relative_to(self.root)}")
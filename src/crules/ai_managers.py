@@ -1,21 +1,47 @@
 """AI Context Managers for different assistant platforms."""
 import logging
+import os
 import re
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Union
 
-import yaml
+from .budget import BudgetLedger
+from .frontmatter import render_frontmatter
+from .gitignore import update_ignore_block
+from .manifest import OutputManifest
+from .render import RenderedOutput, RuleBody, render_body
+from .timings import span, timed
+from .transaction import OutputTransaction
 
 logger = logging.getLogger(__name__)
 
 class BaseAIManager(ABC):
-    """Abstract base class for all AI directory managers."""
-    
-    def __init__(self, config: Dict[str, Any]):
+    """Abstract base class for all AI directory managers.
+
+    Output paths are resolved against ``root``, which defaults to the current
+    working directory so a single process can target several repositories.
+    When ``manifest`` is set, outputs whose bytes are unchanged are not rewritten.
+    When ``batched`` is set, edits to shared files are queued until `finalize`.
+    When ``transaction`` is set, outputs are staged and published by its owner.
+    When ``ledger`` is set, the size of every output is recorded under
+    ``target_name`` for token accounting (`crules.budget`).
+    Managers that are ``parallel_safe`` may have `create_rule_file` called
+    for several sources at once from worker threads.
+    """
+
+    parallel_safe = True
+    target_name = ""
+
+    def __init__(self, config: Dict[str, Any], root: Optional[Path] = None):
         self.config = config
-        self.target_dir = Path(".")
+        self.root = Path(root) if root is not None else Path(".")
+        self.target_dir = self.root
         self.file_extension = ".md"
+        self.manifest: Optional[OutputManifest] = None
+        self.batched = False
+        self.transaction: Optional[OutputTransaction] = None
+        self.ledger: Optional[BudgetLedger] = None
 
     @abstractmethod
     def ensure_structure(self) -> None:
@@ -23,56 +49,84 @@ class BaseAIManager(ABC):
         pass
 
     @abstractmethod
-    def create_rule_file(self, name: str, content: str, globs: List[str]) -> bool:
+    def create_rule_file(
+        self, name: str, content: Union[str, RuleBody], globs: List[str]
+    ) -> bool:
         """Create a rule file with tool-specific metadata."""
         pass
 
     @abstractmethod
+    def ignore_patterns(self) -> List[str]:
+        """Return the .gitignore patterns covering this tool's generated files."""
+        pass
+
     def update_gitignore(self) -> None:
         """Update .gitignore with the tool-specific paths."""
+        self._update_ignore_file(*self.ignore_patterns())
+
+    def finalize(self) -> None:
+        """Apply shared-file edits queued while ``batched`` was set."""
         pass
 
-    def _write_file_with_frontmatter(self, file_path: Path, content: str, metadata: Dict[str, Any]) -> bool:
-        """Helper to consistently write YAML frontmatter and the Universal Preamble."""
+    def _render_frontmatter(self, metadata: Dict[str, Any]) -> bytes:
+        """Build the YAML frontmatter block that precedes the shared body."""
+        return render_frontmatter(metadata)
+
+    def _write_file_with_frontmatter(
+        self, file_path: Path, content: Union[str, RuleBody], metadata: Dict[str, Any]
+    ) -> bool:
+        """Helper to consistently write YAML frontmatter and the Universal Preamble.
+
+        ``content`` may already be rendered by `render_body`, in which case the
+        preamble and body bytes are shared with the other targets and only the
+        frontmatter is built here. The header is written first and the body is
+        then copied in chunks, so a large source is never concatenated in
+        memory.
+        """
         try:
-            full_content = "---\n"
-            full_content += yaml.dump(metadata, default_flow_style=None)
-            full_content += "---\n\n"
-            full_content += "# Universal AI Context\n"
-            full_content += "You are operating in a multi-agent repository. Your native rules have been loaded.\n"
-            full_content += "Always adhere to project_spec.md as the ultimate source of truth.\n"
-            full_content += "If instructions conflict, prioritize: project_spec.md > Native Rules > Root Files.\n"
-            full_content += (
-                "CRITICAL: Before executing any task, you MUST read the root "
-                "`AGENTS.md` file for common cross-IDE rules and repo status. "
-                "If the status is `[TEMPLATE]`, you are strictly "
-                "locked into the Bootstrapper persona (`.crules/modes/BOOTSTRAPPER.md`). "
-                "Do not write code or manage tasks until the workspace is customized.\n\n"
-            )
-            full_content += content
-            
-            file_path.write_text(full_content)
+            body = render_body(content)
+            with span("render.frontmatter"):
+                header = self._render_frontmatter(metadata)
+            output = RenderedOutput(header, body)
+            if self.ledger is not None:
+                source = file_path.name[:-len(self.file_extension)] or file_path.stem
+                self.ledger.record(
+                    self.target_name or type(self).__name__,
+                    source,
+                    file_path,
+                    output.size,
+                )
+
+            if self.manifest is not None:
+                with span("write.check"):
+                    unchanged = not self.manifest.needs_write(file_path, output)
+                    if unchanged and self.transaction is not None:
+                        # With --dedupe, existing copies are relinked too.
+                        unchanged = not self.transaction.needs_link(file_path, output)
+                if unchanged:
+                    logger.debug(f"Unchanged rule file: {file_path}")
+                    return True
+
+            if self.transaction is not None:
+                with span("write.stage"):
+                    self.transaction.stage(file_path, output)
+                return True
+
+            with span("write.direct"):
+                with open(file_path, "wb") as f:
+                    output.write_to(f)
+            if self.manifest is not None:
+                self.manifest.record(file_path, output)
             logger.info(f"Created rule file: {file_path}")
             return True
         except Exception as e:
             logger.error(f"Failed to create rule file {file_path}: {e}")
             return False
 
-    def _update_ignore_file(self, ignore_pattern: str) -> None:
-        """Helper to consistently append patterns to .gitignore."""
-        gitignore = Path(".gitignore")
+    def _update_ignore_file(self, *ignore_patterns: str) -> None:
+        """Helper to add patterns to the crules block in .gitignore."""
         try:
-            if gitignore.exists():
-                content = gitignore.read_text()
-                if ignore_pattern not in content:
-                    if "# Crules specific" not in content:
-                        content += "\n# Crules specific\n"
-                    content += f"{ignore_pattern}\n"
-                    gitignore.write_text(content)
-                    logger.info(f"Updated .gitignore with {ignore_pattern}")
-            else:
-                gitignore.write_text(f"# Crules specific\n{ignore_pattern}\n")
-                logger.info(f"Created .gitignore with {ignore_pattern}")
+            update_ignore_block(self.root / ".gitignore", ignore_patterns)
         except Exception as e:
             logger.warning(f"Failed to update .gitignore: {e}")
 
@@ -80,16 +134,18 @@ class BaseAIManager(ABC):
 class CursorManager(BaseAIManager):
     """Manages the .cursor/rules directory structure."""
     
-    def __init__(self, config: Dict[str, Any]):
-        super().__init__(config)
-        self.target_dir = Path(".cursor/rules")
+    def __init__(self, config: Dict[str, Any], root: Optional[Path] = None):
+        super().__init__(config, root)
+        self.target_dir = self.root / ".cursor/rules"
         self.file_extension = ".mdc"
 
     def ensure_structure(self) -> None:
         self.target_dir.mkdir(parents=True, exist_ok=True)
         logger.info(f"Ensured Cursor structure exists at {self.target_dir}")
 
-    def create_rule_file(self, name: str, content: str, globs: List[str]) -> bool:
+    def create_rule_file(
+        self, name: str, content: Union[str, RuleBody], globs: List[str]
+    ) -> bool:
         file_path = self.target_dir / f"{name}{self.file_extension}"
         metadata = {
             "description": f"Rules for {name} development",
@@ -97,16 +153,16 @@ class CursorManager(BaseAIManager):
         }
         return self._write_file_with_frontmatter(file_path, content, metadata)
 
-    def update_gitignore(self) -> None:
-        self._update_ignore_file(f".cursor/rules/*{self.file_extension}")
+    def ignore_patterns(self) -> List[str]:
+        return [f".cursor/rules/*{self.file_extension}"]
 
 
 class ClaudeManager(BaseAIManager):
     """Manages the .claude/rules directory structure."""
     
-    def __init__(self, config: Dict[str, Any]):
-        super().__init__(config)
-        self.target_dir = Path(".claude/rules")
+    def __init__(self, config: Dict[str, Any], root: Optional[Path] = None):
+        super().__init__(config, root)
+        self.target_dir = self.root / ".claude/rules"
         self.file_extension = ".md"
 
     def ensure_structure(self) -> None:
@@ -117,7 +173,9 @@ class ClaudeManager(BaseAIManager):
         # Claude prefers deep matching (e.g., **/*.py instead of *.py)
         return [g if g.startswith("**") else f"**/{g}" for g in globs]
 
-    def create_rule_file(self, name: str, content: str, globs: List[str]) -> bool:
+    def create_rule_file(
+        self, name: str, content: Union[str, RuleBody], globs: List[str]
+    ) -> bool:
         file_path = self.target_dir / f"{name}{self.file_extension}"
         metadata = {
             "description": f"Rules for {name} development",
@@ -125,16 +183,16 @@ class ClaudeManager(BaseAIManager):
         }
         return self._write_file_with_frontmatter(file_path, content, metadata)
 
-    def update_gitignore(self) -> None:
-        self._update_ignore_file(f".claude/rules/*{self.file_extension}")
+    def ignore_patterns(self) -> List[str]:
+        return [f".claude/rules/*{self.file_extension}"]
 
 
 class CopilotManager(BaseAIManager):
     """Manages the .github/instructions directory structure."""
     
-    def __init__(self, config: Dict[str, Any]):
-        super().__init__(config)
-        self.target_dir = Path(".github/instructions")
+    def __init__(self, config: Dict[str, Any], root: Optional[Path] = None):
+        super().__init__(config, root)
+        self.target_dir = self.root / ".github/instructions"
         self.file_extension = ".instructions.md"
 
     def ensure_structure(self) -> None:
@@ -144,7 +202,9 @@ class CopilotManager(BaseAIManager):
     def _convert_to_globstar(self, globs: List[str]) -> List[str]:
         return [g if g.startswith("**") else f"**/{g}" for g in globs]
 
-    def create_rule_file(self, name: str, content: str, globs: List[str]) -> bool:
+    def create_rule_file(
+        self, name: str, content: Union[str, RuleBody], globs: List[str]
+    ) -> bool:
         file_path = self.target_dir / f"{name}{self.file_extension}"
         metadata = {
             "description": f"Rules for {name} development",
@@ -152,23 +212,25 @@ class CopilotManager(BaseAIManager):
         }
         return self._write_file_with_frontmatter(file_path, content, metadata)
 
-    def update_gitignore(self) -> None:
-        self._update_ignore_file(f".github/instructions/*{self.file_extension}")
+    def ignore_patterns(self) -> List[str]:
+        return [f".github/instructions/*{self.file_extension}"]
 
 
 class ClineManager(BaseAIManager):
     """Manages the .clinerules directory structure."""
 
-    def __init__(self, config: Dict[str, Any]):
-        super().__init__(config)
-        self.target_dir = Path(".clinerules")
+    def __init__(self, config: Dict[str, Any], root: Optional[Path] = None):
+        super().__init__(config, root)
+        self.target_dir = self.root / ".clinerules"
         self.file_extension = ".md"
 
     def ensure_structure(self) -> None:
         self.target_dir.mkdir(parents=True, exist_ok=True)
         logger.info(f"Ensured Cline structure exists at {self.target_dir}")
 
-    def create_rule_file(self, name: str, content: str, globs: List[str]) -> bool:
+    def create_rule_file(
+        self, name: str, content: Union[str, RuleBody], globs: List[str]
+    ) -> bool:
         file_path = self.target_dir / f"{name}{self.file_extension}"
         metadata = {
             "description": f"Rules for {name} development",
@@ -176,23 +238,25 @@ class ClineManager(BaseAIManager):
         }
         return self._write_file_with_frontmatter(file_path, content, metadata)
 
-    def update_gitignore(self) -> None:
-        self._update_ignore_file(f".clinerules/*{self.file_extension}")
+    def ignore_patterns(self) -> List[str]:
+        return [f".clinerules/*{self.file_extension}"]
 
 
 class RooManager(BaseAIManager):
     """Manages the .roorules directory structure."""
 
-    def __init__(self, config: Dict[str, Any]):
-        super().__init__(config)
-        self.target_dir = Path(".roorules")
+    def __init__(self, config: Dict[str, Any], root: Optional[Path] = None):
+        super().__init__(config, root)
+        self.target_dir = self.root / ".roorules"
         self.file_extension = ".md"
 
     def ensure_structure(self) -> None:
         self.target_dir.mkdir(parents=True, exist_ok=True)
         logger.info(f"Ensured Roo Code structure exists at {self.target_dir}")
 
-    def create_rule_file(self, name: str, content: str, globs: List[str]) -> bool:
+    def create_rule_file(
+        self, name: str, content: Union[str, RuleBody], globs: List[str]
+    ) -> bool:
         file_path = self.target_dir / f"{name}{self.file_extension}"
         metadata = {
             "description": f"Rules for {name} development",
@@ -200,23 +264,25 @@ class RooManager(BaseAIManager):
         }
         return self._write_file_with_frontmatter(file_path, content, metadata)
 
-    def update_gitignore(self) -> None:
-        self._update_ignore_file(f".roorules/*{self.file_extension}")
+    def ignore_patterns(self) -> List[str]:
+        return [f".roorules/*{self.file_extension}"]
 
 
 class WindsurfManager(BaseAIManager):
     """Manages the .windsurf/rules directory structure."""
 
-    def __init__(self, config: Dict[str, Any]):
-        super().__init__(config)
-        self.target_dir = Path(".windsurf/rules")
+    def __init__(self, config: Dict[str, Any], root: Optional[Path] = None):
+        super().__init__(config, root)
+        self.target_dir = self.root / ".windsurf/rules"
         self.file_extension = ".md"
 
     def ensure_structure(self) -> None:
         self.target_dir.mkdir(parents=True, exist_ok=True)
         logger.info(f"Ensured Windsurf structure exists at {self.target_dir}")
 
-    def create_rule_file(self, name: str, content: str, globs: List[str]) -> bool:
+    def create_rule_file(
+        self, name: str, content: Union[str, RuleBody], globs: List[str]
+    ) -> bool:
         file_path = self.target_dir / f"{name}{self.file_extension}"
         metadata = {
             "description": f"Rules for {name} development",
@@ -224,40 +290,47 @@ class WindsurfManager(BaseAIManager):
         }
         return self._write_file_with_frontmatter(file_path, content, metadata)
 
-    def update_gitignore(self) -> None:
-        self._update_ignore_file(f".windsurf/rules/*{self.file_extension}")
+    def ignore_patterns(self) -> List[str]:
+        return [f".windsurf/rules/*{self.file_extension}"]
 
 
 class AiderManager(BaseAIManager):
     """Manages the .aider/rules directory and ``read:`` entries in ``.aider.conf.yml``."""
 
-    def __init__(self, config: Dict[str, Any]):
-        super().__init__(config)
-        self.target_dir = Path(".aider/rules")
+    # Queued read: entries must follow source order, so files are written in sequence.
+    parallel_safe = False
+
+    def __init__(self, config: Dict[str, Any], root: Optional[Path] = None):
+        super().__init__(config, root)
+        self.target_dir = self.root / ".aider/rules"
         self.file_extension = ".md"
+        self._pending_reads: List[Path] = []
 
     def ensure_structure(self) -> None:
         self.target_dir.mkdir(parents=True, exist_ok=True)
         logger.info(f"Ensured Aider structure exists at {self.target_dir}")
 
-    def _append_aider_conf_read(self, rule_path: Path) -> None:
-        """Append ``- <path>`` under ``read:`` in ``.aider.conf.yml`` without YAML dump.
+    @timed("aider_conf")
+    def _sync_aider_conf_reads(self, rule_paths: List[Path]) -> None:
+        """Register ``rule_paths`` under ``read:`` in ``.aider.conf.yml`` in one edit.
 
-        Preserves comments and foreign keys by editing the raw file text only.
+        Edits the raw file text only, so comments and foreign keys survive a
+        run without a YAML dump. Missing paths are appended after the last
+        ``read:`` item, and entries under this manager's rules directory whose
+        file no longer exists are pruned. The file is read and written at most
+        once regardless of how many rules were generated.
         """
-        conf = Path(".aider.conf.yml")
-        rel = rule_path.as_posix()
-        list_marker = f"- {rel}"
+        conf = self.root / ".aider.conf.yml"
+        wanted = list(
+            dict.fromkeys(p.relative_to(self.root).as_posix() for p in rule_paths)
+        )
+        prefix = self.target_dir.relative_to(self.root).as_posix() + "/"
         try:
             text = conf.read_text() if conf.exists() else ""
         except OSError as e:
             logger.warning("Could not read .aider.conf.yml: %s", e)
             return
 
-        for raw_line in text.splitlines():
-            if raw_line.strip() == list_marker:
-                return
-
         lines = text.splitlines()
         read_idx = -1
         for i, line in enumerate(lines):
@@ -267,20 +340,34 @@ class AiderManager(BaseAIManager):
                 break
 
         indent = "  "
+        pruned: List[str] = []
         if read_idx < 0:
-            block = f"read:\n{indent}{list_marker}"
+            if not wanted:
+                return
+            block = "read:\n" + "".join(f"{indent}- {rel}\n" for rel in wanted)
             if not text.strip():
-                new_text = block + "\n"
+                new_text = block
             else:
-                new_text = text.rstrip("\n") + "\n" + block + "\n"
+                new_text = text.rstrip("\n") + "\n" + block
+            added = wanted
         else:
+            try:
+                on_disk = set(os.listdir(self.target_dir))
+            except OSError:
+                on_disk = set()
+
+            items: Dict[int, str] = {}
             j = read_idx + 1
             last_item_idx = read_idx
             while j < len(lines):
                 line = lines[j]
-                m_item = re.match(r"^(\s+)-\s", line)
+                m_item = re.match(r"^(\s+)-\s+(.*)$", line)
                 if m_item:
                     indent = m_item.group(1)
+                    value = (
+                        re.split(r"\s+#", m_item.group(2), 1)[0].strip().strip("'\"")
+                    )
+                    items[j] = value
                     last_item_idx = j
                     j += 1
                     continue
@@ -293,9 +380,32 @@ class AiderManager(BaseAIManager):
                         continue
                     break
                 break
+
+            wanted_set = set(wanted)
+            stale = {
+                idx for idx, value in items.items()
+                if value.startswith(prefix)
+                and value not in wanted_set
+                and value[len(prefix):] not in on_disk
+            }
+            pruned = [items[idx] for idx in sorted(stale)]
+            present = {value for idx, value in items.items() if idx not in stale}
+            added = [rel for rel in wanted if rel not in present]
+            if not added and not stale:
+                return
+
             insert_at = last_item_idx + 1
-            list_line = f"{indent}{list_marker}"
-            new_lines = lines[:insert_at] + [list_line] + lines[insert_at:]
+            start = read_idx + 1
+            kept = [
+                line for idx, line in enumerate(lines[start:insert_at], start)
+                if idx not in stale
+            ]
+            new_lines = (
+                lines[:read_idx + 1]
+                + kept
+                + [f"{indent}- {rel}" for rel in added]
+                + lines[insert_at:]
+            )
             new_text = "\n".join(new_lines) + "\n"
 
         try:
@@ -303,9 +413,18 @@ class AiderManager(BaseAIManager):
         except OSError as e:
             logger.warning("Could not write .aider.conf.yml: %s", e)
             return
-        logger.info("Registered %s under read: in %s (append-only text edit)", rel, conf)
+        if added:
+            logger.info(
+                "Registered %s under read: in %s (text edit)", ", ".join(added), conf
+            )
+        if pruned:
+            logger.info(
+                "Pruned stale read: entries from %s: %s", conf, ", ".join(pruned)
+            )
 
-    def create_rule_file(self, name: str, content: str, globs: List[str]) -> bool:
+    def create_rule_file(
+        self, name: str, content: Union[str, RuleBody], globs: List[str]
+    ) -> bool:
         file_path = self.target_dir / f"{name}{self.file_extension}"
         metadata = {
             "description": f"Rules for {name} development",
@@ -313,11 +432,22 @@ class AiderManager(BaseAIManager):
         }
         ok = self._write_file_with_frontmatter(file_path, content, metadata)
         if ok:
+            if self.batched:
+                self._pending_reads.append(file_path)
+                return ok
             try:
-                self._append_aider_conf_read(file_path)
+                self._sync_aider_conf_reads([file_path])
             except Exception as e:
                 logger.warning("Could not update .aider.conf.yml: %s", e)
         return ok
 
-    def update_gitignore(self) -> None:
-        self._update_ignore_file(f".aider/rules/*{self.file_extension}")
+    def finalize(self) -> None:
+        """Register every rule written during a batched run in one edit."""
+        pending, self._pending_reads = self._pending_reads, []
+        try:
+            self._sync_aider_conf_reads(pending)
+        except Exception as e:
+            logger.warning("Could not update .aider.conf.yml: %s", e)
+
+    def ignore_patterns(self) -> List[str]:
+        return [f".aider/rules/*{self.file_extension}"]
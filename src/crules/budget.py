@@ -0,0 +1,150 @@
+"""Estimated token accounting and per-target budgets for compiled rules.
+
+Every generated file is loaded into an assistant's context window, so its
+size is a recurring cost. While rules are deployed, each manager records
+the size of every output in a `BudgetLedger`. The ledger turns sizes into
+estimated token counts and reports, per target, what is loaded for each file
+type: the ``global`` output (which applies to every file) plus the output of
+the language whose globs match.
+
+Token counts are estimated as one token per `BYTES_PER_TOKEN` bytes, which
+is close for English prose and Markdown across current tokenizers and needs
+no tokenizer to be installed.
+
+Budgets are read from the ``token_budgets`` config key, a mapping of target
+name (or ``"*"`` for every target) to the most tokens any one file type may
+load::
+
+    token_budgets:
+      "*": 8000
+      copilot: 4000
+"""
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import threading
+
+BYTES_PER_TOKEN = 4
+GLOBAL_SOURCE = "global"
+
+
+def estimate_tokens(size: int) -> int:
+    """Return the estimated token count of ``size`` bytes of rule text."""
+    return -(-size // BYTES_PER_TOKEN)
+
+
+class BudgetLedger:
+    """Sizes of the outputs written for each target, collected during a deploy.
+
+    Managers call `record` from worker threads; the ledger is safe to share.
+
+    Args:
+        globs: Source name to the globs it applies to, used to label file types.
+    """
+
+    def __init__(self, globs: Optional[Dict[str, List[str]]] = None):
+        self.globs: Dict[str, List[str]] = dict(globs or {})
+        self._outputs: Dict[Tuple[str, str], Tuple[Path, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, target: str, source: str, path: Path, size: int) -> None:
+        """Note that ``target`` loads ``size`` bytes from ``path`` for ``source``."""
+        with self._lock:
+            self._outputs[(target, source)] = (Path(path), size)
+
+    def __len__(self) -> int:
+        return len(self._outputs)
+
+    def report(self) -> Dict[str, Any]:
+        """Summarize recorded outputs per target.
+
+        Returns:
+            ``{"bytes_per_token", "total_tokens", "targets": {name: {...}}}``
+            where each target has its ``outputs`` (source, path, bytes,
+            tokens), ``total_tokens``, ``file_types`` (glob to tokens loaded
+            when editing a matching file) and ``peak_tokens``, the largest of
+            those loads.
+        """
+        with self._lock:
+            outputs = dict(self._outputs)
+
+        targets: Dict[str, Dict[str, Any]] = {}
+        for (target, source), (path, size) in sorted(outputs.items()):
+            entry = targets.setdefault(target, {"outputs": [], "total_tokens": 0})
+            tokens = estimate_tokens(size)
+            entry["outputs"].append(
+                {"source": source, "path": str(path), "bytes": size, "tokens": tokens}
+            )
+            entry["total_tokens"] += tokens
+
+        for entry in targets.values():
+            tokens = {o["source"]: o["tokens"] for o in entry["outputs"]}
+            base = tokens.get(GLOBAL_SOURCE, 0)
+            file_types: Dict[str, int] = {}
+            for source, count in tokens.items():
+                if source == GLOBAL_SOURCE:
+                    continue
+                for glob in self.globs.get(source) or [source]:
+                    file_types[glob] = file_types.get(glob, 0) + count
+            file_types = {
+                glob: base + count for glob, count in sorted(file_types.items())
+            }
+            if not file_types and GLOBAL_SOURCE in tokens:
+                file_types["*"] = base
+            entry["file_types"] = file_types
+            entry["peak_tokens"] = max(file_types.values(), default=0)
+
+        return {
+            "bytes_per_token": BYTES_PER_TOKEN,
+            "total_tokens": sum(entry["total_tokens"] for entry in targets.values()),
+            "targets": targets,
+        }
+
+
+def check_budgets(
+    report: Dict[str, Any], budgets: Optional[Dict[str, Any]]
+) -> List[str]:
+    """Return one message per target whose peak load exceeds its budget.
+
+    Args:
+        report: Output of `BudgetLedger.report`.
+        budgets: Target name (or ``"*"``) to maximum estimated tokens.
+    """
+    if not budgets:
+        return []
+    problems = []
+    for target, entry in report["targets"].items():
+        limit = budgets.get(target, budgets.get("*"))
+        if limit is None or entry["peak_tokens"] <= int(limit):
+            continue
+        file_type = max(entry["file_types"], key=entry["file_types"].get)
+        problems.append(
+            f"{target}: ~{entry['peak_tokens']} tokens loaded for {file_type} "
+            f"exceeds the budget of {int(limit)}"
+        )
+    return problems
+
+
+def format_report(
+    report: Dict[str, Any], budgets: Optional[Dict[str, Any]] = None
+) -> str:
+    """Render `BudgetLedger.report` as the ``--budget`` table."""
+    budgets = budgets or {}
+    lines = []
+    for target, entry in report["targets"].items():
+        limit = budgets.get(target, budgets.get("*"))
+        suffix = f" (budget {int(limit)})" if limit is not None else ""
+        count = len(entry["outputs"])
+        lines.append(
+            f"{target}: ~{entry['total_tokens']} tokens in {count} file(s){suffix}"
+        )
+        for output in entry["outputs"]:
+            lines.append(f"  {output['tokens']:>8}  {output['path']}")
+        for file_type, tokens in entry["file_types"].items():
+            over = limit is not None and tokens > int(limit)
+            flag = "  [OVER BUDGET]" if over else ""
+            lines.append(f"  loaded for {file_type}: ~{tokens} tokens{flag}")
+    lines.append(
+        f"Total: ~{report['total_tokens']} tokens "
+        f"(estimated at {report['bytes_per_token']} bytes per token)"
+    )
+    return "\n".join(lines)
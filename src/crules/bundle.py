@@ -0,0 +1,173 @@
+"""Indexed single-file bundle of the packaged rule resources.
+
+The packaged language rules (``cursor.*``), ``default_cursorrules`` and
+workflow templates (``workflows/*.md``) ship as one file,
+``crules/rules/resources.bundle``, laid out as::
+
+    MAGIC | index length (4 bytes, big-endian) | JSON index | member bytes
+
+The index maps each member name to its ``offset`` (from the start of the
+member bytes), ``size`` and ``sha256``. Readers load the index once and then
+seek straight to the members they need, so ``--setup``, ``--refresh-defaults``
+and ``--bootstrap`` neither list package directories nor extract them from a
+zipped install, and copy members as raw bytes.
+
+The bundle is generated from the files under ``src/crules/rules`` with::
+
+    python -m crules.bundle
+
+and ``tests/test_bundle.py`` fails if it is out of date.
+"""
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import fnmatch
+import functools
+import hashlib
+import json
+import logging
+import os
+import struct
+import sys
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_NAME = "resources.bundle"
+MAGIC = b"CRULESB1"
+_LENGTH = struct.Struct(">I")
+
+# Member name patterns, relative to the crules.rules package directory.
+MEMBER_PATTERNS = ("cursor.*", "default_cursorrules", "workflows/*.md")
+
+
+def collect_members(rules_dir: Path) -> Dict[str, bytes]:
+    """Read the bundled resources from a ``crules/rules`` source directory."""
+    members = {}
+    for pattern in MEMBER_PATTERNS:
+        for path in sorted(Path(rules_dir).glob(pattern)):
+            if path.is_file():
+                members[path.relative_to(rules_dir).as_posix()] = path.read_bytes()
+    return members
+
+
+def build_bundle(members: Dict[str, bytes]) -> bytes:
+    """Serialize ``members`` (name -> bytes) into bundle format."""
+    index: Dict[str, Dict[str, Any]] = {}
+    offset = 0
+    for name in sorted(members):
+        data = members[name]
+        index[name] = {
+            "offset": offset,
+            "size": len(data),
+            "sha256": hashlib.sha256(data).hexdigest(),
+        }
+        offset += len(data)
+    header = json.dumps(
+        {"members": index}, sort_keys=True, separators=(",", ":")
+    ).encode()
+    return b"".join(
+        [
+            MAGIC,
+            _LENGTH.pack(len(header)),
+            header,
+            *(members[name] for name in sorted(members)),
+        ]
+    )
+
+
+class ResourceBundle:
+    """Read-only view of a bundle, opened through ``opener`` for each read.
+
+    Args:
+        opener: Zero-argument callable returning a binary file object for the
+            bundle, e.g. an ``importlib.resources`` traversable's ``open``.
+    """
+
+    def __init__(self, opener: Any):
+        self._open = opener
+        with self._open() as fh:
+            magic = fh.read(len(MAGIC))
+            if magic != MAGIC:
+                raise ValueError("not a crules resource bundle")
+            (length,) = _LENGTH.unpack(fh.read(_LENGTH.size))
+            self.index: Dict[str, Dict[str, Any]] = json.loads(fh.read(length))[
+                "members"
+            ]
+        self._data_start = len(MAGIC) + _LENGTH.size + length
+
+    @classmethod
+    def from_path(cls, path: Path) -> "ResourceBundle":
+        return cls(lambda: open(path, "rb"))
+
+    def names(self, pattern: str = "*") -> List[str]:
+        """Return member names matching the glob ``pattern``, sorted."""
+        return [
+            name for name in sorted(self.index) if fnmatch.fnmatchcase(name, pattern)
+        ]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.index
+
+    def size(self, name: str) -> int:
+        """Return the size in bytes recorded for ``name``."""
+        return self.index[name]["size"]
+
+    def digest(self, name: str) -> str:
+        """Return the SHA-256 hex digest recorded for ``name``."""
+        return self.index[name]["sha256"]
+
+    def read(self, name: str) -> bytes:
+        """Return the bytes of member ``name``, verified against its digest.
+
+        Raises:
+            KeyError: If the bundle has no such member.
+            ValueError: If the member's bytes do not match the index.
+        """
+        entry = self.index[name]
+        with self._open() as fh:
+            fh.seek(self._data_start + entry["offset"])
+            data = fh.read(entry["size"])
+        if (
+            len(data) != entry["size"]
+            or hashlib.sha256(data).hexdigest() != entry["sha256"]
+        ):
+            raise ValueError(f"Corrupt resource bundle member: {name}")
+        return data
+
+    def extract(self, name: str, dest: Path) -> None:
+        """Write member ``name`` to ``dest`` as raw bytes."""
+        dest.write_bytes(self.read(name))
+
+
+@functools.lru_cache(maxsize=1)
+def load_bundle() -> ResourceBundle:
+    """Open the bundle shipped in the ``crules.rules`` package.
+
+    Raises:
+        FileNotFoundError: If the installed package has no bundle.
+    """
+    from importlib import resources
+
+    ref = resources.files("crules.rules").joinpath(BUNDLE_NAME)
+    if not ref.is_file():
+        raise FileNotFoundError(
+            f"Packaged resource bundle {BUNDLE_NAME} is missing; reinstall crules"
+        )
+    return ResourceBundle(lambda: ref.open("rb"))
+
+
+def write_bundle(rules_dir: Path, output: Optional[Path] = None) -> Path:
+    """Regenerate the bundle from ``rules_dir`` and return its path."""
+    output = Path(output) if output is not None else Path(rules_dir) / BUNDLE_NAME
+    data = build_bundle(collect_members(rules_dir))
+    tmp = output.with_name(f"{output.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, output)
+    return output
+
+
+if __name__ == "__main__":
+    rules_dir = (
+        Path(sys.argv[1]) if len(sys.argv) > 1 else Path(__file__).parent / "rules"
+    )
+    path = write_bundle(rules_dir)
+    print(f"Wrote {path} ({path.stat().st_size} bytes)")
@@ -1,30 +1,34 @@
 """Command-line interface for crules."""
 from pathlib import Path
+from typing import Optional
 import logging
-from importlib.metadata import PackageNotFoundError, version as dist_version
 
 import click
 
 from . import __version__
-from . import config, file_ops
+from . import config, file_ops, targets as target_registry, timings
 
 
 def _cli_version() -> str:
-    """Return PEP 566 distribution version when installed; else ``__version__``."""
+    """Return PEP 566 distribution version when installed; else ``__version__``.
+
+    ``importlib.metadata`` scans every distribution on ``sys.path``, so it is
+    only imported when ``--version`` is actually requested.
+    """
+    from importlib.metadata import PackageNotFoundError, version as dist_version
+
     try:
         return dist_version("crules")
     except PackageNotFoundError:
         return __version__
 
-VALID_TARGETS = (
-    "cursor",
-    "claude",
-    "copilot",
-    "cline",
-    "roo",
-    "windsurf",
-    "aider",
-)
+
+def _print_version(ctx: click.Context, param: click.Parameter, value: bool) -> None:
+    """Eager ``--version`` callback that resolves the version on demand."""
+    if not value or ctx.resilient_parsing:
+        return
+    click.echo(f"crules, version {_cli_version()}")
+    ctx.exit()
 
 logging.basicConfig(
     level=logging.INFO,
@@ -32,11 +36,122 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+def _validate_targets(
+    ctx: click.Context, param: click.Parameter, value: tuple[str, ...]
+) -> tuple[str, ...]:
+    """Normalize ``--target`` names, accepting built-in and plugin targets."""
+    names = tuple(v.lower() for v in value)
+    unknown = [n for n in names if target_registry.get_target(n) is None]
+    if unknown:
+        choices = ", ".join(t.name for t in target_registry.all_targets())
+        raise click.BadParameter(
+            f"unknown target {unknown[0]!r} (choose from {choices})"
+        )
+    return names
+
+
+def _apply_targets(cfg: dict, targets: tuple[str, ...]) -> None:
+    """Resolve ``enable_*`` flags from ``--target`` values or config defaults."""
+    if targets:
+        target_registry.select(cfg, list(targets))
+    else:
+        target_registry.apply_defaults(cfg)
+
+
+def _report_timings(trace_file: Optional[str]) -> None:
+    """Print the phase summary and write the optional trace once ``main`` ends."""
+    recorder = timings.disable()
+    if recorder is None:
+        return
+    print("\ncrules timings (inclusive)\n")
+    print(timings.format_summary(recorder))
+    if trace_file:
+        timings.write_chrome_trace(recorder, Path(trace_file))
+        print(f"\nWrote trace to {trace_file}")
+
+def _print_status(status: dict) -> None:
+    """Print the ``--status`` report as a human-readable table."""
+    checks = status.get("checks", [])
+
+    print("\ncrules status\n")
+    for scope in ("global", "project"):
+        scoped = [c for c in checks if c["scope"] == scope]
+        if not scoped:
+            continue
+        if scope == "global":
+            header = "Global config (~/.config/crules)"
+        else:
+            header = "Project (.crules)"
+        print(f"{header}:")
+        for entry in scoped:
+            prefix = "[OK]" if entry["ok"] else "[MISSING]"
+            print(f"  {prefix} {entry['name']} -> {entry['path']}")
+            remediation = entry.get("remediation")
+            if remediation and not entry["ok"]:
+                print(f"    -> Run: {remediation}")
+        if scope == "project" and status.get("project"):
+            project = status["project"]
+            print(f"  AGENTS.md: {project['agents'].upper()}")
+            if project["missing_modes"]:
+                missing = ", ".join(project["missing_modes"])
+                print(f"  Missing modes: {missing} -> Run: crules --sync")
+        print()
+
+    if "repos" in status:
+        from . import fleet
+
+        fleet.print_status_scan(status)
+
+def _auto_languages(
+    languages: tuple[str, ...], lang_rules_dir: Path, workers: Optional[int]
+) -> tuple[str, ...]:
+    """Add the languages ``--auto`` finds in the current directory to ``languages``."""
+    from . import detect
+
+    available = file_ops.get_available_languages(lang_rules_dir)
+    with timings.span("detect"):
+        histogram = detect.scan_extensions(Path("."), workers=workers)
+        found = detect.detect_languages(histogram, available)
+    if found:
+        summary = ", ".join(f"{lang} ({count} files)" for lang, count in found)
+        logger.info(f"Detected languages: {summary}")
+    else:
+        logger.warning(
+            "No languages with installed rules detected; compiling global rules only"
+        )
+    return tuple(dict.fromkeys([*languages, *(lang for lang, _ in found)]))
+
+def _print_budget(ledger, budgets: Optional[dict]) -> None:
+    """Print the ``--budget`` token report for the outputs of one compile."""
+    from .budget import format_report
+
+    print("\ncrules token budget\n")
+    print(format_report(ledger.report(), budgets))
+
+def _print_setup_report(report: dict, verbose: bool) -> None:
+    """Print what ``--setup`` created, updated, left unchanged or skipped."""
+    counts = ", ".join(
+        f"{len(report[action])} {action}" for action in file_ops.SETUP_ACTIONS
+    )
+    print(f"\ncrules setup: {counts}\n")
+    for action in file_ops.SETUP_ACTIONS:
+        if action == "unchanged" and not verbose:
+            continue
+        for path in report[action]:
+            print(f"  [{action.upper()}] {path}")
+    if report["skipped"]:
+        print("\n  Skipped files differ from the packaged versions; "
+              "use --force to update them.")
+
 @click.command()
-@click.version_option(version=_cli_version(), prog_name='crules')
+@click.option('--version', is_flag=True, expose_value=False, is_eager=True,
+              callback=_print_version, help='Show the version and exit.')
 @click.argument('languages', nargs=-1, required=False)
 @click.option('-f', '--force', is_flag=True, 
-              help='Force overwrite existing files. With --setup, updates existing rule files.')
+              help='Force overwrite existing files. With --setup, updates existing '
+                   'rule files; with --sync, copies every mode file and re-renders '
+                   'every output.')
 @click.option('-v', '--verbose', is_flag=True, 
               help='Enable verbose output with detailed logging')
 @click.option('-l', '--list', 'show_list', is_flag=True, 
@@ -47,16 +162,63 @@ logger = logging.getLogger(__name__)
               help='Refresh global default rules from this package build.')
 @click.option('--status', 'show_status', is_flag=True,
               help='Show crules configuration and project status.')
+@click.option('--json', 'as_json', is_flag=True,
+              help='With --status, print the report as JSON.')
+@click.option('--recursive', 'status_root',
+              type=click.Path(exists=True, file_okay=False),
+              default=None, metavar='ROOT',
+              help='With --status, check every repository with a .crules/modes '
+                   'directory under ROOT (uses --fleet-workers threads).')
 @click.option('--legacy', is_flag=True,
               help='Use legacy .cursorrules file instead of .cursor/rules directory')
-@click.option('-t', '--target', 'targets', multiple=True,
-              type=click.Choice(VALID_TARGETS, case_sensitive=False),
-              help='AI tool targets to generate rules for (may be repeated). '
+@click.option('-t', '--target', 'targets', multiple=True, callback=_validate_targets,
+              metavar='TARGET',
+              help='AI tool targets to generate rules for (may be repeated): '
+                   f'{", ".join(target_registry.BUILTIN_NAMES)}, or a target '
+                   'registered under the crules.targets entry-point group. '
                    'Defaults to all enabled targets in config.')
 @click.option('-b', '--bootstrap', is_flag=True,
               help='Initialize the generic Swarm infrastructure in a repo.')
 @click.option('-S', '--sync', 'sync_modes_flag', is_flag=True,
               help='Sync workflow modes from global config into the local .crules/modes/ directory.')
+@click.option('-w', '--watch', is_flag=True,
+              help='After generating, watch the global, language and workflow sources '
+                   'and recompile only the outputs affected by each change.')
+@click.option('--timings', 'show_timings', is_flag=True,
+              help='Print a per-phase timing summary (config, resources, rendering, '
+                   'writes, .gitignore, Aider conf) when the command finishes.')
+@click.option('--trace', 'trace_file', type=click.Path(dir_okay=False), default=None,
+              help='Write phase timings as a Chrome trace-event JSON file '
+                   '(implies --timings).')
+@click.option('--fleet', 'fleet_paths', multiple=True, metavar='PATH',
+              help='Run against many repositories: a repo directory or a file '
+                   'listing one repo path per line (may be repeated). Combines with '
+                   '--bootstrap, --sync or language arguments and never prompts.')
+@click.option('--fleet-workers', type=click.IntRange(min=1), default=None,
+              help='Worker threads for --fleet, the --status --recursive walk and the '
+                   '--auto tree scan (default: min(32, CPUs + 4)).')
+@click.option('-j', '--jobs', type=click.IntRange(min=1), default=None,
+              help='Write targets and rule files on N threads; useful on NFS and other '
+                   'high-latency filesystems (default: config "jobs", else 1).')
+@click.option('--dedupe', 'dedupe_outputs', is_flag=True, default=None,
+              help='Store byte-identical outputs (e.g. Cline, Roo, Windsurf and Aider '
+                   'copies of a rule) once, hardlinking or reflinking the rest.')
+@click.option('--store', 'output_store', is_flag=True, default=None,
+              help='Publish outputs once to the shared store (~/.cache/crules/store) '
+                   'and symlink this repository\'s rule files into it.')
+@click.option('--budget', 'show_budget', is_flag=True,
+              help='Print estimated token counts per output, per target and per file '
+                   'type after compiling, checked against token_budgets from config.')
+@click.option('--preamble-once', 'preamble_once', is_flag=True, default=None,
+              help='Emit the Universal Preamble in the global rule file only, '
+                   'not in every language file.')
+@click.option('--dedupe-paragraphs', 'dedupe_paragraphs', is_flag=True, default=None,
+              help='Leave out paragraphs of language rules that repeat a paragraph '
+                   'of the global rules.')
+@click.option('--auto', 'auto_detect', is_flag=True,
+              help='Detect languages from the files in this repository (honoring '
+                   '.gitignore) and compile rules for each one that has installed '
+                   'language rules.')
 def main(
     languages: tuple[str, ...],
     force: bool,
@@ -65,10 +227,24 @@ def main(
     setup_dirs: bool,
     refresh_defaults: bool,
     show_status: bool,
+    as_json: bool,
+    status_root: Optional[str],
     legacy: bool,
     targets: tuple[str, ...],
     bootstrap: bool,
     sync_modes_flag: bool,
+    fleet_paths: tuple[str, ...],
+    fleet_workers: Optional[int],
+    jobs: Optional[int],
+    dedupe_outputs: Optional[bool],
+    output_store: Optional[bool],
+    show_budget: bool,
+    preamble_once: Optional[bool],
+    dedupe_paragraphs: Optional[bool],
+    auto_detect: bool,
+    watch: bool,
+    show_timings: bool,
+    trace_file: Optional[str],
 ) -> None:
     """Generate AI assistant rules files.
     
@@ -80,53 +256,74 @@ def main(
     Use --setup to initialize or update the rules directory structure.
     Use --bootstrap to initialize the generic Swarm infrastructure in a repo.
     Use --sync to refresh local .crules/modes/ from global workflow templates.
+    Use --watch to keep generated rules up to date while editing sources.
+    Use --fleet to apply generation, --bootstrap or --sync to many repositories
+    at once, with a per-repository summary at the end.
     Use --refresh-defaults to copy the packaged default_cursorrules into the
     global cursorrules file without touching workflows or language rules.
     Use --status to print a diagnostic report of global and project setup.
+    Use --timings (or --trace FILE) to see where a run spends its time.
+    Use --budget to see how many tokens the generated rules cost each assistant.
     Use --force with --setup to update existing rule files.
     Use --list to see available language rules.
     Use --verbose for detailed operation logging.
     """
     if verbose:
         logging.getLogger().setLevel(logging.DEBUG)
-    
+
+    if show_timings or trace_file:
+        ctx = click.get_current_context()
+        ctx.call_on_close(lambda: _report_timings(trace_file))
+        timings.enable()
+        ctx.with_resource(timings.span("crules"))
+
     try:
         # Handle --setup option
         if setup_dirs:
             logger.info("Setting up crules directory structure...")
-            if file_ops.setup_directory_structure(verbose, force):
-                logger.info("Setup complete!")
-            else:
+            report = file_ops.new_setup_report()
+            if not file_ops.setup_directory_structure(verbose, force, report):
                 raise click.ClickException("Setup failed")
+            _print_setup_report(report, verbose)
+            logger.info("Setup complete!")
             return
 
         # Handle --status option
+        if (as_json or status_root) and not show_status:
+            raise click.UsageError("--json and --recursive require --status")
         if show_status:
-            status = file_ops.report_status()
+            if status_root:
+                from . import fleet
+
+                status = fleet.scan_status(Path(status_root), fleet_workers)
+            else:
+                status = file_ops.report_status()
             all_ok = status.get("all_ok", False)
-            checks = status.get("checks", [])
-
-            print("\ncrules status\n")
-            for scope in ("global", "project"):
-                scoped = [c for c in checks if c["scope"] == scope]
-                if not scoped:
-                    continue
-                header = "Global config (~/.config/crules)" if scope == "global" else "Project (.crules)"
-                print(f"{header}:")
-                for entry in scoped:
-                    prefix = "[OK]" if entry["ok"] else "[MISSING]"
-                    print(f"  {prefix} {entry['name']} -> {entry['path']}")
-                    remediation = entry.get("remediation")
-                    if remediation and not entry["ok"]:
-                        print(f"    -> Run: {remediation}")
-                print()
+
+            if as_json:
+                import json
+
+                print(json.dumps(status, indent=2))
+            else:
+                _print_status(status)
 
             if not all_ok:
                 raise click.ClickException("One or more crules checks failed")
             return
 
         # Load configuration
-        cfg = config.load_config()
+        with timings.span("config.load"):
+            cfg = config.load_config()
+        if jobs is not None:
+            cfg["jobs"] = jobs
+        if dedupe_outputs:
+            cfg["dedupe_outputs"] = True
+        if output_store:
+            cfg["output_store"] = True
+        if preamble_once:
+            cfg["preamble_once"] = True
+        if dedupe_paragraphs:
+            cfg["dedupe_paragraphs"] = True
 
         # Handle standalone --refresh-defaults
         if refresh_defaults and not (bootstrap or sync_modes_flag or show_list or languages):
@@ -135,6 +332,42 @@ def main(
             logger.info("Default rules refreshed")
             return
 
+        # Handle --fleet option
+        if fleet_paths:
+            if auto_detect:
+                raise click.UsageError(
+                    "--auto detects languages for the current repository only"
+                )
+            if bootstrap and sync_modes_flag:
+                raise click.UsageError(
+                    "--fleet accepts only one of --bootstrap or --sync"
+                )
+            if not (bootstrap or sync_modes_flag or languages):
+                raise click.UsageError(
+                    "--fleet needs languages to compile, --bootstrap or --sync"
+                )
+            if refresh_defaults and not file_ops.refresh_default_rules(verbose):
+                raise click.ClickException("Failed to refresh default rules")
+            mode = "bootstrap" if bootstrap else "sync" if sync_modes_flag else "rules"
+            global_rules = Path(cfg['global_rules_path']).expanduser()
+            lang_rules_dir = Path(cfg['language_rules_dir']).expanduser()
+            if languages and not file_ops.check_files_exist(
+                global_rules, lang_rules_dir, list(languages)
+            ):
+                raise click.ClickException("Required files not found")
+            _apply_targets(cfg, targets)
+
+            from . import fleet
+
+            repos = fleet.read_fleet_paths(fleet_paths)
+            results = fleet.run_fleet(
+                cfg, repos, list(languages), mode=mode, workers=fleet_workers
+            )
+            fleet.print_fleet_summary(results)
+            if not all(r["ok"] for r in results):
+                raise click.ClickException("One or more fleet repositories failed")
+            return
+
         # Handle --bootstrap option
         if bootstrap:
             logger.info("Bootstrapping Swarm infrastructure...")
@@ -151,7 +384,7 @@ def main(
                 if not file_ops.refresh_default_rules(verbose):
                     raise click.ClickException("Failed to refresh default rules before sync")
             logger.info("Syncing workflow modes...")
-            if file_ops.sync_modes(cfg):
+            if file_ops.sync_modes(cfg, force=force):
                 logger.info("Sync complete!")
             else:
                 raise click.ClickException("Sync failed")
@@ -165,8 +398,11 @@ def main(
             file_ops.list_available_languages(lang_rules_dir)
             return
             
+        if auto_detect:
+            languages = _auto_languages(languages, lang_rules_dir, fleet_workers)
+
         # Require languages argument if not listing or setting up
-        if not languages:
+        if not languages and not watch and not auto_detect:
             raise click.UsageError("Please specify at least one language or use --list to see available options")
         
         # Suggest setup if directories don't exist
@@ -183,42 +419,39 @@ def main(
             if not file_ops.backup_existing_rules(force):
                 return
                 
-            content = file_ops.combine_rules(
-                global_rules, 
+            output_file = Path(".cursorrules")
+            file_ops.write_combined_rules(
+                output_file,
+                global_rules,
                 lang_rules_dir,
                 languages,
-                cfg['delimiter']
+                cfg['delimiter'],
+                dedupe=cfg.get('dedupe_paragraphs', False),
+                fragments_dir=cfg.get('fragments_dir'),
             )
-            
-            output_file = Path(".cursorrules")
-            output_file.write_text(content)
             logger.info(f"Successfully created {output_file}")
         else:
-            if targets:
-                tset = {t.lower() for t in targets}
-                cfg["enable_cursor"] = "cursor" in tset
-                cfg["enable_claude"] = "claude" in tset
-                cfg["enable_copilot"] = "copilot" in tset
-                cfg["enable_cline"] = "cline" in tset
-                cfg["enable_roo"] = "roo" in tset
-                cfg["enable_windsurf"] = "windsurf" in tset
-                cfg["enable_aider"] = "aider" in tset
-            else:
-                for key in (
-                    "enable_cursor",
-                    "enable_claude",
-                    "enable_copilot",
-                    "enable_cline",
-                    "enable_roo",
-                    "enable_windsurf",
-                    "enable_aider",
-                ):
-                    cfg.setdefault(key, True)
-
-            if file_ops.write_rules_to_ai_dirs(cfg, global_rules, lang_rules_dir, list(languages), force):
+            _apply_targets(cfg, targets)
+
+            ledger = None
+            if show_budget:
+                from .budget import BudgetLedger
+
+                ledger = BudgetLedger()
+            written = file_ops.write_rules_to_ai_dirs(
+                cfg, global_rules, lang_rules_dir, list(languages), force, ledger=ledger
+            )
+            if ledger is not None:
+                _print_budget(ledger, cfg.get("token_budgets"))
+            if written:
                 logger.info("Successfully created rules for AI assistants")
             else:
                 raise click.ClickException("Failed to create AI assistant rules")
+
+            if watch:
+                from .watch import watch_rules
+
+                watch_rules(cfg, list(languages))
         
     except Exception as e:
         raise click.ClickException(str(e)) 
\ No newline at end of file
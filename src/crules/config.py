@@ -1,7 +1,6 @@
 """Configuration management for crules."""
 from pathlib import Path
 from typing import Dict, Any
-import yaml
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,6 +16,15 @@ DEFAULT_CONFIG = {
     "enable_roo": True,
     "enable_windsurf": True,
     "enable_aider": True,
+    "fsync_outputs": True,
+    "jobs": 1,
+    "dedupe_outputs": False,
+    "output_store": False,
+    "output_store_dir": "~/.cache/crules/store",
+    "preamble_once": False,
+    "dedupe_paragraphs": False,
+    "fragments_dir": "~/.config/crules/fragments",
+    "token_budgets": {},
 }
 
 def load_config() -> Dict[str, Any]:
@@ -29,6 +37,8 @@ def load_config() -> Dict[str, Any]:
     
     try:
         if config_path.exists():
+            import yaml  # deferred: only needed when a config file exists
+
             with config_path.open() as f:
                 config = yaml.safe_load(f)
                 logger.debug(f"Loaded configuration from {config_path}")
@@ -37,4 +47,4 @@ def load_config() -> Dict[str, Any]:
         logger.warning(f"Error loading config file: {e}")
     
     logger.debug("Using default configuration")
-    return DEFAULT_CONFIG 
\ No newline at end of file
+    return dict(DEFAULT_CONFIG) 
\ No newline at end of file
@@ -0,0 +1,394 @@
+"""Detect which languages a repository uses, for ``crules --auto``.
+
+The tree is walked once, honoring ``.gitignore`` files and
+``.git/info/exclude``, and reduced to a histogram of file extensions, which
+is then matched against the installed language rules. Directories are listed
+with ``os.scandir`` on a thread pool, one task per uncached directory, up to
+``max_files`` files.
+
+Each directory's extension counts and subdirectories are cached under
+``~/.cache/crules/detect`` together with its mtime (and its ``.gitignore``'s
+mtime). Adding, removing or renaming a file changes its directory's mtime, so
+a repeat scan only lists directories that changed and costs one ``stat`` per
+unchanged directory. Editing a ``.gitignore`` rescans the subtree it governs.
+"""
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+import hashlib
+import json
+import logging
+import os
+import re
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = "~/.cache/crules/detect"
+CACHE_VERSION = 1
+DEFAULT_MAX_FILES = 2_000_000
+
+# Version-control metadata is never scanned, ignored or not.
+SKIP_DIRS = frozenset({".git", ".hg", ".svn"})
+
+# File extension (lower case, no dot) -> language rule name (``cursor.<name>``).
+# Extensions not listed here map to a rule of the same name, e.g. ``.lua``.
+EXTENSION_LANGUAGES = {
+    "py": "python", "pyi": "python", "pyx": "python",
+    "sh": "bash", "bash": "bash", "zsh": "bash",
+    "js": "javascript", "mjs": "javascript", "cjs": "javascript", "jsx": "javascript",
+    "ts": "typescript", "tsx": "typescript", "mts": "typescript", "cts": "typescript",
+    "pl": "perl", "pm": "perl", "t": "perl",
+    "rs": "rust", "rb": "ruby", "kt": "kotlin", "kts": "kotlin",
+    "c": "c", "h": "c",
+    "cc": "cpp", "cpp": "cpp", "cxx": "cpp", "hh": "cpp", "hpp": "cpp", "hxx": "cpp",
+    "cs": "csharp", "fs": "fsharp", "ex": "elixir", "exs": "elixir",
+    "hs": "haskell", "ml": "ocaml", "tf": "terraform",
+}
+
+
+class _Rule(NamedTuple):
+    regex: "re.Pattern[str]"
+    negated: bool
+    dir_only: bool
+    anchored: bool
+
+
+def _glob_to_regex(pattern: str) -> str:
+    out = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == len(pattern):
+            out.append("/.*")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            out.append("[^/]")
+            i += 1
+        elif pattern[i] == "[":
+            end = pattern.find("]", i + 2)
+            if end == -1:
+                out.append(re.escape("["))
+                i += 1
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = end + 1
+        elif pattern[i] == "\\" and i + 1 < len(pattern):
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(out) + r"\Z"
+
+
+def parse_ignore_file(path: Path) -> List[_Rule]:
+    """Parse a ``.gitignore``-format file into match rules; missing files yield none.
+
+    Supports comments, ``!`` negation, trailing-``/`` directory patterns,
+    anchoring by a leading or inner ``/``, and ``*``, ``?``, ``[...]`` and
+    ``**`` globs.
+    """
+    try:
+        text = path.read_text(encoding="utf-8", errors="replace")
+    except OSError:
+        return []
+    rules = []
+    for line in text.splitlines():
+        line = line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negated = line.startswith("!")
+        if negated:
+            line = line[1:]
+        elif line.startswith("\\"):
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+        anchored = "/" in line
+        line = line.lstrip("/")
+        rules.append(
+            _Rule(re.compile(_glob_to_regex(line)), negated, dir_only, anchored)
+        )
+    return rules
+
+
+# One directory's rules: (base path relative to the scan root with a trailing
+# "/", rules).
+IgnoreStack = Tuple[Tuple[str, Tuple[_Rule, ...]], ...]
+
+
+def is_ignored(stack: IgnoreStack, rel: str, is_dir: bool) -> bool:
+    """Apply ``stack`` to the root-relative POSIX path ``rel``; the last match wins."""
+    ignored = False
+    name = rel.rsplit("/", 1)[-1]
+    for base, rules in stack:
+        sub = rel[len(base):]
+        for rule in rules:
+            if rule.dir_only and not is_dir:
+                continue
+            if rule.regex.match(sub if rule.anchored else name):
+                ignored = not rule.negated
+    return ignored
+
+
+def _extension(name: str) -> Optional[str]:
+    dot = name.rfind(".")
+    if dot <= 0 or dot == len(name) - 1:
+        return None
+    return name[dot + 1:].lower()
+
+
+class _DirTask(NamedTuple):
+    rel: str
+    stack: IgnoreStack
+    rescan: bool
+
+
+def _scan_dir(
+    root: str, task: _DirTask, cached: Optional[Dict[str, Any]]
+) -> Tuple[Dict[str, Any], bool, List[_DirTask]]:
+    """List one directory, reusing ``cached`` when its mtimes are unchanged.
+
+    Returns:
+        The directory's cache entry, whether it was listed, and tasks for its
+        subdirectories.
+    """
+    path = os.path.join(root, task.rel) if task.rel else root
+    st = os.stat(path)
+    gitignore = os.path.join(path, ".gitignore")
+    gi_mtime: Optional[int] = None
+    # Creating or deleting a .gitignore changes the directory's mtime, so an
+    # unchanged directory without one in the cache still has none.
+    if (
+        cached is None
+        or cached.get("m") != st.st_mtime_ns
+        or cached.get("g") is not None
+    ):
+        try:
+            gi_mtime = os.stat(gitignore).st_mtime_ns
+        except OSError:
+            pass
+
+    stack = task.stack
+    if gi_mtime is not None:
+        rules = tuple(parse_ignore_file(Path(gitignore)))
+        if rules:
+            stack = stack + ((task.rel + "/" if task.rel else "", rules),)
+    rescan_children = task.rescan or (
+        cached is not None and cached.get("g") != gi_mtime
+    )
+
+    if (
+        not task.rescan
+        and cached is not None
+        and cached.get("m") == st.st_mtime_ns
+        and cached.get("g") == gi_mtime
+    ):
+        entry, listed = cached, False
+    else:
+        counts: Dict[str, int] = {}
+        subdirs = []
+        with os.scandir(path) as it:
+            for item in it:
+                rel = f"{task.rel}/{item.name}" if task.rel else item.name
+                try:
+                    is_dir = item.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+                if is_dir and item.name in SKIP_DIRS:
+                    continue
+                if is_ignored(stack, rel, is_dir):
+                    continue
+                if is_dir:
+                    subdirs.append(item.name)
+                elif item.is_file(follow_symlinks=False):
+                    ext = _extension(item.name)
+                    if ext is not None:
+                        counts[ext] = counts.get(ext, 0) + 1
+        entry = {"m": st.st_mtime_ns, "g": gi_mtime, "c": counts, "d": sorted(subdirs)}
+        listed = True
+
+    children = [
+        _DirTask(f"{task.rel}/{name}" if task.rel else name, stack, rescan_children)
+        for name in entry["d"]
+    ]
+    return entry, listed, children
+
+
+def _scan_subtree(
+    root: str, task: _DirTask, old: Dict[str, Dict[str, Any]]
+) -> Tuple[List[Tuple[str, Dict[str, Any], bool]], List[_DirTask]]:
+    """Scan ``task`` and, inline, every cached directory below it.
+
+    Validating a cached directory is a ``stat`` or two, far cheaper than a
+    pool round trip, so only directories without a cache entry are handed
+    back to be listed on other threads.
+
+    Returns:
+        ``(rel, entry, listed)`` for each directory visited, and the
+        uncached subdirectories left to scan.
+    """
+    results = []
+    deferred = []
+    stack = [task]
+    while stack:
+        current = stack.pop()
+        try:
+            entry, listed, children = _scan_dir(root, current, old.get(current.rel))
+        except OSError as e:
+            logger.debug(f"Cannot scan {current.rel or root}: {e}")
+            continue
+        results.append((current.rel, entry, listed))
+        for child in children:
+            if child.rel in old and not child.rescan:
+                stack.append(child)
+            else:
+                deferred.append(child)
+    return results, deferred
+
+
+def _cache_path(cache_dir: Path, root: Path) -> Path:
+    return cache_dir / f"{hashlib.sha256(str(root).encode()).hexdigest()}.json"
+
+
+def _load_cache(
+    path: Path, root: Path, exclude_mtime: Optional[int]
+) -> Dict[str, Dict[str, Any]]:
+    try:
+        data = json.loads(path.read_text())
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.debug(f"Ignoring unreadable detect cache {path}: {e}")
+        return {}
+    if (
+        data.get("version") != CACHE_VERSION
+        or data.get("root") != str(root)
+        or data.get("exclude") != exclude_mtime
+    ):
+        return {}
+    return data.get("dirs", {})
+
+
+def scan_extensions(
+    root: Path,
+    cache_dir: Optional[Path] = None,
+    workers: Optional[int] = None,
+    max_files: int = DEFAULT_MAX_FILES,
+) -> Dict[str, int]:
+    """Count files by extension under ``root``, honoring ``.gitignore``.
+
+    Args:
+        root: Repository to scan.
+        cache_dir: Where to keep per-directory results; ``None`` uses
+            ``~/.cache/crules/detect``.
+        workers: Thread pool size. Defaults to ``min(32, cpu_count + 4)``.
+        max_files: Stop listing new directories once this many files have
+            been counted; a truncated scan is not cached.
+
+    Returns:
+        Dict[str, int]: Lower-case extension (without the dot) -> file count.
+    """
+    root = Path(root).resolve()
+    cache_dir = Path(cache_dir or DEFAULT_CACHE_DIR).expanduser()
+    cache_file = _cache_path(cache_dir, root)
+    exclude_file = root / ".git" / "info" / "exclude"
+    try:
+        exclude_mtime: Optional[int] = exclude_file.stat().st_mtime_ns
+    except OSError:
+        exclude_mtime = None
+    old = _load_cache(cache_file, root, exclude_mtime)
+
+    exclude = (
+        tuple(parse_ignore_file(exclude_file)) if exclude_mtime is not None else ()
+    )
+    stack: IgnoreStack = (("", exclude),) if exclude else ()
+
+    dirs: Dict[str, Dict[str, Any]] = {}
+    histogram: Dict[str, int] = {}
+    listed = 0
+    files = 0
+    truncated = False
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        first = _DirTask("", stack, False)
+        pending = {pool.submit(_scan_subtree, str(root), first, old)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                results, deferred = future.result()
+                for rel, entry, was_listed in results:
+                    dirs[rel] = entry
+                    listed += was_listed
+                    for ext, count in entry["c"].items():
+                        histogram[ext] = histogram.get(ext, 0) + count
+                        files += count
+                if files > max_files:
+                    truncated = True
+                    continue
+                for child in deferred:
+                    pending.add(pool.submit(_scan_subtree, str(root), child, old))
+
+    if truncated:
+        logger.warning(
+            f"Stopped scanning {root} after {files} files; "
+            "language detection may be incomplete"
+        )
+    elif listed or dirs.keys() != old.keys():
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+            tmp.write_text(
+                json.dumps(
+                    {
+                        "version": CACHE_VERSION,
+                        "root": str(root),
+                        "exclude": exclude_mtime,
+                        "dirs": dirs,
+                    }
+                )
+            )
+            os.replace(tmp, cache_file)
+        except OSError as e:
+            logger.debug(f"Could not write detect cache {cache_file}: {e}")
+    logger.debug(
+        f"Scanned {len(dirs)} directories under {root} ({listed} listed, {files} files)"
+    )
+    return histogram
+
+
+def detect_languages(
+    histogram: Dict[str, int],
+    available: Iterable[str],
+    min_files: int = 1,
+) -> List[Tuple[str, int]]:
+    """Match an extension histogram against the installed language rules.
+
+    Args:
+        histogram: Output of `scan_extensions`.
+        available: Language rule names, e.g. ``get_available_languages()`` keys.
+        min_files: Minimum number of files for a language to count as present.
+
+    Returns:
+        ``(language, file count)`` pairs for available languages, most files first.
+    """
+    available = set(available)
+    totals: Dict[str, int] = {}
+    for ext, count in histogram.items():
+        language = EXTENSION_LANGUAGES.get(ext, ext)
+        if language in available:
+            totals[language] = totals.get(language, 0) + count
+    found = [(lang, count) for lang, count in totals.items() if count >= min_files]
+    return sorted(found, key=lambda item: (-item[1], item[0]))
@@ -1,94 +1,202 @@
 """File operations for crules."""
 from pathlib import Path
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Iterator, Tuple
+import io
 import logging
-import shutil
-import yaml
-import click
-from importlib import resources
-from .ai_managers import (
-    AiderManager,
-    ClaudeManager,
-    ClineManager,
-    CopilotManager,
-    CursorManager,
-    RooManager,
-    WindsurfManager,
-)
+import os
+from . import targets
+from .gitignore import update_ignore_block
+from .render import RuleBody, render_body
+from .timings import span, timed
+
+# PyYAML, click, shutil, the resource bundle and the AI managers are imported inside
+# the functions that need them so `crules --version` / `--list` start fast.
 
 logger = logging.getLogger(__name__)
 
-def copy_predefined_rules(lang_rules_dir: Path, verbose: bool = False, force: bool = False) -> None:
-    """Copy predefined language rules to the lang_rules directory."""
+# Mode files `bootstrap_swarm` installs into .crules/modes/.
+MODE_FILES = ("MANAGER.md", "CODER.md", "GIT_POLICY.md", "BOOTSTRAPPER.md")
+
+# (name, body, globs) for one compiled rule file, e.g. ("global", body, ["*"]).
+RuleSource = Tuple[str, RuleBody, List[str]]
+
+# Outcomes recorded by --setup for each installed file, in report order.
+SETUP_ACTIONS = ("created", "updated", "unchanged", "skipped")
+
+# Config keys written by --setup; other keys in config.yaml are left alone.
+SETUP_CONFIG_DEFAULTS = {
+    "project_rules_dir": ".cursor/rules",
+    "delimiter": "\n# --- Delimiter ---\n",
+    "use_legacy": False,
+    "file_extension": ".mdc",
+}
+
+
+def new_setup_report() -> Dict[str, List[str]]:
+    """Return an empty ``{action: [paths]}`` report for `setup_directory_structure`."""
+    return {action: [] for action in SETUP_ACTIONS}
+
+
+def _file_sha256(path: Path) -> str:
+    import hashlib
+
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _record(report: Optional[Dict[str, List[str]]], action: str, path: Path) -> str:
+    if report is not None:
+        report[action].append(str(path))
+    return action
+
+
+def _install_resource(
+    bundle: Any,
+    name: str,
+    dest: Path,
+    force: bool,
+    report: Optional[Dict[str, List[str]]] = None,
+) -> str:
+    """Copy bundle member ``name`` to ``dest`` unless it already holds those bytes.
+
+    Existing files are compared by size and then SHA-256 against the bundle
+    index, so unchanged files are never rewritten and keep their mtime.
+    Files that differ are only replaced with ``force``.
+
+    Returns:
+        str: The action taken, one of `SETUP_ACTIONS`.
+    """
+    try:
+        st = dest.stat()
+    except FileNotFoundError:
+        bundle.extract(name, dest)
+        return _record(report, "created", dest)
+    if st.st_size == bundle.size(name) and _file_sha256(dest) == bundle.digest(name):
+        return _record(report, "unchanged", dest)
+    if not force:
+        return _record(report, "skipped", dest)
+    bundle.extract(name, dest)
+    return _record(report, "updated", dest)
+
+
+@timed("setup.lang_rules")
+def copy_predefined_rules(
+    lang_rules_dir: Path,
+    verbose: bool = False,
+    force: bool = False,
+    report: Optional[Dict[str, List[str]]] = None,
+) -> None:
+    """Copy predefined language rules from the resource bundle to lang_rules."""
+    from .bundle import load_bundle
+
     try:
-        # Get predefined rules using importlib.resources
-        with resources.as_file(resources.files('crules.rules')) as rules_path:
-            if not rules_path.is_dir():
-                logger.warning("No predefined rules found in package")
-                return
-                
-            if verbose:
-                logger.debug(f"Looking for rules in: {rules_path}")
-                
-            # Copy each rule file found
-            for rule_file in rules_path.glob('cursor.*'):
-                try:
-                    if verbose:
-                        logger.debug(f"Processing rule file: {rule_file}")
-                    with rule_file.open('r') as src:
-                        dest_file = lang_rules_dir / rule_file.name
-                        if verbose:
-                            logger.debug(f"Destination file: {dest_file} (exists: {dest_file.exists()}, force: {force})")
-                        # Always copy if force is True or file doesn't exist
-                        if force or not dest_file.exists():
-                            content = src.read()
-                            dest_file.write_text(content)
-                            if verbose:
-                                logger.info(f"{'Updated' if dest_file.exists() else 'Copied'} rules: {rule_file.name}")
-                                logger.debug(f"Content length: {len(content)} bytes")
-                        elif verbose:
-                            logger.info(f"Skipped existing rules: {rule_file.name}")
-                except Exception as e:
-                    logger.error(f"Failed to copy {rule_file.name}: {e}")
-                    raise  # Re-raise to see full traceback in verbose mode
-                    
+        bundle = load_bundle()
+        for name in bundle.names("cursor.*"):
+            try:
+                action = _install_resource(
+                    bundle, name, lang_rules_dir / name, force, report
+                )
+                if verbose:
+                    logger.info(f"{action.capitalize()} rules: {name}")
+            except Exception as e:
+                logger.error(f"Failed to copy {name}: {e}")
+                raise  # Re-raise to see full traceback in verbose mode
+
     except Exception as e:
         logger.error(f"Failed to copy predefined rules: {e}")
         raise  # Re-raise to see full traceback in verbose mode
 
-def copy_workflow_files(workflows_dir: Path, verbose: bool = False, force: bool = False) -> None:
-    """Copy workflow mode files (MANAGER.md, CODER.md) to the workflows directory."""
+@timed("setup.workflows")
+def copy_workflow_files(
+    workflows_dir: Path,
+    verbose: bool = False,
+    force: bool = False,
+    report: Optional[Dict[str, List[str]]] = None,
+) -> None:
+    """Copy workflow mode files (MANAGER.md, CODER.md) from the resource bundle."""
+    from .bundle import load_bundle
+
     try:
-        with resources.as_file(resources.files('crules.rules.workflows')) as wf_path:
-            if not wf_path.is_dir():
-                logger.warning("No workflow files found in package")
-                return
-
-            for md_file in wf_path.glob('*.md'):
-                try:
-                    dest_file = workflows_dir / md_file.name
-                    if force or not dest_file.exists():
-                        dest_file.write_text(md_file.read_text())
-                        if verbose:
-                            logger.info(f"{'Updated' if dest_file.exists() else 'Copied'} workflow: {md_file.name}")
-                    elif verbose:
-                        logger.info(f"Skipped existing workflow: {md_file.name}")
-                except Exception as e:
-                    logger.error(f"Failed to copy {md_file.name}: {e}")
-                    raise
+        bundle = load_bundle()
+        for name in bundle.names("workflows/*.md"):
+            filename = name.rsplit("/", 1)[-1]
+            try:
+                action = _install_resource(
+                    bundle, name, workflows_dir / filename, force, report
+                )
+                if verbose:
+                    logger.info(f"{action.capitalize()} workflow: {filename}")
+            except Exception as e:
+                logger.error(f"Failed to copy {filename}: {e}")
+                raise
 
     except Exception as e:
         logger.error(f"Failed to copy workflow files: {e}")
         raise
 
 
-def setup_directory_structure(verbose: bool = False, force: bool = False) -> bool:
+def _merge_setup_config(
+    config_file: Path,
+    defaults: Dict[str, Any],
+    force: bool,
+    report: Optional[Dict[str, List[str]]] = None,
+) -> str:
+    """Create ``config.yaml`` or, with ``force``, add the default keys it lacks.
+
+    Keys already present keep their values, and new keys are appended as
+    text so the user's comments and ordering survive.
+
+    Returns:
+        str: The action taken, one of `SETUP_ACTIONS`.
+    """
+    import yaml
+
+    if not config_file.exists():
+        config_file.write_text(yaml.dump(defaults, default_flow_style=False))
+        return _record(report, "created", config_file)
+
+    text = config_file.read_text()
+    existing = yaml.safe_load(text) or {}
+    if not isinstance(existing, dict):
+        logger.warning(f"{config_file} is not a mapping; leaving it unchanged")
+        return _record(report, "skipped", config_file)
+    missing = {key: value for key, value in defaults.items() if key not in existing}
+    if not missing:
+        return _record(report, "unchanged", config_file)
+    if not force:
+        return _record(report, "skipped", config_file)
+
+    if text and not text.endswith("\n"):
+        text += "\n"
+    config_file.write_text(text + yaml.dump(missing, default_flow_style=False))
+    logger.debug(f"Added config keys {sorted(missing)} to {config_file}")
+    return _record(report, "updated", config_file)
+
+
+@timed("setup")
+def setup_directory_structure(
+    verbose: bool = False,
+    force: bool = False,
+    report: Optional[Dict[str, List[str]]] = None,
+) -> bool:
     """Create necessary directories and files for crules.
-    
+
+    Installed files are compared with the packaged ones by hash and only
+    written when missing, or when they differ and ``force`` is set. An
+    existing ``config.yaml`` is merged key by key: ``force`` adds missing
+    default keys but never changes values that are already set.
+
     Args:
         verbose: Whether to show verbose output
-        force: Whether to overwrite existing files
+        force: Whether to overwrite existing files that differ from the packaged ones
+        report: Optional dict from `new_setup_report`, filled with the
+            paths created, updated, unchanged and skipped
     """
+    from .bundle import load_bundle
+
     try:
         base_dir = Path("~/.config/crules").expanduser()
         lang_rules_dir = base_dir / "lang_rules"
@@ -109,40 +217,44 @@ def setup_directory_structure(verbose: bool = False, force: bool = False) -> boo
         if verbose:
             logger.info(f"Created directory: {workflows_dir}")
 
+        fragments_dir = base_dir / "fragments"
+        fragments_dir.mkdir(exist_ok=True)
+        if verbose:
+            logger.info(f"Created directory: {fragments_dir}")
+
         # Copy predefined language rules
-        copy_predefined_rules(lang_rules_dir, verbose, force)
+        copy_predefined_rules(lang_rules_dir, verbose, force, report)
 
         # Copy workflow mode files
-        copy_workflow_files(workflows_dir, verbose, force)
+        copy_workflow_files(workflows_dir, verbose, force, report)
 
         # Create or update global rules file
-        if not global_rules.exists() or force:
-            try:
-                with resources.files('crules.rules').joinpath('default_cursorrules').open('r') as src:
-                    global_rules.write_text(src.read())
-                    if verbose:
-                        logger.info(f"{'Updated' if global_rules.exists() else 'Created'} file with default rules: {global_rules}")
-            except Exception as e:
-                logger.error(f"Failed to copy default rules: {e}")
+        try:
+            action = _install_resource(
+                load_bundle(), "default_cursorrules", global_rules, force, report
+            )
+            if verbose:
+                logger.info(
+                    f"{action.capitalize()} file with default rules: {global_rules}"
+                )
+        except Exception as e:
+            logger.error(f"Failed to copy default rules: {e}")
+            if not global_rules.exists():
                 logger.warning("Creating empty file instead")
                 global_rules.touch()
+                _record(report, "created", global_rules)
                 if verbose:
                     logger.info(f"Created empty file: {global_rules}")
 
-        # Create or update default config
-        if not config_file.exists() or force:
-            default_config = {
-                "global_rules_path": str(global_rules),
-                "language_rules_dir": str(lang_rules_dir),
-                "project_rules_dir": ".cursor/rules",
-                "delimiter": "\n# --- Delimiter ---\n",
-                "use_legacy": False,
-                "file_extension": ".mdc"
-            }
-            with config_file.open('w') as f:
-                yaml.dump(default_config, f, default_flow_style=False)
-            if verbose:
-                logger.info(f"{'Updated' if config_file.exists() else 'Created'} file: {config_file}")
+        # Create or merge default config
+        default_config = {
+            "global_rules_path": str(global_rules),
+            "language_rules_dir": str(lang_rules_dir),
+            **SETUP_CONFIG_DEFAULTS,
+        }
+        action = _merge_setup_config(config_file, default_config, force, report)
+        if verbose:
+            logger.info(f"{action.capitalize()} file: {config_file}")
 
         return True
     except Exception as e:
@@ -191,6 +303,8 @@ def check_files_exist(global_rules: Path, language_rules_dir: Path, languages: L
 
 def backup_existing_rules(force: bool = False) -> bool:
     """Backup existing .cursorrules file if it exists."""
+    import shutil
+
     rules_file = Path(".cursorrules")
     if not rules_file.exists():
         return True
@@ -210,37 +324,202 @@ def backup_existing_rules(force: bool = False) -> bool:
         logger.error(f"Failed to create backup: {e}")
         return False
 
-def combine_rules(global_rules: Path, language_rules_dir: Path, 
-                 languages: List[str], delimiter: str) -> str:
-    """Combine global and language-specific rules."""
-    content_parts = []
-    
-    # Add global rules
+# Characters of source text read at a time by the streaming combine.
+COMBINE_CHUNK_CHARS = 1024 * 1024
+# Lines per batch when paragraph dedupe re-batches a language file.
+COMBINE_BATCH_LINES = 4096
+
+
+def _stripped_text(path: Path, text: Optional[str] = None) -> Iterator[str]:
+    """Yield ``path.read_text().strip()`` in chunks, without reading it whole.
+
+    Trailing whitespace of each chunk is held back until more text follows,
+    so only the very end of the file is dropped. If ``text`` is given (e.g.
+    the source with its ``@include`` lines expanded) it is used instead of
+    the file's contents.
+    """
+    started = False
+    pending = ""
+    with open(path) if text is None else io.StringIO(text) as f:
+        while True:
+            chunk = f.read(COMBINE_CHUNK_CHARS)
+            if not chunk:
+                break
+            if not started:
+                chunk = chunk.lstrip()
+                if not chunk:
+                    continue
+                started = True
+            body = chunk.rstrip()
+            if not body:
+                pending += chunk
+                continue
+            yield pending + body
+            pending = chunk[len(body):]
+
+
+def _stripped_line_batches(
+    path: Path, text: Optional[str] = None
+) -> Iterator[List[str]]:
+    """Yield the lines of ``path.read_text().strip()`` (or ``text``) in batches."""
+    carry = None
+    for text in _stripped_text(path, text):
+        lines = ((carry or "") + text).split("\n")
+        carry = lines.pop()
+        if lines:
+            yield lines
+    if carry is not None:
+        yield [carry]
+
+
+def _deduped_batches(
+    index: Any, batches: Iterator[List[str]], stats: Dict[str, int]
+) -> Iterator[List[str]]:
+    """Re-batch the lines of ``batches`` that `ParagraphIndex.filter` keeps."""
+    import itertools
+
+    lines = index.filter((line for batch in batches for line in batch), stats)
+    while True:
+        batch = list(itertools.islice(lines, COMBINE_BATCH_LINES))
+        if not batch:
+            return
+        yield batch
+
+
+def _log_dedupe_savings(stats: Dict[str, int]) -> None:
+    from .budget import estimate_tokens
+
+    if stats["paragraphs"]:
+        tokens = estimate_tokens(stats["bytes"])
+        logger.info(
+            f"Paragraph dedupe: dropped {stats['paragraphs']} paragraph(s) repeated "
+            f"from global rules, saving {stats['bytes']} bytes (~{tokens} tokens)"
+        )
+
+
+def _expanded_text(resolver: Any, name: str, path: Path) -> Optional[str]:
+    """Return ``path`` with its ``@include`` lines expanded, or None if it has none."""
+    body = RuleBody.from_path(path)
+    resolved = resolver.resolve(name, body, path)
+    return None if resolved is body else resolved.text()
+
+
+def _combined_chunks(global_rules: Path, language_rules_dir: Path,
+                     languages: List[str], delimiter: str,
+                     dedupe: bool = False,
+                     fragments_dir: Optional[Path] = None) -> Iterator[str]:
+    """Yield the combined rules text in chunks of at most a few MB."""
+    from .fragments import get_fragment_resolver
+
+    resolver = get_fragment_resolver(fragments_dir)
     try:
-        content_parts.append(global_rules.read_text().strip())
+        global_text = _expanded_text(resolver, "global", global_rules)
+        yield from _stripped_text(global_rules, global_text)
     except Exception as e:
         logger.error(f"Failed to read global rules: {e}")
         raise
-        
-    # Add language-specific rules
+
+    index = None
+    if dedupe and languages:
+        from .paragraphs import ParagraphIndex, new_dedupe_stats
+
+        index = ParagraphIndex()
+        index.add(
+            line
+            for batch in _stripped_line_batches(global_rules, global_text)
+            for line in batch
+        )
+        stats = new_dedupe_stats()
+
     for lang in languages:
         try:
             lang_file = language_rules_dir / f"cursor.{lang}"
+            lang_text = _expanded_text(resolver, lang, lang_file)
             # Add just the language header and content
-            content = lang_file.read_text().strip()
-            # Remove any existing language headers or delimiters
-            content = content.replace("# --- Delimiter ---", "")
-            content = '\n'.join(line for line in content.splitlines() 
-                              if not line.strip().startswith("# Rules for"))
-            content_parts.append(f"# Rules for {lang}\n{content}")
+            yield f"{delimiter}# Rules for {lang}\n"
+            first = True
+            batches = _stripped_line_batches(lang_file, lang_text)
+            if index is not None:
+                batches = _deduped_batches(index, batches, stats)
+            for batch in batches:
+                # Remove any existing language headers or delimiters
+                lines = [
+                    line
+                    for line in (
+                        raw.replace("# --- Delimiter ---", "") for raw in batch
+                    )
+                    if not line.strip().startswith("# Rules for")
+                ]
+                if lines:
+                    yield ("" if first else "\n") + "\n".join(lines)
+                    first = False
         except Exception as e:
             logger.error(f"Failed to read rules for {lang}: {e}")
             raise
-    
+    if index is not None:
+        _log_dedupe_savings(stats)
+
+
+@timed("combine")
+def combine_rules(global_rules: Path, language_rules_dir: Path, 
+                 languages: List[str], delimiter: str, dedupe: bool = False,
+                 fragments_dir: Optional[Path] = None) -> str:
+    """Combine global and language-specific rules.
+
+    ``@include`` lines are expanded from ``fragments_dir`` (see
+    `crules.fragments`). With ``dedupe``, paragraphs of the language rules
+    that repeat a global paragraph are left out (see `crules.paragraphs`).
+    """
+    content = "".join(_combined_chunks(
+        global_rules, language_rules_dir, languages, delimiter, dedupe, fragments_dir
+    ))
+
+    # Update .gitignore if it exists
+    update_gitignore()
+
+    return content
+
+
+@timed("combine")
+def write_combined_rules(
+    output_file: Path,
+    global_rules: Path,
+    language_rules_dir: Path,
+    languages: List[str],
+    delimiter: str,
+    dedupe: bool = False,
+    fragments_dir: Optional[Path] = None,
+) -> None:
+    """Stream the combined rules into ``output_file`` without building them in memory.
+
+    Sources are read line by line into a sibling temp file that replaces
+    ``output_file`` only once every source has been read, so a failure
+    leaves any previous file untouched. ``dedupe`` and ``fragments_dir`` are
+    as for `combine_rules`.
+    """
+    tmp = output_file.with_name(f".{output_file.name}.{os.getpid()}.crules-tmp")
+    try:
+        with open(tmp, "w") as out:
+            chunks = _combined_chunks(
+                global_rules,
+                language_rules_dir,
+                languages,
+                delimiter,
+                dedupe,
+                fragments_dir,
+            )
+            for chunk in chunks:
+                out.write(chunk)
+        os.replace(tmp, output_file)
+    except BaseException:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        raise
+
     # Update .gitignore if it exists
     update_gitignore()
-            
-    return delimiter.join(content_parts)
 
 def update_gitignore() -> None:
     """Add .cursorrules and .cursorrules.bak to .gitignore if it exists."""
@@ -248,33 +527,15 @@ def update_gitignore() -> None:
     if not gitignore_path.exists():
         return
 
-    # Read current content
-    content = gitignore_path.read_text()
-    lines = content.splitlines()
-
-    # Check if either file is already in .gitignore
-    cursor_entries = {'.cursorrules', '.cursorrules.bak'}
-    existing_entries = cursor_entries.intersection(lines)
-    
-    if len(existing_entries) < len(cursor_entries):
-        # Add section header and entries
-        with gitignore_path.open('a') as f:
-            # Ensure there's a newline before our new section if file isn't empty
-            if content and not content.endswith('\n'):
-                f.write('\n')
-            f.write('\n# Cursor specific\n')
-            
-            # Add any missing entries
-            for entry in cursor_entries - existing_entries:
-                f.write(f'{entry}\n')
-            
-            logger.debug("Added Cursor entries to .gitignore")
+    if update_ignore_block(gitignore_path, ['.cursorrules', '.cursorrules.bak']):
+        logger.debug("Added Cursor entries to .gitignore")
 
 
+@timed("setup.default_rules")
 def refresh_default_rules(verbose: bool = False) -> bool:
     """Refresh the global default rules file from the packaged defaults.
 
-    Copies ``default_cursorrules`` from the ``crules.rules`` package data
+    Copies ``default_cursorrules`` from the packaged resource bundle
     into the user's ``~/.config/crules/cursorrules`` file, creating the
     configuration directory if needed.
 
@@ -284,14 +545,14 @@ def refresh_default_rules(verbose: bool = False) -> bool:
     Returns:
         True if the refresh succeeded, False otherwise.
     """
+    from .bundle import load_bundle
+
     try:
         base_dir = Path("~/.config/crules").expanduser()
         base_dir.mkdir(parents=True, exist_ok=True)
         global_rules = base_dir / "cursorrules"
 
-        with resources.files("crules.rules").joinpath("default_cursorrules").open("r") as src:
-            content = src.read()
-            global_rules.write_text(content)
+        load_bundle().extract("default_cursorrules", global_rules)
 
         if verbose:
             logger.info(f"Refreshed default rules at {global_rules}")
@@ -300,7 +561,13 @@ def refresh_default_rules(verbose: bool = False) -> bool:
         logger.error(f"Failed to refresh default rules: {e}")
         return False
 
-def bootstrap_swarm(config: dict) -> bool:
+@timed("bootstrap")
+def bootstrap_swarm(
+    config: dict,
+    root: Optional[Path] = None,
+    assume_yes: bool = False,
+    sources: Optional[List[RuleSource]] = None,
+) -> bool:
     """Initialize the generic Swarm infrastructure in the current repo.
 
     Creates the local `.crules/` directory tree, copies workflow mode files
@@ -310,14 +577,23 @@ def bootstrap_swarm(config: dict) -> bool:
 
     Args:
         config: Configuration dict loaded from crules config.
+        root: Repository to bootstrap. Defaults to the current directory.
+        assume_yes: Skip the re-bootstrap confirmation prompt.
+        sources: Pre-loaded rule sources from `load_rule_sources`; when given,
+            the global rules file is not re-read.
 
     Returns:
         True if all steps succeeded, False otherwise.
     """
+    from .bundle import load_bundle
+    import shutil
+    import click
+
     try:
-        crules_dir = Path(".crules")
+        root = Path(root) if root is not None else Path(".")
+        crules_dir = root / ".crules"
 
-        if crules_dir.exists():
+        if is_bootstrapped(root) and not assume_yes:
             if not click.confirm(
                 "\u26a0\ufe0f  This repository is already bootstrapped. "
                 "Proceeding will refresh personas and rules. Continue?"
@@ -331,12 +607,7 @@ def bootstrap_swarm(config: dict) -> bool:
 
         workflows_src = Path("~/.config/crules/workflows").expanduser()
         modes_dest = crules_dir / "modes"
-        for filename in (
-            "MANAGER.md",
-            "CODER.md",
-            "GIT_POLICY.md",
-            "BOOTSTRAPPER.md",
-        ):
+        for filename in MODE_FILES:
             dest = modes_dest / filename
             if dest.exists():
                 logger.info(f"{filename} already exists in {modes_dest}, skipping")
@@ -349,17 +620,12 @@ def bootstrap_swarm(config: dict) -> bool:
                 continue
 
             try:
-                pkg_content = (
-                    resources.files("crules.rules.workflows")
-                    .joinpath(filename)
-                    .read_text()
-                )
-                dest.write_text(pkg_content)
+                load_bundle().extract(f"workflows/{filename}", dest)
                 logger.info(f"Copied {filename} from package resources to {modes_dest}")
             except Exception:
                 logger.warning(f"Workflow template {filename} not found in config or package resources, skipping")
 
-        agents_md = Path("AGENTS.md")
+        agents_md = root / "AGENTS.md"
         if not agents_md.exists():
             agents_md.write_text(
                 "# Agent System Status: [TEMPLATE]\n\n"
@@ -375,7 +641,7 @@ def bootstrap_swarm(config: dict) -> bool:
             )
             logger.info("Created AGENTS.md with [TEMPLATE] bootstrap status")
 
-        project_spec = Path("project_spec.md")
+        project_spec = root / "project_spec.md"
         if not project_spec.exists():
             project_spec.write_text(
                 "# Project Specification\n\n"
@@ -401,21 +667,21 @@ def bootstrap_swarm(config: dict) -> bool:
         global_rules = Path(config["global_rules_path"]).expanduser()
         lang_rules_dir = Path(config["language_rules_dir"]).expanduser()
 
-        if not global_rules.exists():
+        if sources is None and not global_rules.exists():
             logger.info("Global config not found, running initial setup...")
             if not setup_directory_structure():
                 logger.error("Failed to initialize config directory")
                 return False
 
-        config.setdefault("enable_cursor", True)
-        config.setdefault("enable_claude", True)
-        config.setdefault("enable_copilot", True)
-        config.setdefault("enable_cline", True)
-        config.setdefault("enable_roo", True)
-        config.setdefault("enable_windsurf", True)
-        config.setdefault("enable_aider", True)
+        targets.apply_defaults(config)
 
-        if not write_rules_to_ai_dirs(config, global_rules, lang_rules_dir, []):
+        if sources is None:
+            deployed = write_rules_to_ai_dirs(
+                config, global_rules, lang_rules_dir, [], root=root
+            )
+        else:
+            deployed = deploy_rules(config, sources, root=root)
+        if not deployed:
             logger.error("Failed to deploy global rules to AI directories")
             return False
 
@@ -427,19 +693,107 @@ def bootstrap_swarm(config: dict) -> bool:
         return False
 
 
-def sync_modes(config: dict) -> bool:
+def _same_file(src: Path, dest: Path) -> bool:
+    """Return True if ``dest`` holds ``src``'s bytes.
+
+    The files are hashed only when their sizes match but their mtimes do not.
+    """
+    try:
+        src_st, dest_st = src.stat(), dest.stat()
+    except FileNotFoundError:
+        return False
+    if src_st.st_size != dest_st.st_size:
+        return False
+    if src_st.st_mtime_ns == dest_st.st_mtime_ns:
+        return True
+    return _file_sha256(src) == _file_sha256(dest)
+
+
+def _sync_fingerprint(
+    config: dict, global_rules: Path, previous: Optional[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """Describe what the IDE outputs written by `sync_modes` depend on.
+
+    The global rules file is only hashed when its size or mtime differ from
+    ``previous``, so an unchanged file costs one ``stat``.
+    """
+    from . import __version__
+    from .fragments import get_fragment_resolver
+
+    st = global_rules.stat()
+    rules = (previous or {}).get("global_rules") or {}
+    if rules.get("size") != st.st_size or rules.get("mtime_ns") != st.st_mtime_ns:
+        rules = {
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "sha256": _file_sha256(global_rules),
+        }
+    resolver = get_fragment_resolver(config.get("fragments_dir"))
+    try:
+        fragments = resolver.fingerprint("global", global_rules)
+    except (OSError, ValueError):
+        # Unresolvable includes never match, so the refresh reports the error.
+        fragments = {"": "unresolved"}
+    return {
+        "version": __version__,
+        "targets": [spec.name for spec in targets.enabled_targets(config)],
+        "output_store": bool(config.get("output_store")),
+        "global_rules": rules,
+        "fragments": fragments,
+    }
+
+
+def _same_inputs(current: Dict[str, Any], previous: Optional[Dict[str, Any]]) -> bool:
+    """Compare fingerprints by content, ignoring the global rules file's mtime."""
+    if not previous:
+        return False
+    if any(
+        current.get(key) != previous.get(key)
+        for key in ("version", "targets", "output_store")
+    ):
+        return False
+    if (current.get("fragments") or {}) != (previous.get("fragments") or {}):
+        return False
+    return current["global_rules"]["sha256"] == (
+        previous.get("global_rules") or {}
+    ).get("sha256")
+
+
+@timed("sync")
+def sync_modes(
+    config: dict,
+    root: Optional[Path] = None,
+    sources: Optional[List[RuleSource]] = None,
+    force: bool = False,
+) -> bool:
     """Copy workflow mode files from global config into the local .crules/modes/ directory,
     then refresh the IDE rule folders with the latest global rules.
 
+    Only work that changes something is done. Mode files whose size and
+    mtime (or, failing that, hash) match the local copy are not copied. The
+    IDE folders are re-rendered only when the global rules content, the
+    enabled targets or the crules version changed since the last sync, or
+    when a generated file was modified or removed; the last synced state is
+    kept in the repository's ``.crules/manifest.json``.
+
     Args:
         config: Configuration dict loaded from crules config.
+        root: Repository to sync. Defaults to the current directory.
+        sources: Pre-loaded rule sources from `load_rule_sources`; when given,
+            the global rules file is not re-read for rendering.
+        force: Copy every mode file and re-render every output.
 
     Returns:
         True if sync succeeded, False otherwise.
     """
+    import shutil
+    from .budget import BudgetLedger
+    from .manifest import OutputManifest
+
     try:
+        root = Path(root) if root is not None else Path(".")
         workflows_src = Path("~/.config/crules/workflows").expanduser()
-        modes_dest = Path(".crules/modes")
+        modes_dest = root / ".crules" / "modes"
         modes_dest.mkdir(parents=True, exist_ok=True)
 
         if not workflows_src.exists():
@@ -447,36 +801,90 @@ def sync_modes(config: dict) -> bool:
             logger.info("Run 'crules --setup' first to create workflow templates.")
             return False
 
-        copied = 0
-        for md_file in workflows_src.glob("*.md"):
+        copied = unchanged = 0
+        for md_file in sorted(workflows_src.glob("*.md")):
             dest = modes_dest / md_file.name
+            if not force and _same_file(md_file, dest):
+                logger.debug(f"Unchanged mode file: {dest}")
+                unchanged += 1
+                continue
             shutil.copy2(md_file, dest)
             logger.info(f"Synced {md_file.name} -> {modes_dest}")
             copied += 1
 
-        if copied == 0:
+        if copied + unchanged == 0:
             logger.warning("No workflow files found to sync")
 
         global_rules = Path(config["global_rules_path"]).expanduser()
         lang_rules_dir = Path(config["language_rules_dir"]).expanduser()
 
-        if not global_rules.exists():
+        if sources is None and not global_rules.exists():
             logger.warning("Global rules file not found, skipping IDE refresh")
             return True
 
-        config.setdefault("enable_cursor", True)
-        config.setdefault("enable_claude", True)
-        config.setdefault("enable_copilot", True)
-        config.setdefault("enable_cline", True)
-        config.setdefault("enable_roo", True)
-        config.setdefault("enable_windsurf", True)
-        config.setdefault("enable_aider", True)
+        targets.apply_defaults(config)
+
+        manifest = OutputManifest.load(root)
+        previous = manifest.sources.get("sync")
+        fingerprint = (
+            _sync_fingerprint(config, global_rules, previous)
+            if global_rules.exists()
+            else None
+        )
+        if (
+            not force
+            and fingerprint is not None
+            and _same_inputs(fingerprint, previous)
+            and manifest.outputs_intact(previous.get("outputs"))
+        ):
+            # Only the outputs sync writes matter; language outputs are not its concern.
+            fingerprint["outputs"] = previous.get("outputs")
+            if fingerprint != previous:
+                manifest.set_source("sync", fingerprint)
+                manifest.save()
+            logger.info(
+                f"Sync: {copied} mode file(s) updated, {unchanged} unchanged; "
+                "IDE rule folders already up to date"
+            )
+            return True
 
-        if not write_rules_to_ai_dirs(config, global_rules, lang_rules_dir, []):
+        # The ledger lists every output this refresh renders.
+        ledger = BudgetLedger()
+        if sources is None:
+            refreshed = write_rules_to_ai_dirs(
+                config,
+                global_rules,
+                lang_rules_dir,
+                [],
+                force=force,
+                root=root,
+                ledger=ledger,
+            )
+        else:
+            refreshed = deploy_rules(
+                config, sources, root=root, force=force, ledger=ledger
+            )
+        if not refreshed:
             logger.error("Failed to refresh IDE rule folders")
             return False
 
-        logger.info("IDE rule folders refreshed")
+        if fingerprint is not None:
+            manifest = OutputManifest.load(root)
+            written = (
+                Path(os.path.relpath(output["path"], root)).as_posix()
+                for entry in ledger.report()["targets"].values()
+                for output in entry["outputs"]
+            )
+            # Store-mode links are not tracked by the manifest.
+            fingerprint["outputs"] = sorted(
+                key for key in written if key in manifest.entries
+            )
+            manifest.set_source("sync", fingerprint)
+            manifest.save()
+        logger.info(
+            f"Sync: {copied} mode file(s) updated, {unchanged} unchanged; "
+            "IDE rule folders refreshed"
+        )
         return True
 
     except Exception as e:
@@ -484,16 +892,84 @@ def sync_modes(config: dict) -> bool:
         return False
 
 
-def report_status() -> Dict[str, Any]:
-    """Report the status of the global crules config and current project.
+def agents_md_state(path: Path) -> str:
+    """Return the bootstrap state declared on the first line of ``AGENTS.md``.
+
+    Returns:
+        str: ``"customized"``, ``"template"``, ``"unknown"`` (no marker) or
+        ``"missing"``.
+    """
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            first_line = f.readline()
+    except OSError:
+        return "missing"
+    if "[CUSTOMIZED]" in first_line:
+        return "customized"
+    if "[TEMPLATE]" in first_line:
+        return "template"
+    return "unknown"
+
+
+def is_bootstrapped(root: Path) -> bool:
+    """Return True if ``root`` has the ``.crules/modes`` directory of a bootstrap.
+
+    A bare ``.crules`` directory is not enough: every compile keeps its
+    manifest in ``.crules/manifest.json``.
+    """
+    return (Path(root) / ".crules" / "modes").is_dir()
+
+
+def project_status(root: Path) -> Dict[str, Any]:
+    """Summarize one bootstrapped repository for ``--status``.
+
+    Args:
+        root: Repository containing a ``.crules/modes`` directory.
+
+    Returns:
+        A dict with ``path``, ``agents`` (see `agents_md_state`),
+        ``missing_modes`` (entries of `MODE_FILES` absent from
+        ``.crules/modes``), ``project_spec`` (bool) and ``ok``, which is True
+        when nothing is missing. A ``[TEMPLATE]`` AGENTS.md is reported but
+        does not fail the repository.
+    """
+    root = Path(root)
+    modes_dir = root / ".crules" / "modes"
+    try:
+        present = set(os.listdir(modes_dir))
+    except OSError:
+        present = set()
+    missing_modes = [name for name in MODE_FILES if name not in present]
+    agents = agents_md_state(root / "AGENTS.md")
+    has_spec = (root / "project_spec.md").exists()
+    return {
+        "path": str(root),
+        "agents": agents,
+        "missing_modes": missing_modes,
+        "project_spec": has_spec,
+        "ok": not missing_modes and agents != "missing" and has_spec,
+    }
+
+
+@timed("status")
+def report_status(
+    root: Optional[Path] = None, include_global: bool = True
+) -> Dict[str, Any]:
+    """Report the status of the global crules config and a project.
 
     Checks for the presence of the global configuration directory, config file,
     global rules, language rules, and workflow templates under
-    ``~/.config/crules``. If the current directory contains a ``.crules``
-    folder, it also inspects local modes and ``project_spec.md``.
+    ``~/.config/crules``. If ``root`` is bootstrapped (`is_bootstrapped`), it also
+    inspects local modes and ``project_spec.md`` and adds a `project_status`
+    summary under ``project``.
+
+    Args:
+        root: Repository to inspect. Defaults to the current directory.
+        include_global: Whether to run the ``~/.config/crules`` checks.
 
     Returns:
-        A dictionary with a boolean ``all_ok`` flag and a ``checks`` list of
+        A dictionary with a boolean ``all_ok`` flag, a ``project`` summary
+        (None outside a crules repository) and a ``checks`` list of
         individual check results, each containing:
         - ``scope``: \"global\" or \"project\"
         - ``name``: Human-readable description of the check
@@ -501,114 +977,379 @@ def report_status() -> Dict[str, Any]:
         - ``ok``: True if the check passed, False otherwise
         - ``remediation``: Suggested command string, or None
     """
-    checks: list[Dict[str, Any]] = []
+    root = Path(root) if root is not None else Path(".")
+    checks = _global_status_checks() if include_global else []
+    project = None
+    if is_bootstrapped(root):
+        checks += _project_status_checks(root)
+        project = project_status(root)
+
+    all_ok = all(entry["ok"] for entry in checks)
+    return {"all_ok": all_ok, "project": project, "checks": checks}
 
+
+def _status_check(
+    scope: str, name: str, path: Path, ok: bool, remediation: Optional[str]
+) -> Dict[str, Any]:
+    return {
+        "scope": scope,
+        "name": name,
+        "path": str(path),
+        "ok": ok,
+        "remediation": remediation if not ok else None,
+    }
+
+
+def _global_status_checks() -> List[Dict[str, Any]]:
+    """Checks for ``~/.config/crules`` used by `report_status`."""
     base_dir = Path("~/.config/crules").expanduser()
     config_file = base_dir / "config.yaml"
     global_rules = base_dir / "cursorrules"
     lang_rules_dir = base_dir / "lang_rules"
     workflows_dir = base_dir / "workflows"
 
-    def add_check(scope: str, name: str, path: Path, ok: bool, remediation: Optional[str]) -> None:
-        checks.append(
-            {
-                "scope": scope,
-                "name": name,
-                "path": str(path),
-                "ok": ok,
-                "remediation": remediation,
-            }
-        )
-
-    # Global config checks
-    has_base = base_dir.exists()
-    add_check("global", "Config directory", base_dir, has_base, "crules --setup" if not has_base else None)
-
-    has_config_file = config_file.exists()
-    add_check("global", "Config file", config_file, has_config_file, "crules --setup" if not has_config_file else None)
-
-    has_global_rules = global_rules.exists()
-    add_check(
-        "global",
-        "Global rules (cursorrules)",
-        global_rules,
-        has_global_rules,
-        "crules --refresh-defaults" if not has_global_rules else None,
-    )
-
     has_lang_dir = lang_rules_dir.exists()
-    add_check(
-        "global",
-        "Language rules directory",
-        lang_rules_dir,
-        has_lang_dir,
-        "crules --setup" if not has_lang_dir else None,
-    )
-
-    has_lang_files = has_lang_dir and any(lang_rules_dir.glob("cursor.*"))
-    add_check(
-        "global",
-        "Language rule files (cursor.*)",
-        lang_rules_dir,
-        has_lang_files,
-        "crules --setup" if not has_lang_files else None,
-    )
-
-    has_workflows_dir = workflows_dir.exists()
-    add_check(
-        "global",
-        "Workflows directory",
-        workflows_dir,
-        has_workflows_dir,
-        "crules --setup" if not has_workflows_dir else None,
-    )
-
-    core_names = ("MANAGER.md", "CODER.md", "GIT_POLICY.md")
-    for name in core_names:
-        wf_path = workflows_dir / name
-        ok = wf_path.exists()
-        add_check(
+    checks = [
+        _status_check(
+            "global", "Config directory", base_dir, base_dir.exists(), "crules --setup"
+        ),
+        _status_check(
+            "global", "Config file", config_file, config_file.exists(), "crules --setup"
+        ),
+        _status_check(
+            "global",
+            "Global rules (cursorrules)",
+            global_rules,
+            global_rules.exists(),
+            "crules --refresh-defaults",
+        ),
+        _status_check(
+            "global",
+            "Language rules directory",
+            lang_rules_dir,
+            has_lang_dir,
+            "crules --setup",
+        ),
+        _status_check(
             "global",
-            f"Workflow template {name}",
-            wf_path,
-            ok,
-            "crules --setup" if not ok else None,
+            "Language rule files (cursor.*)",
+            lang_rules_dir,
+            has_lang_dir and any(lang_rules_dir.glob("cursor.*")),
+            "crules --setup",
+        ),
+        _status_check(
+            "global",
+            "Workflows directory",
+            workflows_dir,
+            workflows_dir.exists(),
+            "crules --setup",
+        ),
+    ]
+    for name in ("MANAGER.md", "CODER.md", "GIT_POLICY.md"):
+        wf_path = workflows_dir / name
+        checks.append(
+            _status_check(
+                "global",
+                f"Workflow template {name}",
+                wf_path,
+                wf_path.exists(),
+                "crules --setup",
+            )
         )
+    return checks
 
-    # Project-level checks (only if this looks like a crules-enabled repo)
-    project_crules = Path(".crules")
-    if project_crules.exists():
-        modes_dir = project_crules / "modes"
-        has_modes_dir = modes_dir.exists()
-        add_check(
+
+def _project_status_checks(root: Path) -> List[Dict[str, Any]]:
+    """Checks for a repository's ``.crules`` folder used by `report_status`."""
+    modes_dir = root / ".crules" / "modes"
+    has_modes_dir = modes_dir.exists()
+    project_spec = root / "project_spec.md"
+    return [
+        _status_check(
             "project",
             "Local modes directory (.crules/modes)",
             modes_dir,
             has_modes_dir,
-            "crules --sync" if not has_modes_dir else None,
-        )
-
-        has_mode_files = has_modes_dir and any(modes_dir.glob("*.md"))
-        add_check(
+            "crules --sync",
+        ),
+        _status_check(
             "project",
             "Local mode files (.crules/modes/*.md)",
             modes_dir,
-            has_mode_files,
-            "crules --sync" if not has_mode_files else None,
-        )
-
-        project_spec = Path("project_spec.md")
-        has_project_spec = project_spec.exists()
-        add_check(
+            has_modes_dir and any(modes_dir.glob("*.md")),
+            "crules --sync",
+        ),
+        _status_check(
             "project",
             "project_spec.md",
             project_spec,
-            has_project_spec,
-            "crules --bootstrap" if not has_project_spec else None,
+            project_spec.exists(),
+            "crules --bootstrap",
+        ),
+    ]
+
+
+@timed("sources.read")
+def load_rule_sources(
+    global_rules: Path,
+    lang_rules_dir: Path,
+    languages: List[str],
+    include_global: bool = True,
+    dedupe: bool = False,
+    fragments_dir: Optional[Path] = None,
+) -> List[RuleSource]:
+    """Load the global and per-language rule files once.
+
+    Small files are read into memory; large ones stay on disk and are
+    streamed into each output (see `RuleBody.from_path`). ``@include``
+    directives are expanded from the fragments directory (see
+    `crules.fragments`) before paragraphs are deduplicated.
+
+    Args:
+        global_rules: Path to global rules file
+        lang_rules_dir: Path to language rules directory
+        languages: List of language identifiers
+        include_global: Whether to read the global rules file as well
+        dedupe: Drop paragraphs of the language rules that repeat a
+            paragraph of the global rules (see `crules.paragraphs`)
+        fragments_dir: Directory ``@include`` names are resolved in.
+            Defaults to ``~/.config/crules/fragments``.
+
+    Returns:
+        List of ``(name, body, globs)`` tuples, global rules first, ready
+        to be passed to `deploy_rules` for any number of repositories.
+
+    Raises:
+        crules.fragments.IncludeError: If an ``@include`` cannot be resolved.
+    """
+    from .fragments import get_fragment_resolver
+
+    resolver = get_fragment_resolver(fragments_dir)
+
+    def load(name: str, path: Path) -> RuleBody:
+        with span("fragments.resolve"):
+            return resolver.resolve(name, RuleBody.from_path(path), path)
+
+    sources = []
+    global_body = None
+    if include_global:
+        global_body = load("global", global_rules)
+        sources.append(("global", global_body, ["*"]))
+    for lang in languages:
+        lang_file = lang_rules_dir / f"cursor.{lang}"
+        sources.append((lang, load(lang, lang_file), [f"*.{lang}"]))
+    if dedupe and languages:
+        if global_body is None:
+            global_body = load("global", global_rules)
+        sources = _dedupe_sources(global_body, sources)
+    return sources
+
+
+@timed("dedupe")
+def _dedupe_sources(
+    global_body: RuleBody, sources: List[RuleSource]
+) -> List[RuleSource]:
+    """Drop global paragraphs from each language source and log what was saved."""
+    from .budget import estimate_tokens
+    from .paragraphs import ParagraphIndex, new_dedupe_stats
+
+    index = ParagraphIndex()
+    index.add(global_body.lines())
+    deduped = []
+    total = new_dedupe_stats()
+    for name, body, globs in sources:
+        if name == "global":
+            deduped.append((name, body, globs))
+            continue
+        stats = new_dedupe_stats()
+        # Large bodies are spooled to a temp file, so they still stream.
+        kept = RuleBody.from_lines(index.filter(body.lines(), stats))
+        if stats["paragraphs"]:
+            body = kept
+            logger.debug(
+                f"Dropped {stats['paragraphs']} global paragraph(s) from {name}: "
+                f"{stats['bytes']} bytes, ~{estimate_tokens(stats['bytes'])} tokens"
+            )
+        for key in total:
+            total[key] += stats[key]
+        deduped.append((name, body, globs))
+    _log_dedupe_savings(total)
+    return deduped
+
+
+def _wants_preamble(name: str, preamble_once: bool) -> bool:
+    """With ``preamble_once``, only the ``global`` output carries the preamble."""
+    return not preamble_once or name == "global"
+
+
+def _write_serial(
+    managers: list, sources: List[RuleSource], preamble_once: bool = False
+) -> List[str]:
+    """Write every source through every manager in order, stopping at a failure."""
+    for manager in managers:
+        manager.ensure_structure()
+    for name, content, globs in sources:
+        # Preamble and body bytes are built once and shared by every target.
+        with span("render.body"):
+            body = render_body(content, _wants_preamble(name, preamble_once))
+        for manager in managers:
+            if not manager.create_rule_file(name, body, globs):
+                return [f"{type(manager).__name__}/{name}"]
+    return []
+
+
+def _write_parallel(
+    managers: list, sources: List[RuleSource], jobs: int, preamble_once: bool = False
+) -> List[str]:
+    """Write sources through managers on ``jobs`` threads.
+
+    Independent targets and files run concurrently. Managers that are not
+    ``parallel_safe`` get one task that writes their files in source order.
+    Results and log output are collected in submission order, so failures
+    (and the first exception, which is re-raised) are reported
+    deterministically.
+    """
+    from .parallel import OrderedPool
+
+    with span("render.body"):
+        bodies = [
+            (name, render_body(content, _wants_preamble(name, preamble_once)), globs)
+            for name, content, globs in sources
+        ]
+
+    def write_all(manager: Any) -> bool:
+        return all(
+            manager.create_rule_file(name, body, globs) for name, body, globs in bodies
         )
 
-    all_ok = all(entry["ok"] for entry in checks)
-    return {"all_ok": all_ok, "checks": checks}
+    with OrderedPool(jobs, "crules-write") as pool:
+        for future in [pool.submit(manager.ensure_structure) for manager in managers]:
+            pool.result(future)
+
+        tasks = []
+        for manager in managers:
+            label = type(manager).__name__
+            if manager.parallel_safe:
+                tasks += [
+                    (
+                        f"{label}/{name}",
+                        pool.submit(manager.create_rule_file, name, body, globs),
+                    )
+                    for name, body, globs in bodies
+                ]
+            else:
+                tasks.append((label, pool.submit(write_all, manager)))
+        return [label for label, future in tasks if not pool.result(future)]
+
+
+@timed("deploy")
+def deploy_rules(
+    config: dict,
+    sources: List[RuleSource],
+    root: Optional[Path] = None,
+    force: bool = False,
+    ledger: Optional[Any] = None,
+) -> bool:
+    """Write pre-loaded rule sources through every enabled AI manager.
+
+    Each source is rendered once and shared by every manager, which adds
+    only its frontmatter. Outputs are staged in one transaction (or a
+    `crules.store.StoreTransaction`), unchanged files are skipped via the
+    manifest, token budgets are checked, and the set is committed or rolled
+    back as a whole.
+
+    Args:
+        config: Configuration dict with ``enable_*`` flags for each assistant
+        sources: ``(name, body, globs)`` tuples from `load_rule_sources`
+        root: Repository to write into. Defaults to the current directory.
+        force: Rewrite every output even if it is unchanged.
+        ledger: `crules.budget.BudgetLedger` that receives every output's
+            size, e.g. for the ``--budget`` report.
+
+    Returns:
+        bool: True if all writes succeeded, False otherwise
+    """
+    from .budget import BudgetLedger, check_budgets
+    from .manifest import MANIFEST_PATH, OutputManifest
+    from .store import StoreTransaction, get_output_store
+    from .transaction import OutputTransaction
+
+    root = Path(root) if root is not None else Path(".")
+    try:
+        active_managers = targets.create_managers(config, root)
+
+        if not active_managers:
+            logger.warning("No AI assistants enabled in config")
+            return False
+
+        manifest = OutputManifest.load(root, force=force)
+        store = get_output_store(config)
+        if store is not None:
+            transaction = StoreTransaction(store, root)
+        else:
+            transaction = OutputTransaction(
+                manifest,
+                fsync=config.get("fsync_outputs", True),
+                dedupe=config.get("dedupe_outputs", False),
+            )
+        jobs = max(1, int(config.get("jobs") or 1))
+        preamble_once = bool(config.get("preamble_once", False))
+        budgets = config.get("token_budgets") or {}
+        if ledger is None and budgets:
+            ledger = BudgetLedger()
+        if ledger is not None:
+            ledger.globs.update({name: globs for name, _, globs in sources})
+        ignore_patterns = []
+        for manager in active_managers:
+            # Store mode compares digests against the published set instead.
+            manager.manifest = manifest if store is None else None
+            manager.transaction = transaction
+            manager.ledger = ledger
+            manager.batched = True
+            ignore_patterns.extend(manager.ignore_patterns())
+        ignore_patterns.append(MANIFEST_PATH)
+
+        try:
+            if jobs > 1:
+                failures = _write_parallel(
+                    active_managers, sources, jobs, preamble_once
+                )
+            else:
+                failures = _write_serial(active_managers, sources, preamble_once)
+            if failures:
+                logger.error(
+                    f"Failed to write {len(failures)} rule file(s): "
+                    f"{', '.join(failures)}"
+                )
+                transaction.rollback()
+                return False
+            over_budget = check_budgets(ledger.report(), budgets) if budgets else []
+            if over_budget:
+                for problem in over_budget:
+                    logger.error(f"Token budget exceeded: {problem}")
+                transaction.rollback()
+                return False
+            with span("write.publish", files=len(transaction)):
+                transaction.commit()
+        except BaseException:
+            transaction.rollback()
+            raise
+        finally:
+            with span("manifest.save"):
+                manifest.save()
+
+        try:
+            update_ignore_block(root / ".gitignore", ignore_patterns)
+        except OSError as e:
+            logger.warning(f"Failed to update .gitignore: {e}")
+        for manager in active_managers:
+            manager.finalize()
+
+        return True
+
+    except Exception as e:
+        logger.error(f"Failed to write rules to AI directories: {e}")
+        return False
 
 
 def write_rules_to_ai_dirs(
@@ -616,7 +1357,9 @@ def write_rules_to_ai_dirs(
     global_rules: Path,
     lang_rules_dir: Path,
     languages: list[str],
-    force: bool = False
+    force: bool = False,
+    root: Optional[Path] = None,
+    ledger: Optional[Any] = None,
 ) -> bool:
     """Write rules to all enabled AI assistant directories.
 
@@ -629,45 +1372,19 @@ def write_rules_to_ai_dirs(
         lang_rules_dir: Path to language rules directory
         languages: List of language identifiers
         force: Whether to force overwrite existing files
+        root: Repository to write into. Defaults to the current directory.
+        ledger: Optional `crules.budget.BudgetLedger` passed to `deploy_rules`.
 
     Returns:
         bool: True if all writes succeeded, False otherwise
     """
     try:
-        manager_map = {
-            "enable_cursor": CursorManager,
-            "enable_claude": ClaudeManager,
-            "enable_copilot": CopilotManager,
-            "enable_cline": ClineManager,
-            "enable_roo": RooManager,
-            "enable_windsurf": WindsurfManager,
-            "enable_aider": AiderManager,
-        }
-        active_managers = [
-            cls(config) for key, cls in manager_map.items() if config.get(key)
-        ]
-
-        if not active_managers:
-            logger.warning("No AI assistants enabled in config")
-            return False
-
-        content = global_rules.read_text()
-
-        for manager in active_managers:
-            manager.ensure_structure()
-            if not manager.create_rule_file("global", content, ["*"]):
-                return False
-            manager.update_gitignore()
-
-        for lang in languages:
-            lang_file = lang_rules_dir / f"cursor.{lang}"
-            lang_content = lang_file.read_text()
-            for manager in active_managers:
-                if not manager.create_rule_file(lang, lang_content, [f"*.{lang}"]):
-                    return False
-
-        return True
-
+        sources = load_rule_sources(
+            global_rules, lang_rules_dir, languages,
+            dedupe=config.get("dedupe_paragraphs", False),
+            fragments_dir=config.get("fragments_dir"),
+        )
     except Exception as e:
         logger.error(f"Failed to write rules to AI directories: {e}")
-        return False
\ No newline at end of file
+        return False
+    return deploy_rules(config, sources, root=root, force=force, ledger=ledger)
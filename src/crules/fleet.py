@@ -0,0 +1,256 @@
+"""Fleet mode: deploy rules to, or check the health of, many repositories in one run."""
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import logging
+import os
+
+from . import file_ops
+
+logger = logging.getLogger(__name__)
+
+FLEET_MODES = ("rules", "bootstrap", "sync")
+
+# Directories never searched by `find_crules_repos`.
+PRUNE_DIRS = frozenset({
+    ".git", ".hg", ".svn", "node_modules", "__pycache__", ".venv", "venv",
+    ".tox", ".nox", ".mypy_cache", ".pytest_cache", ".ruff_cache", ".cache",
+    "site-packages", "dist", "build", "target", ".gradle", ".idea",
+})
+
+
+def read_fleet_paths(entries: Iterable[str]) -> List[Path]:
+    """Expand ``--fleet`` arguments into a de-duplicated list of repositories.
+
+    Each entry is either a repository directory or a text file listing one
+    repository path per line. Blank lines and ``#`` comments are ignored, and
+    relative paths in a list file are resolved against the file's directory.
+
+    Args:
+        entries: Raw ``--fleet`` values from the command line.
+
+    Returns:
+        List[Path]: Repository paths in first-seen order.
+    """
+    repos: List[Path] = []
+    seen = set()
+
+    def add(path: Path) -> None:
+        key = os.path.normpath(str(path))
+        if key not in seen:
+            seen.add(key)
+            repos.append(path)
+
+    for entry in entries:
+        path = Path(entry).expanduser()
+        if path.is_file():
+            for line in path.read_text().splitlines():
+                line = line.split("#", 1)[0].strip()
+                if not line:
+                    continue
+                repo = Path(line).expanduser()
+                if not repo.is_absolute():
+                    repo = path.parent / repo
+                add(repo)
+        else:
+            add(path)
+    return repos
+
+
+def _deploy_one(
+    config: Dict[str, Any],
+    repo: Path,
+    mode: str,
+    sources: List[file_ops.RuleSource],
+) -> Dict[str, Any]:
+    """Run one fleet operation against ``repo`` and capture the outcome."""
+    result: Dict[str, Any] = {"path": str(repo), "ok": False, "error": None}
+    if not repo.is_dir():
+        result["error"] = "not a directory"
+        return result
+
+    # Each worker gets its own copy since bootstrap/sync call setdefault().
+    repo_config = dict(config)
+    try:
+        if mode == "bootstrap":
+            ok = file_ops.bootstrap_swarm(
+                repo_config, root=repo, assume_yes=True, sources=sources
+            )
+        elif mode == "sync":
+            ok = file_ops.sync_modes(repo_config, root=repo, sources=sources)
+        else:
+            ok = file_ops.deploy_rules(repo_config, sources, root=repo)
+    except Exception as e:
+        result["error"] = str(e)
+        return result
+
+    result["ok"] = bool(ok)
+    if not ok:
+        result["error"] = f"{mode} failed (see log)"
+    return result
+
+
+def run_fleet(
+    config: Dict[str, Any],
+    repos: List[Path],
+    languages: List[str],
+    mode: str = "rules",
+    workers: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Deploy rules to every repository in ``repos`` using a worker pool.
+
+    The global and language rule files are read once up front and shared by
+    all workers; only the per-repository writes are fanned out. Runs are
+    non-interactive, so ``bootstrap`` never prompts for re-bootstrapped repos.
+
+    Args:
+        config: Configuration dict with ``enable_*`` flags already resolved.
+        repos: Repository directories to deploy into.
+        languages: Language identifiers to compile alongside the global rules.
+        mode: One of ``FLEET_MODES``.
+        workers: Thread pool size. Defaults to ``min(32, cpu_count + 4)``.
+
+    Returns:
+        List of per-repository results, in the same order as ``repos``, each
+        containing ``path``, ``ok`` and ``error`` (None on success).
+    """
+    if mode not in FLEET_MODES:
+        raise ValueError(f"Unknown fleet mode: {mode}")
+
+    global_rules = Path(config["global_rules_path"]).expanduser()
+    lang_rules_dir = Path(config["language_rules_dir"]).expanduser()
+    if not global_rules.exists() and mode == "bootstrap":
+        logger.info("Global config not found, running initial setup...")
+        if not file_ops.setup_directory_structure():
+            raise RuntimeError("Failed to initialize config directory")
+
+    sources = file_ops.load_rule_sources(
+        global_rules, lang_rules_dir, languages,
+        dedupe=config.get("dedupe_paragraphs", False),
+        fragments_dir=config.get("fragments_dir"),
+    )
+    logger.info(f"Deploying to {len(repos)} repositories ({mode})")
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(
+            pool.map(lambda repo: _deploy_one(config, repo, mode, sources), repos)
+        )
+
+
+def print_fleet_summary(results: List[Dict[str, Any]]) -> None:
+    """Print a per-repository success/failure summary."""
+    failed = [r for r in results if not r["ok"]]
+    print("\ncrules fleet summary\n")
+    for entry in results:
+        if entry["ok"]:
+            print(f"  [OK] {entry['path']}")
+        else:
+            print(f"  [FAILED] {entry['path']} -> {entry['error']}")
+    print(f"\n{len(results) - len(failed)} succeeded, {len(failed)} failed\n")
+
+
+def _scan_dir(path: str) -> Tuple[bool, List[str]]:
+    """List one directory: whether it holds ``.crules/modes``, and what to descend.
+
+    A compiled-only repository has ``.crules`` for its manifest but no
+    modes; it is treated like any other checkout.
+    """
+    subdirs = []
+    is_repo = is_checkout = False
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if not entry.is_dir(follow_symlinks=False):
+                        continue
+                except OSError:
+                    continue
+                if entry.name == ".crules":
+                    is_repo = os.path.isdir(os.path.join(entry.path, "modes"))
+                    is_checkout = True
+                elif entry.name == ".git":
+                    is_checkout = True
+                elif entry.name not in PRUNE_DIRS:
+                    subdirs.append(entry.path)
+    except OSError as e:
+        logger.debug(f"Cannot scan {path}: {e}")
+    # Checkouts are not searched for nested repositories.
+    return is_repo, [] if is_repo or is_checkout else subdirs
+
+
+def find_crules_repos(root: Path, workers: Optional[int] = None) -> List[Path]:
+    """Find bootstrapped repositories (with ``.crules/modes``) under ``root``.
+
+    Directories are listed with ``os.scandir`` on a thread pool, one task per
+    directory. Symlinks are not followed, `PRUNE_DIRS` are skipped, and the
+    walk stops at any repository or git checkout, so cost grows with the
+    number of directories above the checkouts rather than inside them.
+
+    Args:
+        root: Directory to search.
+        workers: Thread pool size. Defaults to ``min(32, cpu_count + 4)``.
+
+    Returns:
+        List[Path]: Repository roots, sorted.
+    """
+    repos = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {pool.submit(_scan_dir, str(root)): str(root)}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = pending.pop(future)
+                is_repo, subdirs = future.result()
+                if is_repo:
+                    repos.append(Path(path))
+                for subdir in subdirs:
+                    pending[pool.submit(_scan_dir, subdir)] = subdir
+    return sorted(repos)
+
+
+def scan_status(root: Path, workers: Optional[int] = None) -> Dict[str, Any]:
+    """Run the ``--status`` checks for every crules repository under ``root``.
+
+    Args:
+        root: Directory to search with `find_crules_repos`.
+        workers: Thread pool size for the walk and the per-repo checks.
+
+    Returns:
+        A dict with the global ``checks`` of `file_ops.report_status`,
+        ``root``, ``repos`` (one `file_ops.project_status` dict per
+        repository) and ``all_ok``, False if any global check or repository
+        failed.
+    """
+    status = file_ops.report_status(root=root)
+    # ``root`` itself is reported with the other repositories if it is bootstrapped.
+    checks = [c for c in status["checks"] if c["scope"] == "global"]
+    repos = find_crules_repos(root, workers)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        projects = list(pool.map(file_ops.project_status, repos))
+    return {
+        "all_ok": all(c["ok"] for c in checks) and all(p["ok"] for p in projects),
+        "checks": checks,
+        "root": str(root),
+        "repos": projects,
+    }
+
+
+def print_status_scan(status: Dict[str, Any]) -> None:
+    """Print one line per repository found by `scan_status`."""
+    repos = status["repos"]
+    print(f"\ncrules status: {len(repos)} repositories under {status['root']}\n")
+    for repo in repos:
+        problems = []
+        if repo["missing_modes"]:
+            problems.append(f"missing modes: {', '.join(repo['missing_modes'])}")
+        if not repo["project_spec"]:
+            problems.append("missing project_spec.md")
+        prefix = "[OK]" if repo["ok"] else "[MISSING]"
+        detail = f" ({'; '.join(problems)})" if problems else ""
+        print(f"  {prefix} {repo['path']} AGENTS.md: {repo['agents'].upper()}{detail}")
+    failed = sum(1 for repo in repos if not repo["ok"])
+    templates = sum(1 for repo in repos if repo["agents"] == "template")
+    print(
+        f"\n{len(repos) - failed} ok, {failed} with problems, "
+        f"{templates} not yet customized\n"
+    )
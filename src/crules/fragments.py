@@ -0,0 +1,259 @@
+"""Composing rule files from shared fragments with ``@include``.
+
+A line of the form::
+
+    @include testing.md
+
+in ``cursorrules`` or a ``lang_rules/cursor.<lang>`` file is replaced by the
+fragment ``~/.config/crules/fragments/testing.md`` (``fragments_dir`` in
+config). A name without a suffix also matches ``<name>.md``. Fragments may
+include other fragments; a cycle, a missing fragment or a name that leaves
+the fragments directory raises `IncludeError`. Lines inside fenced code
+blocks are never treated as directives.
+
+`FragmentResolver` re-reads a fragment only when its ``stat`` changes and
+memoizes expanded fragments under a hash of their path, bytes and the keys
+of everything they include. Editing one fragment therefore re-expands only
+the fragments above it in the include graph; everything else is served from
+the cache. The resolver also records which fragments each rule source
+depends on (`dependents`), so ``--watch`` recompiles only the outputs that
+include an edited fragment.
+"""
+from pathlib import Path
+from typing import (
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+import hashlib
+import logging
+import re
+import threading
+
+from .render import RuleBody
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FRAGMENTS_DIR = "~/.config/crules/fragments"
+FRAGMENT_SUFFIX = ".md"
+
+_INCLUDE = re.compile(r"^@include\s+(\S+)\s*$")
+_FENCES = ("```", "~~~")
+
+
+class IncludeError(ValueError):
+    """An ``@include`` that cannot be resolved."""
+
+
+class _Include(NamedTuple):
+    name: str
+    lineno: int
+    newline: str
+
+
+class _Fragment(NamedTuple):
+    key: str
+    text: str
+    deps: FrozenSet[Path]
+
+
+def _parse(text: str) -> List[Union[str, _Include]]:
+    """Split ``text`` into literal runs and ``@include`` directives."""
+    segments: List[Union[str, _Include]] = []
+    literal: List[str] = []
+    in_fence = False
+    for lineno, line in enumerate(text.splitlines(keepends=True), 1):
+        stripped = line.strip()
+        if stripped.startswith(_FENCES):
+            in_fence = not in_fence
+        match = None if in_fence else _INCLUDE.match(stripped)
+        if match is None:
+            literal.append(line)
+            continue
+        if literal:
+            segments.append("".join(literal))
+            literal = []
+        segments.append(
+            _Include(match.group(1), lineno, line[len(line.rstrip("\r\n")) :])
+        )
+    if literal:
+        segments.append("".join(literal))
+    return segments
+
+
+class FragmentResolver:
+    """Expands ``@include`` directives against one fragments directory.
+
+    Args:
+        fragments_dir: Directory holding the shared fragments.
+    """
+
+    def __init__(self, fragments_dir: Path):
+        self.fragments_dir = Path(fragments_dir).expanduser()
+        # Fragment path -> ((mtime_ns, size), sha256, text).
+        self._files: Dict[Path, Tuple[Tuple[int, int], str, str]] = {}
+        self._parsed: Dict[str, List[Union[str, _Include]]] = {}
+        self._expanded: Dict[str, _Fragment] = {}
+        # Rule source name -> fragments it includes, directly or not.
+        self.graph: Dict[str, FrozenSet[Path]] = {}
+        self._lock = threading.Lock()
+
+    def _locate(self, include: _Include, origin: str) -> Path:
+        root = self.fragments_dir.resolve()
+        candidates = [root / include.name]
+        if not Path(include.name).suffix:
+            candidates.append(root / f"{include.name}{FRAGMENT_SUFFIX}")
+        for candidate in candidates:
+            path = candidate.resolve()
+            if root != path and root not in path.parents:
+                raise IncludeError(
+                    f"{origin}:{include.lineno}: {include.name!r} is outside "
+                    f"{self.fragments_dir}"
+                )
+            if path.is_file():
+                return path
+        raise IncludeError(
+            f"{origin}:{include.lineno}: fragment {include.name!r} not found in "
+            f"{self.fragments_dir}"
+        )
+
+    def _read(self, path: Path) -> Tuple[str, str]:
+        """Return ``(sha256, text)`` of a fragment, re-read only if its stat changed."""
+        st = path.stat()
+        sig = (st.st_mtime_ns, st.st_size)
+        cached = self._files.get(path)
+        if cached is not None and cached[0] == sig:
+            return cached[1], cached[2]
+        data = path.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        text = data.decode("utf-8")
+        self._files[path] = (sig, digest, text)
+        return digest, text
+
+    def _expand(
+        self, origin: str, digest: str, text: str, stack: Tuple[str, ...]
+    ) -> _Fragment:
+        segments = self._parsed.get(digest)
+        if segments is None:
+            segments = self._parsed[digest] = _parse(text)
+
+        children: List[Tuple[_Include, Path, _Fragment]] = []
+        for segment in segments:
+            if isinstance(segment, str):
+                continue
+            path = self._locate(segment, origin)
+            if str(path) in stack:
+                chain = " -> ".join(Path(p).name for p in (*stack, str(path)))
+                raise IncludeError(f"{origin}:{segment.lineno}: include cycle {chain}")
+            child_digest, child_text = self._read(path)
+            child = self._expand(
+                str(path), child_digest, child_text, (*stack, str(path))
+            )
+            children.append((segment, path, child))
+
+        h = hashlib.sha256(f"{origin}\0{digest}".encode())
+        for _, _, child in children:
+            h.update(child.key.encode())
+        key = h.hexdigest()
+        cached = self._expanded.get(key)
+        if cached is not None:
+            return cached
+
+        parts = []
+        resolved = iter(children)
+        deps: Set[Path] = set()
+        for segment in segments:
+            if isinstance(segment, str):
+                parts.append(segment)
+                continue
+            _, path, child = next(resolved)
+            deps.add(path)
+            deps |= child.deps
+            parts.append(child.text)
+            if child.text and not child.text.endswith("\n"):
+                parts.append(segment.newline)
+        fragment = _Fragment(key, "".join(parts), frozenset(deps))
+        self._expanded[key] = fragment
+        return fragment
+
+    def resolve(self, name: str, body: RuleBody, origin: Path) -> RuleBody:
+        """Return ``body`` with its ``@include`` lines expanded.
+
+        Bodies without directives are returned unchanged (streamed bodies
+        are scanned line by line first). The fragments ``body`` depends on
+        are recorded under ``name``.
+
+        Raises:
+            IncludeError: If an include is missing, outside the fragments
+                directory or part of a cycle.
+        """
+        if body.in_memory:
+            text = body.text()
+            found = "@include" in text
+        else:
+            found = any(line.lstrip().startswith("@include") for line in body.lines())
+            text = body.text() if found else ""
+        if not found:
+            with self._lock:
+                self.graph[name] = frozenset()
+            return body
+
+        with self._lock:
+            fragment = self._expand(str(origin), body.digest().hex(), text, ())
+            self.graph[name] = fragment.deps
+        if fragment.deps:
+            logger.debug(f"Resolved {len(fragment.deps)} fragment(s) for {name}")
+        return RuleBody.from_text(fragment.text) if fragment.text != text else body
+
+    def dependencies(self, name: str) -> FrozenSet[Path]:
+        """Return the fragments source ``name`` included when it was last resolved."""
+        return self.graph.get(name, frozenset())
+
+    def dependents(self, changed: Iterable[Path], names: Iterable[str]) -> List[str]:
+        """Return the sources in ``names`` affected by edits to ``changed`` fragments.
+
+        Sources that were never resolved by this resolver are included, since
+        their dependencies are unknown.
+        """
+        changed = {Path(p).resolve() for p in changed}
+        with self._lock:
+            return [
+                name for name in names
+                if name not in self.graph or not changed.isdisjoint(self.graph[name])
+            ]
+
+    def fingerprint(self, name: str, path: Path) -> Dict[str, str]:
+        """Return ``{fragment path: sha256}`` for the fragments ``name`` includes.
+
+        ``path`` is resolved first if ``name`` has not been resolved yet.
+        """
+        if name not in self.graph:
+            self.resolve(name, RuleBody.from_path(path), path)
+        with self._lock:
+            return {
+                str(dep): self._read(dep)[0] for dep in sorted(self.dependencies(name))
+            }
+
+
+_resolvers: Dict[str, FragmentResolver] = {}
+_resolvers_lock = threading.Lock()
+
+
+def get_fragment_resolver(fragments_dir: Optional[Path] = None) -> FragmentResolver:
+    """Return the shared resolver for ``fragments_dir`` or `DEFAULT_FRAGMENTS_DIR`.
+
+    One instance per directory is kept for the life of the process, so
+    ``--watch`` and ``--fleet`` reuse parsed and expanded fragments.
+    """
+    directory = str(Path(fragments_dir or DEFAULT_FRAGMENTS_DIR).expanduser())
+    with _resolvers_lock:
+        resolver = _resolvers.get(directory)
+        if resolver is None:
+            resolver = _resolvers[directory] = FragmentResolver(Path(directory))
+        return resolver
@@ -0,0 +1,255 @@
+"""YAML frontmatter emitter for the metadata shapes crules generates.
+
+Rule files carry a block mapping of a ``description`` string plus one list of
+glob strings (``globs``, ``paths`` or ``applyTo``). For those shapes this
+module reproduces ``yaml.dump(metadata, default_flow_style=None)`` byte for
+byte: keys are sorted, scalars are emitted plain when PyYAML would resolve
+them back to strings and single-quoted otherwise, and flow sequences wrap at
+PyYAML's default width of 80 columns. Anything outside that subset (non-ASCII
+or control characters, other value types) falls back to ``yaml.dump`` itself,
+so the output never depends on which path produced it.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import functools
+import re
+
+BEST_WIDTH = 80
+BEST_INDENT = 2
+
+# PyYAML's implicit resolvers: a plain scalar matching any of these would be
+# read back as a bool, number, null, timestamp, merge or value, not a string.
+_IMPLICIT_RESOLVERS = [
+    (re.compile(r'''^(?:yes|Yes|YES|no|No|NO
+                    |true|True|TRUE|false|False|FALSE
+                    |on|On|ON|off|Off|OFF)$''', re.X), "yYnNtTfFoO"),
+    (re.compile(r'''^(?:[-+]?(?:[0-9][0-9_]*)\.[0-9_]*(?:[eE][-+][0-9]+)?
+                    |\.[0-9][0-9_]*(?:[eE][-+][0-9]+)?
+                    |[-+]?[0-9][0-9_]*(?::[0-5]?[0-9])+\.[0-9_]*
+                    |[-+]?\.(?:inf|Inf|INF)
+                    |\.(?:nan|NaN|NAN))$''', re.X), "-+0123456789."),
+    (re.compile(r'''^(?:[-+]?0b[0-1_]+
+                    |[-+]?0[0-7_]+
+                    |[-+]?(?:0|[1-9][0-9_]*)
+                    |[-+]?0x[0-9a-fA-F_]+
+                    |[-+]?[1-9][0-9_]*(?::[0-5]?[0-9])+)$''', re.X), "-+0123456789"),
+    (re.compile(r'^(?:<<)$'), "<"),
+    (re.compile(r'''^(?: ~
+                    |null|Null|NULL
+                    | )$''', re.X), "~nN"),
+    (re.compile(r'''^(?:[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]
+                    |[0-9][0-9][0-9][0-9] -[0-9][0-9]? -[0-9][0-9]?
+                     (?:[Tt]|[ \t]+)[0-9][0-9]?
+                     :[0-9][0-9] :[0-9][0-9] (?:\.[0-9]*)?
+                     (?:[ \t]*(?:Z|[-+][0-9][0-9]?(?::[0-9][0-9])?))?)$''', re.X),
+     "0123456789"),
+    (re.compile(r'^(?:=)$'), "="),
+    (re.compile(r'^(?:!|&|\*)$'), "!&*"),
+]
+
+_PRINTABLE_ASCII = re.compile(r"[\x20-\x7e]*\Z")
+
+
+class _Fallback(Exception):
+    """Raised when metadata is outside the subset emitted here."""
+
+
+def _resolves_to_str(value: str) -> bool:
+    first = value[0]
+    return not any(
+        first in chars and regex.match(value) for regex, chars in _IMPLICIT_RESOLVERS
+    )
+
+
+def _plain_allowed(value: str, flow: bool) -> bool:
+    """Port of PyYAML's ``Emitter.analyze_scalar`` for printable ASCII text."""
+    if value.startswith(("---", "...")):
+        return False
+    if value[0] == " " or value[-1] == " ":
+        return False
+    last = len(value) - 1
+    for index, ch in enumerate(value):
+        followed_by_space = index == last or value[index + 1] == " "
+        if index == 0:
+            if ch in "#,[]{}&*!|>'\"%@`":
+                return False
+            if ch in "?:" and (flow or followed_by_space):
+                return False
+            if ch == "-" and followed_by_space:
+                return False
+        else:
+            if flow and ch in ",?[]{}":
+                return False
+            if ch == ":" and (flow or followed_by_space):
+                return False
+            if ch == "#" and value[index - 1] == " ":
+                return False
+    return _resolves_to_str(value)
+
+
+class _Writer:
+    """The subset of PyYAML's ``Emitter`` state that affects layout."""
+
+    def __init__(self) -> None:
+        self.parts: List[str] = []
+        self.column = 0
+        self.indent = 0
+        self.whitespace = True
+        self.indention = True
+
+    def write(self, data: str) -> None:
+        self.parts.append(data)
+        self.column += len(data)
+
+    def indicator(
+        self, indicator: str, need_whitespace: bool, whitespace: bool = False
+    ) -> None:
+        if self.whitespace or not need_whitespace:
+            self.write(indicator)
+        else:
+            self.write(" " + indicator)
+        self.whitespace = whitespace
+        self.indention = False
+
+    def line_break(self) -> None:
+        self.parts.append("\n")
+        self.column = 0
+        self.whitespace = True
+        self.indention = True
+
+    def write_indent(self) -> None:
+        if not self.indention or self.column > self.indent or (
+            self.column == self.indent and not self.whitespace
+        ):
+            self.line_break()
+        if self.column < self.indent:
+            self.whitespace = True
+            self.parts.append(" " * (self.indent - self.column))
+            self.column = self.indent
+
+    def _words(self, text: str, split: bool, quoted: bool) -> None:
+        """Write ``text``, breaking at single spaces past the width like PyYAML."""
+        start = 0
+        end = 0
+        length = len(text)
+        while end < length:
+            if text[end] != " ":
+                end += 1
+                continue
+            if start < end:
+                self.write(text[start:end])
+            run_end = end
+            while run_end < length and text[run_end] == " ":
+                run_end += 1
+            if (
+                run_end == end + 1 and self.column > BEST_WIDTH and split
+                and not (quoted and (end == 0 or run_end == length))
+            ):
+                self.write_indent()
+                self.whitespace = False
+                self.indention = False
+            else:
+                self.write(text[end:run_end])
+            start = end = run_end
+        if start < length:
+            self.write(text[start:])
+
+    def scalar(self, value: str, flow: bool, simple_key: bool) -> None:
+        # Scalars are written one indentation level deeper than their container.
+        outer, self.indent = self.indent, self.indent + BEST_INDENT
+        split = not simple_key
+        if value and _plain_allowed(value, flow):
+            if not self.whitespace:
+                self.write(" ")
+            self.whitespace = False
+            self.indention = False
+            self._words(value, split, quoted=False)
+        elif simple_key:
+            raise _Fallback(value)
+        else:
+            self.indicator("'", True)
+            # Quotes are doubled in place; the surrounding spaces decide wrapping.
+            self._words(value.replace("'", "''"), split, quoted=True)
+            self.indicator("'", False)
+        self.indent = outer
+
+
+def _emit(items: Tuple[Tuple[str, Any], ...]) -> str:
+    writer = _Writer()
+    for key, value in items:
+        writer.write_indent()
+        writer.scalar(key, flow=False, simple_key=True)
+        writer.indicator(":", False)
+        if isinstance(value, str):
+            writer.scalar(value, flow=False, simple_key=False)
+            continue
+        writer.indicator("[", True, whitespace=True)
+        outer, writer.indent = writer.indent, writer.indent + BEST_INDENT
+        for i, item in enumerate(value):
+            if i:
+                writer.indicator(",", False)
+            if writer.column > BEST_WIDTH:
+                writer.write_indent()
+            writer.scalar(item, flow=True, simple_key=False)
+        writer.indent = outer
+        writer.indicator("]", False)
+    writer.write_indent()
+    return "".join(writer.parts)
+
+
+def _supported(metadata: Dict[str, Any]) -> Optional[Tuple[Tuple[str, Any], ...]]:
+    """Return the sorted, hashable form of ``metadata`` if it is emitted here."""
+    items = []
+    has_list = False
+    for key, value in metadata.items():
+        if type(key) is not str or not key or len(key) >= 128:
+            return None
+        if type(value) is str:
+            scalars: List[str] = [value]
+        elif type(value) is list and all(type(v) is str for v in value):
+            scalars = value
+            value = tuple(value)
+            has_list = True
+        else:
+            return None
+        if not all(_PRINTABLE_ASCII.match(s) for s in [key, *scalars]):
+            return None
+        items.append((key, value))
+    # A mapping of scalars only would be dumped in flow style.
+    if not has_list:
+        return None
+    return tuple(sorted(items))
+
+
+@functools.lru_cache(maxsize=4096)
+def _render_items(items: Tuple[Tuple[str, Any], ...]) -> bytes:
+    try:
+        body = _emit(items)
+    except _Fallback:
+        body = _yaml_dump({k: list(v) if isinstance(v, tuple) else v for k, v in items})
+    return f"---\n{body}---\n\n".encode("utf-8")
+
+
+def _yaml_dump(metadata: Dict[str, Any]) -> str:
+    import yaml
+
+    return yaml.dump(metadata, default_flow_style=None)
+
+
+def render_frontmatter(metadata: Dict[str, Any]) -> bytes:
+    """Return the ``---``-fenced frontmatter block for ``metadata`` as UTF-8.
+
+    Results are memoized per metadata (i.e. per manager and globs), so
+    repeated renders of the same rule cost one dictionary lookup.
+
+    Args:
+        metadata: Mapping of ``description`` and a glob list, as built by
+            the AI managers.
+
+    Returns:
+        The same bytes as ``"---\\n" + yaml.dump(metadata,
+        default_flow_style=None) + "---\\n\\n"``.
+    """
+    items = _supported(metadata)
+    if items is None:
+        return f"---\n{_yaml_dump(metadata)}---\n\n".encode("utf-8")
+    return _render_items(items)
@@ -0,0 +1,83 @@
+"""Single-pass editor for the crules-managed block in .gitignore."""
+from pathlib import Path
+from typing import Iterable, List
+import logging
+import os
+import stat
+
+from .timings import timed
+
+logger = logging.getLogger(__name__)
+
+BLOCK_BEGIN = "# BEGIN crules"
+BLOCK_END = "# END crules"
+
+
+@timed("gitignore")
+def update_ignore_block(gitignore: Path, patterns: Iterable[str]) -> bool:
+    """Ensure ``patterns`` are ignored, editing only the fenced crules block.
+
+    Patterns already listed anywhere in the file (including older
+    ``# Crules specific`` sections) are left alone; the rest are appended to
+    the ``# BEGIN crules`` / ``# END crules`` block, which is created at the
+    end of the file if missing. The file is read once and, only when the
+    block changes, rewritten through an atomic replace.
+
+    Args:
+        gitignore: Path to the ``.gitignore`` file; created if missing.
+        patterns: Ignore patterns to ensure, in the order to add them.
+
+    Returns:
+        bool: True if the file was written, False if it was already current.
+    """
+    try:
+        content = gitignore.read_text()
+    except FileNotFoundError:
+        content = ""
+    lines = content.splitlines()
+
+    begin = end = -1
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if stripped == BLOCK_BEGIN and begin < 0:
+            begin = i
+        elif stripped == BLOCK_END and begin >= 0:
+            end = i
+            break
+    if begin >= 0 and end < 0:
+        # Unterminated block: treat everything after BEGIN as its body.
+        end = len(lines)
+
+    if begin >= 0:
+        outside = lines[:begin] + lines[end + 1:]
+        block: List[str] = [ln for ln in lines[begin + 1:end] if ln.strip()]
+    else:
+        outside = lines
+        block = []
+
+    present = {ln.strip() for ln in outside}
+    present.update(ln.strip() for ln in block)
+    added = []
+    for pattern in patterns:
+        if pattern not in present:
+            present.add(pattern)
+            block.append(pattern)
+            added.append(pattern)
+    if not added:
+        return False
+
+    fenced = [BLOCK_BEGIN, *block, BLOCK_END]
+    if begin >= 0:
+        new_lines = lines[:begin] + fenced + lines[end + 1:]
+    elif lines:
+        new_lines = lines + ([""] if lines[-1].strip() else []) + fenced
+    else:
+        new_lines = fenced
+
+    tmp = gitignore.with_name(f"{gitignore.name}.crules-tmp")
+    tmp.write_text("\n".join(new_lines) + "\n")
+    if gitignore.exists():
+        os.chmod(tmp, stat.S_IMODE(gitignore.stat().st_mode))
+    os.replace(tmp, gitignore)
+    logger.info(f"Updated {gitignore} with {', '.join(added)}")
+    return True
@@ -0,0 +1,175 @@
+"""Per-repository manifest of generated rule files."""
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Union
+import json
+import logging
+import os
+import stat
+import threading
+
+from .render import RenderedOutput
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_PATH = ".crules/manifest.json"
+MANIFEST_VERSION = 2
+
+
+def _as_output(data: Union[bytes, RenderedOutput]) -> RenderedOutput:
+    return data if isinstance(data, RenderedOutput) else RenderedOutput(data)
+
+
+class OutputManifest:
+    """Tracks the hash, size and mtime of every file crules generated.
+
+    An output whose on-disk size and mtime still match its manifest entry is
+    trusted without being read back, so runs where nothing changed cost one
+    ``stat`` per output. Files edited outside crules fail the stat check and
+    fall back to a chunked comparison against the rendered output.
+    Digests are `RenderedOutput.digest` values, so large bodies are hashed
+    once per run rather than once per target.
+
+    ``sources`` holds fingerprints of inputs (e.g. the global rules file as
+    of the last ``--sync``) so callers can skip rendering altogether when
+    nothing they depend on has changed.
+    """
+
+    def __init__(self, root: Optional[Path] = None, force: bool = False):
+        self.root = Path(root) if root is not None else Path(".")
+        self.force = force
+        self.path = self.root / MANIFEST_PATH
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.sources: Dict[str, Any] = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, root: Optional[Path] = None, force: bool = False) -> "OutputManifest":
+        """Load the manifest for ``root``, starting empty if missing or corrupt.
+
+        With ``force``, every output is reported as needing a write.
+        """
+        manifest = cls(root, force)
+        try:
+            data = json.loads(manifest.path.read_text())
+            if data.get("version") == MANIFEST_VERSION:
+                manifest.entries = dict(data.get("files", {}))
+                manifest.sources = dict(data.get("sources", {}))
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"Ignoring unreadable manifest {manifest.path}: {e}")
+        return manifest
+
+    def _key(self, file_path: Path) -> str:
+        return Path(os.path.relpath(file_path, self.root)).as_posix()
+
+    def needs_write(self, file_path: Path, data: Union[bytes, RenderedOutput]) -> bool:
+        """Return True unless ``file_path`` already holds exactly ``data``."""
+        if self.force:
+            return True
+        output = _as_output(data)
+        try:
+            st = file_path.lstat()
+        except OSError:
+            return True
+        if stat.S_ISLNK(st.st_mode):
+            return True  # e.g. a link into the shared output store; replace it
+        if st.st_size != output.size:
+            return True
+
+        key = self._key(file_path)
+        digest = output.digest()
+        entry = self.entries.get(key)
+        if (
+            entry is not None
+            and entry.get("sha256") == digest
+            and entry.get("size") == st.st_size
+            and entry.get("mtime_ns") == st.st_mtime_ns
+        ):
+            return False
+
+        if not output.matches_file(file_path):
+            return True
+        self._set(key, digest, st)
+        return False
+
+    def record(
+        self, file_path: Path, data: Union[bytes, RenderedOutput], deduped: bool = False
+    ) -> None:
+        """Record ``data`` as the current content of a freshly written file.
+
+        ``deduped`` marks a file published with output dedupe on (see
+        `is_deduped`).
+        """
+        self._set(
+            self._key(file_path), _as_output(data).digest(), file_path.stat(), deduped
+        )
+
+    def is_deduped(self, file_path: Path) -> bool:
+        """Return True if ``file_path`` was last written with output dedupe on."""
+        entry = self.entries.get(self._key(file_path))
+        return bool(entry and entry.get("deduped"))
+
+    def _set(
+        self, key: str, digest: str, st: os.stat_result, deduped: bool = False
+    ) -> None:
+        with self._lock:
+            self.entries[key] = {
+                "sha256": digest,
+                "size": st.st_size,
+                "mtime_ns": st.st_mtime_ns,
+            }
+            if deduped:
+                self.entries[key]["deduped"] = True
+            self._dirty = True
+
+    def outputs_intact(self, keys: Optional[Iterable[str]] = None) -> bool:
+        """Return True if recorded outputs still have their recorded size and mtime.
+
+        Args:
+            keys: Repository-relative paths to check. Defaults to every
+                recorded output; a key with no entry is not intact.
+        """
+        if keys is None:
+            keys = list(self.entries)
+        for key in keys:
+            entry = self.entries.get(key)
+            if entry is None:
+                return False
+            try:
+                st = (self.root / key).lstat()
+            except OSError:
+                return False
+            if st.st_size != entry.get("size") or st.st_mtime_ns != entry.get(
+                "mtime_ns"
+            ):
+                return False
+        return True
+
+    def set_source(self, name: str, fingerprint: Any) -> None:
+        """Remember ``fingerprint`` for input ``name`` when the manifest is saved."""
+        with self._lock:
+            if self.sources.get(name) != fingerprint:
+                self.sources[name] = fingerprint
+                self._dirty = True
+
+    def save(self) -> None:
+        """Atomically write the manifest if any entry changed."""
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = json.dumps(
+                {
+                    "version": MANIFEST_VERSION,
+                    "files": self.entries,
+                    "sources": self.sources,
+                },
+                indent=2,
+                sort_keys=True,
+            )
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            tmp.write_text(payload + "\n")
+            os.replace(tmp, self.path)
+            self._dirty = False
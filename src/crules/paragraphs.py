@@ -0,0 +1,102 @@
+"""Dropping global-rule paragraphs that language rules repeat.
+
+Language rule files often restate guidance from the global ``cursorrules``
+(testing, git hygiene, ...), so an assistant that loads both reads it twice.
+A `ParagraphIndex` hashes every paragraph of the global rules and then
+filters each language file, dropping the paragraphs it has already seen.
+
+A paragraph is a run of non-blank lines; blank lines inside a fenced code
+block (triple backticks or ``~~~``) do not end one. Paragraphs are compared after
+normalization: whitespace runs collapse to one space and case is folded, so
+re-wrapped or re-indented copies still match. Paragraphs shorter than
+`MIN_PARAGRAPH_CHARS` normalized characters, such as headings and rules
+(``---``), are always kept. Every line is read and hashed once, so the stage
+is linear in the total size of the sources.
+"""
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+import hashlib
+
+MIN_PARAGRAPH_CHARS = 40
+_FENCES = ("```", "~~~")
+
+
+def _paragraphs(lines: Iterable[str]) -> Iterator[List[str]]:
+    """Group ``lines`` into paragraphs, each followed by the blank lines after it."""
+    para: List[str] = []
+    in_fence = False
+    trailing = False
+    for line in lines:
+        blank = not line.strip()
+        if blank and not in_fence:
+            para.append(line)
+            trailing = True
+            continue
+        if trailing:
+            yield para
+            para, trailing = [], False
+        para.append(line)
+        if line.lstrip().startswith(_FENCES):
+            in_fence = not in_fence
+    if para:
+        yield para
+
+
+def _key(para: List[str], min_chars: int) -> Optional[bytes]:
+    """Return the digest of the normalized paragraph, or None if it is too short."""
+    h = hashlib.blake2b(digest_size=16)
+    length = 0
+    for line in para:
+        for word in line.split():
+            word = word.casefold()
+            if length:
+                h.update(b" ")
+                length += 1
+            h.update(word.encode("utf-8"))
+            length += len(word)
+    return h.digest() if length >= min_chars else None
+
+
+def new_dedupe_stats() -> Dict[str, int]:
+    """Return empty counters for `ParagraphIndex.filter`."""
+    return {"paragraphs": 0, "bytes": 0}
+
+
+class ParagraphIndex:
+    """Digests of the normalized paragraphs of one compile's global rules.
+
+    Args:
+        min_chars: Paragraphs shorter than this many normalized characters
+            are never indexed or dropped.
+    """
+
+    def __init__(self, min_chars: int = MIN_PARAGRAPH_CHARS):
+        self.min_chars = min_chars
+        self._seen: Set[bytes] = set()
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def add(self, lines: Iterable[str]) -> None:
+        """Index every paragraph of ``lines``."""
+        for para in _paragraphs(lines):
+            key = _key(para, self.min_chars)
+            if key is not None:
+                self._seen.add(key)
+
+    def filter(
+        self, lines: Iterable[str], stats: Optional[Dict[str, int]] = None
+    ) -> Iterator[str]:
+        """Yield ``lines`` without the paragraphs already indexed.
+
+        A dropped paragraph takes the blank lines after it along, so no gap
+        is left behind. ``stats`` (see `new_dedupe_stats`) counts the dropped
+        paragraphs and their UTF-8 bytes.
+        """
+        for para in _paragraphs(lines):
+            key = _key(para, self.min_chars)
+            if key is None or key not in self._seen:
+                yield from para
+            elif stats is not None:
+                stats["paragraphs"] += 1
+                stats["bytes"] += sum(len(line.encode("utf-8")) for line in para)
+
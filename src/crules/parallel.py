@@ -0,0 +1,77 @@
+"""Thread pool that keeps results and log output in submission order."""
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, List, Tuple
+import logging
+import threading
+
+
+class _ThreadLogBuffer(logging.Filter):
+    """Handler filter that diverts records from pool threads into per-task lists."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._local = threading.local()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        records = getattr(self._local, "records", None)
+        if records is None:
+            return True
+        # The same record passes every root handler; keep one copy.
+        if not records or records[-1] is not record:
+            records.append(record)
+        return False
+
+    def call(
+        self, fn: Callable, args: tuple
+    ) -> Tuple[bool, Any, List[logging.LogRecord]]:
+        self._local.records = records = []
+        try:
+            return True, fn(*args), records
+        except BaseException as e:
+            return False, e, records
+        finally:
+            self._local.records = None
+
+
+class OrderedPool:
+    """`ThreadPoolExecutor` wrapper whose log output reads like a serial run.
+
+    Records logged by a task are held until `result` is called for that task
+    on the owning thread, then emitted in one block, so interleaving between
+    workers never reaches the user. Use as a context manager::
+
+        with OrderedPool(4) as pool:
+            futures = [pool.submit(work, item) for item in items]
+            results = [pool.result(f) for f in futures]
+    """
+
+    def __init__(self, jobs: int, name: str = "crules"):
+        self._executor = ThreadPoolExecutor(max_workers=jobs, thread_name_prefix=name)
+        self._buffer = _ThreadLogBuffer()
+        self._handlers: List[logging.Handler] = []
+
+    def __enter__(self) -> "OrderedPool":
+        self._handlers = list(logging.getLogger().handlers)
+        for handler in self._handlers:
+            handler.addFilter(self._buffer)
+        return self
+
+    def __exit__(self, *exc: Any) -> bool:
+        try:
+            self._executor.shutdown(wait=True)
+        finally:
+            for handler in self._handlers:
+                handler.removeFilter(self._buffer)
+        return False
+
+    def submit(self, fn: Callable, *args: Any) -> Future:
+        return self._executor.submit(self._buffer.call, fn, args)
+
+    def result(self, future: Future) -> Any:
+        """Wait for ``future``, replay its log records, then return or raise."""
+        ok, value, records = future.result()
+        for record in records:
+            logging.getLogger(record.name).handle(record)
+        if not ok:
+            raise value
+        return value
@@ -0,0 +1,269 @@
+"""Streaming rule bodies and rendered outputs."""
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Union
+import hashlib
+import io
+import mmap
+import os
+import weakref
+
+CHUNK_SIZE = 1024 * 1024
+# Bodies at least this large are streamed from disk instead of held in memory.
+STREAM_THRESHOLD = 1024 * 1024
+
+UNIVERSAL_PREAMBLE = (
+    "# Universal AI Context\n"
+    "You are operating in a multi-agent repository. "
+    "Your native rules have been loaded.\n"
+    "Always adhere to project_spec.md as the ultimate source of truth.\n"
+    "If instructions conflict, prioritize: "
+    "project_spec.md > Native Rules > Root Files.\n"
+    "CRITICAL: Before executing any task, you MUST read the root "
+    "`AGENTS.md` file for common cross-IDE rules and repo status. "
+    "If the status is `[TEMPLATE]`, you are strictly "
+    "locked into the Bootstrapper persona (`.crules/modes/BOOTSTRAPPER.md`). "
+    "Do not write code or manage tasks until the workspace is customized.\n\n"
+).encode("utf-8")
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+class _SpoolFile:
+    """A temporary body file, removed once no `RuleBody` refers to it."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        weakref.finalize(self, _remove_quietly, str(path))
+
+
+class RuleBody:
+    """The body of a rule file, held in memory or streamed from its source.
+
+    Small sources are read once and shared by every target. Large sources are
+    never loaded whole: each consumer maps the file and copies it in
+    ``CHUNK_SIZE`` pieces, so peak memory does not grow with input size.
+    """
+
+    __slots__ = ("path", "prefix", "_data", "_size", "_digest", "_spool")
+
+    def __init__(
+        self,
+        data: Optional[bytes] = None,
+        path: Optional[Path] = None,
+        prefix: bytes = b"",
+    ):
+        self.path = path
+        self.prefix = prefix
+        self._data = data
+        self._size = len(data) if data is not None else None
+        self._digest: Optional[bytes] = None
+        # Keeps a from_lines temp file alive while this body streams from it.
+        self._spool: Optional[_SpoolFile] = None
+
+    @classmethod
+    def from_text(cls, text: str) -> "RuleBody":
+        return cls(data=text.encode("utf-8"))
+
+    @classmethod
+    def from_path(
+        cls, path: Path, stream_threshold: int = STREAM_THRESHOLD
+    ) -> "RuleBody":
+        """Load ``path``, leaving it on disk from ``stream_threshold`` bytes up."""
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < stream_threshold:
+                return cls(data=f.read())
+        body = cls(path=Path(path))
+        body._size = size
+        return body
+
+    @classmethod
+    def from_lines(
+        cls, lines: Iterable[str], stream_threshold: int = STREAM_THRESHOLD
+    ) -> "RuleBody":
+        """Build a body from ``lines``, holding at most ``stream_threshold`` in memory.
+
+        Once the text reaches the threshold it is spooled to a temporary file
+        that is streamed like any large source. The file is removed when the
+        last body streaming from it (including ones from `render_body`) is
+        garbage collected, or at exit.
+        """
+        buffered: List[str] = []
+        held = 0
+        f = None
+        try:
+            for line in lines:
+                if f is not None:
+                    f.write(line)
+                    continue
+                buffered.append(line)
+                held += len(line)
+                if held >= stream_threshold:
+                    import tempfile
+
+                    fd, name = tempfile.mkstemp(prefix="crules-", suffix=".rule")
+                    spool = _SpoolFile(Path(name))
+                    f = os.fdopen(fd, "w", encoding="utf-8", newline="")
+                    f.writelines(buffered)
+                    buffered = []
+        finally:
+            if f is not None:
+                f.close()
+        if f is None:
+            return cls.from_text("".join(buffered))
+        body = cls.from_path(spool.path, stream_threshold)
+        body._spool = spool
+        return body
+
+    @property
+    def in_memory(self) -> bool:
+        return self._data is not None
+
+    @property
+    def size(self) -> int:
+        if self._size is None:
+            self._size = os.stat(self.path).st_size
+        return len(self.prefix) + self._size
+
+    def chunks(self) -> Iterator[memoryview]:
+        """Yield the body as read-only views of at most ``CHUNK_SIZE`` bytes.
+
+        Views are only valid until the next iteration; consumers must copy
+        anything they keep.
+        """
+        if self.prefix:
+            yield memoryview(self.prefix)
+        if self._data is not None:
+            yield memoryview(self._data)
+            return
+        with open(self.path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                view = memoryview(mm)
+                try:
+                    for offset in range(0, len(view), CHUNK_SIZE):
+                        chunk = view[offset:offset + CHUNK_SIZE]
+                        try:
+                            yield chunk
+                        finally:
+                            chunk.release()
+                finally:
+                    view.release()
+
+    def lines(self) -> Iterator[str]:
+        """Yield the body as UTF-8 text lines, keeping their line endings.
+
+        Streamed bodies are read from disk a line at a time.
+        """
+        if self._data is not None:
+            yield from io.StringIO(
+                (self.prefix + self._data).decode("utf-8"), newline=""
+            )
+            return
+        yield from io.StringIO(self.prefix.decode("utf-8"), newline="")
+        with open(self.path, encoding="utf-8", newline="") as f:
+            yield from f
+
+    def digest(self) -> bytes:
+        """Return the SHA-256 digest of the body, computed once."""
+        if self._digest is None:
+            h = hashlib.sha256()
+            for chunk in self.chunks():
+                h.update(chunk)
+            self._digest = h.digest()
+        return self._digest
+
+    def text(self) -> str:
+        """Materialize the body as text (only for small or explicitly loaded bodies)."""
+        if self._data is not None:
+            return self.prefix.decode("utf-8") + self._data.decode("utf-8")
+        return self.prefix.decode("utf-8") + self.path.read_text(encoding="utf-8")
+
+
+class RenderedBody(RuleBody):
+    """A `RuleBody` that already starts with the Universal Preamble.
+
+    Built once per source by `render_body` and shared by every target, so
+    each manager only contributes its frontmatter header.
+    """
+
+    __slots__ = ()
+
+
+def render_body(content: Union[str, RuleBody], preamble: bool = True) -> RenderedBody:
+    """Return ``content`` with the Universal Preamble prepended, once per source.
+
+    In-memory bodies are joined with the preamble into a single buffer;
+    streamed bodies keep the preamble as a prefix ahead of their chunks.
+    Already rendered bodies are returned unchanged. With ``preamble`` off the
+    body is marked rendered as is, for sources whose preamble is emitted by
+    another output (``preamble_once``).
+    """
+    if isinstance(content, RenderedBody):
+        return content
+    body = content if isinstance(content, RuleBody) else RuleBody.from_text(content)
+    lead = UNIVERSAL_PREAMBLE if preamble else b""
+    if body.in_memory:
+        return RenderedBody(data=lead + body.prefix + body._data)
+    rendered = RenderedBody(path=body.path, prefix=lead + body.prefix)
+    rendered._size = body._size
+    rendered._spool = body._spool
+    return rendered
+
+
+class RenderedOutput:
+    """A rendered rule file: small header bytes followed by a `RuleBody`."""
+
+    __slots__ = ("header", "body", "_digest")
+
+    def __init__(self, header: bytes, body: Optional[RuleBody] = None):
+        self.header = header
+        self.body = body if body is not None else RuleBody(data=b"")
+        self._digest: Optional[str] = None
+
+    @property
+    def size(self) -> int:
+        return len(self.header) + self.body.size
+
+    def digest(self) -> str:
+        """Content identity: SHA-256 over the header and body digests.
+
+        Hashing the two parts separately lets one large body digest be reused
+        for every target instead of re-reading the source per output.
+        """
+        if self._digest is None:
+            h = hashlib.sha256(hashlib.sha256(self.header).digest())
+            h.update(self.body.digest())
+            self._digest = h.hexdigest()
+        return self._digest
+
+    def write_to(self, fh: BinaryIO) -> None:
+        """Write the header, then copy the body in chunks."""
+        fh.write(self.header)
+        for chunk in self.body.chunks():
+            fh.write(chunk)
+
+    def to_bytes(self) -> bytes:
+        """Materialize the whole output; only used for in-memory bodies."""
+        return self.header + b"".join(bytes(c) for c in self.body.chunks())
+
+    def matches_file(self, path: Path) -> bool:
+        """Return True if ``path`` holds exactly this output, compared in chunks."""
+        try:
+            if os.stat(path).st_size != self.size:
+                return False
+            with open(path, "rb") as f:
+                if f.read(len(self.header)) != self.header:
+                    return False
+                for chunk in self.body.chunks():
+                    if f.read(len(chunk)) != chunk:
+                        return False
+                return True
+        except OSError:
+            return False
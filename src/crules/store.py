@@ -0,0 +1,322 @@
+"""Shared, versioned store of compiled outputs linked into many repositories.
+
+With ``output_store`` enabled, rule files are not written into each
+repository. Every output lives once in a version directory of the store::
+
+    ~/.cache/crules/store/9c41.../     # one profile per output settings
+        current -> 3f2a...           # symlink flipped on publish
+        3f2a.../index.json           # {"files": {relpath: sha256}}
+        3f2a.../files/.cursor/rules/global.mdc
+        ...
+
+and each repository's target paths are symlinks to
+``<profile>/current/files/<relpath>``. Publishing a changed rule set writes one
+new version directory (unchanged files are hardlinked from the previous
+version) and atomically replaces ``current``, which updates every linked
+repository at once. Versions are merged, so a repository that deploys only
+some languages never drops another repository's files from the set.
+
+Outputs are keyed by their path relative to the repository. The bytes at
+a path depend on the rule sources and on settings such as
+``dedupe_paragraphs`` or ``preamble_once`` (`OUTPUT_SETTINGS`), so
+repositories deployed with different settings get separate profiles (see
+`store_profile`) and never overwrite each other's ``current``.
+"""
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import secrets
+import shutil
+import threading
+
+from .render import RenderedOutput
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_DIR = "~/.cache/crules/store"
+CURRENT_LINK = "current"
+INDEX_NAME = "index.json"
+FILES_DIR = "files"
+STORE_VERSION = 1
+KEEP_VERSIONS = 3
+# Config keys that change the bytes of an output at a given path.
+OUTPUT_SETTINGS = (
+    "global_rules_path",
+    "language_rules_dir",
+    "fragments_dir",
+    "preamble_once",
+    "dedupe_paragraphs",
+    "token_budgets",
+)
+
+
+def _version_id(files: Dict[str, str]) -> str:
+    """Name a rule set after the paths and digests it contains."""
+    return hashlib.sha256(json.dumps(files, sort_keys=True).encode()).hexdigest()
+
+
+class OutputStore:
+    """Content-addressed rule sets with an atomically flipped ``current`` link.
+
+    Args:
+        store_dir: Store root, created on first publish.
+        fsync: Flush new files and the flipped link to disk.
+        keep: Number of version directories kept, including ``current``.
+    """
+
+    def __init__(self, store_dir: Path, fsync: bool = True, keep: int = KEEP_VERSIONS):
+        self.store_dir = Path(store_dir).expanduser()
+        self.fsync = fsync
+        self.keep = max(1, keep)
+        self.current = self.store_dir / CURRENT_LINK
+        self._lock = threading.Lock()
+
+    def link_target(self, relpath: str) -> Path:
+        """Return the path a repository's output at ``relpath`` should link to."""
+        return self.current / FILES_DIR / relpath
+
+    @contextlib.contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Serialize publishers in this process and, where supported, across others."""
+        with self._lock:
+            self.store_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.store_dir / ".lock", "a") as fh:
+                try:
+                    import fcntl
+                except ImportError:  # Windows
+                    fcntl = None
+                if fcntl is not None:
+                    fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+                yield
+
+    def current_version(self) -> Optional[str]:
+        try:
+            return os.readlink(self.current)
+        except OSError:
+            return None
+
+    def _read_index(self, version: Optional[str]) -> Dict[str, str]:
+        if version is None:
+            return {}
+        try:
+            data = json.loads((self.store_dir / version / INDEX_NAME).read_text())
+            return dict(data.get("files", {}))
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(
+                f"Ignoring unreadable store index for version {version}: {e}"
+            )
+            return {}
+
+    def publish(self, outputs: Dict[str, RenderedOutput]) -> bool:
+        """Merge ``outputs`` into the current rule set and flip ``current`` to it.
+
+        Args:
+            outputs: Rendered outputs keyed by POSIX path relative to the repo.
+
+        Returns:
+            bool: True if a new version was published, False if the current
+            version already held exactly these outputs.
+        """
+        with self._locked():
+            previous = self.current_version()
+            old_files = self._read_index(previous)
+            files = dict(old_files)
+            files.update({rel: output.digest() for rel, output in outputs.items()})
+            if previous is not None and files == old_files:
+                return False
+
+            version = _version_id(files)
+            if not (self.store_dir / version).is_dir():
+                self._write_version(version, files, outputs, previous, old_files)
+            self._flip(version)
+            logger.info(f"Published rule set {version[:12]} to {self.store_dir}")
+            self._prune(version)
+            return True
+
+    def _write_version(
+        self,
+        version: str,
+        files: Dict[str, str],
+        outputs: Dict[str, RenderedOutput],
+        previous: Optional[str],
+        old_files: Dict[str, str],
+    ) -> None:
+        tmp = self.store_dir / f".{version}.{secrets.token_hex(4)}.tmp"
+        try:
+            written = []
+            for rel, digest in sorted(files.items()):
+                dst = tmp / FILES_DIR / rel
+                dst.parent.mkdir(parents=True, exist_ok=True)
+                if previous is not None and old_files.get(rel) == digest:
+                    src = self.store_dir / previous / FILES_DIR / rel
+                    try:
+                        os.link(src, dst)
+                        continue
+                    except OSError:
+                        if rel not in outputs:
+                            shutil.copy2(src, dst)
+                            written.append(dst)
+                            continue
+                with open(dst, "wb") as f:
+                    outputs[rel].write_to(f)
+                written.append(dst)
+            index = tmp / INDEX_NAME
+            index.write_text(json.dumps(
+                {"version": STORE_VERSION, "files": files}, indent=2, sort_keys=True
+            ) + "\n")
+            written.append(index)
+            if self.fsync:
+                for path in written:
+                    fd = os.open(path, os.O_RDONLY)
+                    try:
+                        os.fsync(fd)
+                    finally:
+                        os.close(fd)
+            os.rename(tmp, self.store_dir / version)
+        finally:
+            if tmp.exists():
+                shutil.rmtree(tmp, ignore_errors=True)
+
+    def _flip(self, version: str) -> None:
+        """Point ``current`` at ``version`` with a single atomic rename."""
+        tmp = self.store_dir / f".{CURRENT_LINK}.{secrets.token_hex(4)}.tmp"
+        os.symlink(version, tmp)
+        try:
+            os.replace(tmp, self.current)
+        except BaseException:
+            tmp.unlink()
+            raise
+        if self.fsync:
+            try:
+                fd = os.open(self.store_dir, os.O_RDONLY)
+            except OSError:
+                return
+            try:
+                os.fsync(fd)
+            except OSError:
+                pass
+            finally:
+                os.close(fd)
+
+    def _prune(self, current: str) -> None:
+        """Delete all but the ``keep`` most recently published versions."""
+        versions = []
+        for entry in os.scandir(self.store_dir):
+            if entry.name.startswith(".") or entry.name == current:
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                versions.append(
+                    (entry.stat(follow_symlinks=False).st_mtime, entry.path)
+                )
+        versions.sort(reverse=True)
+        for _, path in versions[self.keep - 1:]:
+            shutil.rmtree(path, ignore_errors=True)
+            logger.debug(f"Pruned store version {path}")
+
+
+class StoreTransaction:
+    """`OutputTransaction` counterpart that publishes through an `OutputStore`.
+
+    Staging only records outputs. `commit` publishes them to the store as
+    one version and then makes each target a symlink into ``current``;
+    targets that already link there are left alone, so once a repository is
+    linked, later rule updates do not touch it at all.
+    """
+
+    def __init__(self, store: OutputStore, root: Optional[Path] = None):
+        self.store = store
+        self.root = Path(root) if root is not None else Path(".")
+        self._staged: Dict[str, Tuple[Path, RenderedOutput]] = {}
+        self._lock = threading.Lock()
+
+    def stage(self, target: Path, data: Any) -> None:
+        """Queue ``data`` as the content of ``target``; nothing is written yet."""
+        output = data if isinstance(data, RenderedOutput) else RenderedOutput(data)
+        rel = Path(os.path.relpath(target, self.root)).as_posix()
+        if rel.startswith("../"):
+            raise ValueError(f"{target} is outside {self.root}")
+        with self._lock:
+            self._staged[rel] = (Path(target), output)
+
+    def needs_link(self, target: Path, output: RenderedOutput) -> bool:
+        """Store outputs are already shared, so unchanged targets never need staging."""
+        return False
+
+    def __len__(self) -> int:
+        return len(self._staged)
+
+    def rollback(self) -> None:
+        with self._lock:
+            self._staged = {}
+
+    def commit(self) -> None:
+        """Publish staged outputs to the store and link the targets to it."""
+        with self._lock:
+            staged, self._staged = self._staged, {}
+        if not staged:
+            return
+        self.store.publish({rel: output for rel, (_, output) in staged.items()})
+        for rel, (target, _) in sorted(staged.items()):
+            self._link(target, self.store.link_target(rel))
+
+    def _link(self, target: Path, dest: Path) -> None:
+        try:
+            if os.readlink(target) == str(dest):
+                return
+        except OSError:
+            pass
+        tmp = target.with_name(f".{target.name}.{secrets.token_hex(4)}.crules-tmp")
+        os.symlink(dest, tmp)
+        try:
+            os.replace(tmp, target)
+        except BaseException:
+            tmp.unlink()
+            raise
+        logger.info(f"Linked rule file: {target} -> {dest}")
+
+
+def store_profile(config: Dict[str, Any]) -> str:
+    """Name the store profile for the `OUTPUT_SETTINGS` in ``config``.
+
+    Unset keys take their `crules.config.DEFAULT_CONFIG` value, so a
+    partial config and the full default one share a profile.
+    """
+    from .config import DEFAULT_CONFIG
+
+    settings = {}
+    for key in OUTPUT_SETTINGS:
+        value = config.get(key, DEFAULT_CONFIG.get(key))
+        if key.endswith(("_path", "_dir")) and value:
+            value = str(Path(value).expanduser())
+        settings[key] = value
+    digest = hashlib.sha256(json.dumps(settings, sort_keys=True, default=str).encode())
+    return digest.hexdigest()[:16]
+
+
+_stores: Dict[Tuple[str, bool], OutputStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_output_store(config: Dict[str, Any]) -> Optional[OutputStore]:
+    """Return the shared store configured by ``config``, or None if disabled.
+
+    Reads ``output_store`` (bool), ``output_store_dir`` and ``fsync_outputs``.
+    The store lives in the `store_profile` subdirectory of
+    ``output_store_dir``. Instances are shared per directory so concurrent
+    publishers in one process (e.g. ``--fleet``) are serialized.
+    """
+    if not config.get("output_store"):
+        return None
+    root = Path(config.get("output_store_dir") or DEFAULT_STORE_DIR).expanduser()
+    store_dir = str(root / store_profile(config))
+    fsync = bool(config.get("fsync_outputs", True))
+    with _stores_lock:
+        store = _stores.get((store_dir, fsync))
+        if store is None:
+            store = OutputStore(Path(store_dir), fsync=fsync)
+            _stores[(store_dir, fsync)] = store
+        return store
@@ -0,0 +1,149 @@
+"""Registry of output targets and the AI managers that write them.
+
+Built-in targets are declared as data below. Other distributions can add
+targets without forking crules by registering a manager class under the
+``crules.targets`` entry-point group::
+
+    [project.entry-points."crules.targets"]
+    acme = "acme_crules.manager:AcmeManager"
+
+Each target is switched on by an ``enable_<name>`` config key (or
+``--target <name>``). Manager modules are imported only for enabled targets,
+and entry points are only scanned when a non-built-in target is requested.
+"""
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional
+import functools
+import importlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = "crules.targets"
+
+
+class TargetSpec(NamedTuple):
+    """One output target.
+
+    Attributes:
+        name: Target name used by ``--target`` and ``enable_<name>``.
+        manager: ``"module:Class"`` reference to a `BaseAIManager` subclass.
+        default_enabled: Whether the target is on when config does not say.
+    """
+
+    name: str
+    manager: str
+    default_enabled: bool = True
+
+    @property
+    def config_key(self) -> str:
+        return f"enable_{self.name}"
+
+    def load(self) -> type:
+        """Import and return the manager class."""
+        return _load_manager(self.manager)
+
+
+BUILTIN_TARGETS = (
+    TargetSpec("cursor", "crules.ai_managers:CursorManager"),
+    TargetSpec("claude", "crules.ai_managers:ClaudeManager"),
+    TargetSpec("copilot", "crules.ai_managers:CopilotManager"),
+    TargetSpec("cline", "crules.ai_managers:ClineManager"),
+    TargetSpec("roo", "crules.ai_managers:RooManager"),
+    TargetSpec("windsurf", "crules.ai_managers:WindsurfManager"),
+    TargetSpec("aider", "crules.ai_managers:AiderManager"),
+)
+BUILTIN_NAMES = tuple(spec.name for spec in BUILTIN_TARGETS)
+_BUILTIN_BY_NAME = {spec.name: spec for spec in BUILTIN_TARGETS}
+
+
+@functools.lru_cache(maxsize=None)
+def _load_manager(reference: str) -> type:
+    module_name, _, attr = reference.partition(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+@functools.lru_cache(maxsize=1)
+def plugin_targets() -> Dict[str, TargetSpec]:
+    """Return targets registered under the ``crules.targets`` entry-point group.
+
+    Plugin targets are off unless enabled in config or by ``--target``.
+    Entries that reuse a built-in name are ignored.
+    """
+    from importlib.metadata import entry_points
+
+    try:
+        eps = entry_points(group=ENTRY_POINT_GROUP)
+    except TypeError:  # Python 3.9
+        eps = entry_points().get(ENTRY_POINT_GROUP, [])
+
+    specs = {}
+    for ep in eps:
+        if ep.name in _BUILTIN_BY_NAME:
+            logger.warning(f"Ignoring plugin target {ep.name!r}: name is built in")
+            continue
+        specs[ep.name] = TargetSpec(ep.name, ep.value, default_enabled=False)
+    return specs
+
+
+def get_target(name: str) -> Optional[TargetSpec]:
+    """Look up a target by name, consulting entry points only if it is not built in."""
+    spec = _BUILTIN_BY_NAME.get(name)
+    if spec is None:
+        spec = plugin_targets().get(name)
+    return spec
+
+
+def all_targets() -> List[TargetSpec]:
+    """Return built-in targets followed by plugin targets."""
+    return list(BUILTIN_TARGETS) + list(plugin_targets().values())
+
+
+def apply_defaults(config: Dict[str, Any]) -> None:
+    """Fill in ``enable_*`` flags the config does not set, from each built-in spec."""
+    for spec in BUILTIN_TARGETS:
+        config.setdefault(spec.config_key, spec.default_enabled)
+
+
+def select(config: Dict[str, Any], names: List[str]) -> None:
+    """Enable exactly the targets in ``names`` and disable every other one."""
+    wanted = set(names)
+    for key in [k for k in config if k.startswith("enable_")]:
+        config[key] = False
+    for spec in BUILTIN_TARGETS:
+        config[spec.config_key] = spec.name in wanted
+    for name in wanted:
+        config[f"enable_{name}"] = True
+
+
+def enabled_targets(config: Dict[str, Any]) -> List[TargetSpec]:
+    """Return the targets switched on in ``config``, built-ins first.
+
+    Args:
+        config: Configuration dict with ``enable_<name>`` flags.
+
+    Returns:
+        Enabled specs in a stable order; unknown enabled names are logged
+        and skipped.
+    """
+    specs = [spec for spec in BUILTIN_TARGETS if config.get(spec.config_key)]
+    for key, value in config.items():
+        name = key[len("enable_"):]
+        if not key.startswith("enable_") or not value or name in _BUILTIN_BY_NAME:
+            continue
+        spec = plugin_targets().get(name)
+        if spec is None:
+            logger.warning(f"Unknown target enabled in config: {name}")
+            continue
+        specs.append(spec)
+    return specs
+
+
+def create_managers(config: Dict[str, Any], root: Optional[Path] = None) -> list:
+    """Instantiate the manager of every enabled target for ``root``."""
+    managers = []
+    for spec in enabled_targets(config):
+        manager = spec.load()(config, root)
+        manager.target_name = spec.name
+        managers.append(manager)
+    return managers
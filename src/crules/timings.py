@@ -0,0 +1,149 @@
+"""Lightweight per-phase timing spans for ``--timings`` / ``--trace``."""
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+import functools
+import json
+import os
+import threading
+import time
+
+
+class Recorder:
+    """Collects completed spans as ``(name, start_ns, duration_ns, tid, args)``."""
+
+    def __init__(self) -> None:
+        self.origin_ns = time.perf_counter_ns()
+        self.events: List[tuple] = []
+
+    def add(
+        self, name: str, start_ns: int, duration_ns: int, args: Dict[str, Any]
+    ) -> None:
+        # list.append is atomic, so worker threads can record without a lock.
+        self.events.append((name, start_ns, duration_ns, threading.get_ident(), args))
+
+
+class _NullSpan:
+    """Shared no-op span returned while timing is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc: Any) -> bool:
+        return False
+
+
+class _Span:
+    __slots__ = ("recorder", "name", "args", "start_ns")
+
+    def __init__(self, recorder: Recorder, name: str, args: Dict[str, Any]):
+        self.recorder = recorder
+        self.name = name
+        self.args = args
+
+    def __enter__(self) -> "_Span":
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc: Any) -> bool:
+        end_ns = time.perf_counter_ns()
+        self.recorder.add(self.name, self.start_ns, end_ns - self.start_ns, self.args)
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+_active: Optional[Recorder] = None
+
+
+def enable() -> Recorder:
+    """Start recording spans process-wide and return the recorder."""
+    global _active
+    _active = Recorder()
+    return _active
+
+
+def disable() -> Optional[Recorder]:
+    """Stop recording and return the recorder that was active, if any."""
+    global _active
+    recorder, _active = _active, None
+    return recorder
+
+
+def span(name: str, **args: Any):
+    """Context manager timing one phase; a shared no-op when disabled.
+
+    Args:
+        name: Phase name, dotted by area (e.g. ``render.frontmatter`` or
+            ``write.publish``).
+        **args: Extra detail shown in the trace viewer (e.g. ``file=...``).
+    """
+    recorder = _active
+    if recorder is None:
+        return _NULL_SPAN
+    return _Span(recorder, name, args)
+
+
+def timed(name: str) -> Callable:
+    """Decorator form of `span` for timing a whole function."""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            recorder = _active
+            if recorder is None:
+                return func(*args, **kwargs)
+            with _Span(recorder, name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def summarize(recorder: Recorder) -> List[Dict[str, Any]]:
+    """Aggregate spans by name, in order of first occurrence.
+
+    Durations are inclusive: a span's total includes any spans nested in it.
+    """
+    rows: Dict[str, Dict[str, Any]] = {}
+    for name, start_ns, duration_ns, _tid, _args in sorted(
+        recorder.events, key=lambda e: e[1]
+    ):
+        row = rows.setdefault(
+            name, {"name": name, "count": 0, "total_ms": 0.0, "max_ms": 0.0}
+        )
+        ms = duration_ns / 1e6
+        row["count"] += 1
+        row["total_ms"] += ms
+        row["max_ms"] = max(row["max_ms"], ms)
+    return list(rows.values())
+
+
+def format_summary(recorder: Recorder) -> str:
+    """Render the `summarize` rows as a fixed-width table."""
+    rows = summarize(recorder)
+    width = max([len("phase")] + [len(r["name"]) for r in rows])
+    lines = [f"{'phase':<{width}} {'count':>6} {'total ms':>10} {'max ms':>10}"]
+    for row in rows:
+        lines.append(
+            f"{row['name']:<{width}} {row['count']:>6} "
+            f"{row['total_ms']:>10.2f} {row['max_ms']:>10.2f}"
+        )
+    return "\n".join(lines)
+
+
+def write_chrome_trace(recorder: Recorder, path: Path) -> None:
+    """Write spans in Chrome trace-event format (chrome://tracing, Perfetto)."""
+    pid = os.getpid()
+    events = [
+        {
+            "name": name,
+            "cat": name.split(".", 1)[0],
+            "ph": "X",
+            "ts": (start_ns - recorder.origin_ns) / 1e3,
+            "dur": duration_ns / 1e3,
+            "pid": pid,
+            "tid": tid,
+            "args": {k: str(v) for k, v in args.items()},
+        }
+        for name, start_ns, duration_ns, tid, args in recorder.events
+    ]
+    Path(path).write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}))
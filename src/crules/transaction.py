@@ -0,0 +1,238 @@
+"""All-or-nothing publishing of generated rule files."""
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple, Union
+import logging
+import os
+import secrets
+import shutil
+import threading
+
+from .manifest import OutputManifest
+from .render import RenderedOutput
+
+logger = logging.getLogger(__name__)
+
+TMP_SUFFIX = ".crules-tmp"
+
+# Linux FICLONE ioctl: share extents with another file on btrfs, XFS, bcachefs...
+_FICLONE = 0x40049409
+
+
+def _discard(paths: List[Path]) -> None:
+    for path in paths:
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+
+def _backup(target: Path) -> Path:
+    """Preserve ``target`` under a sibling name, by hardlink where possible."""
+    backup = target.with_name(f".{target.name}.{secrets.token_hex(4)}.crules-bak")
+    try:
+        os.link(target, backup)
+    except OSError:
+        shutil.copy2(target, backup)
+    return backup
+
+
+def _reflink(src: Path, dst: Path) -> bool:
+    """Create ``dst`` as a copy-on-write clone of ``src`` if the filesystem allows."""
+    try:
+        import fcntl
+    except ImportError:  # Windows
+        return False
+    try:
+        with open(src, "rb") as s:
+            fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+            try:
+                fcntl.ioctl(fd, _FICLONE, s.fileno())
+            except OSError:
+                os.close(fd)
+                _discard([dst])
+                return False
+            os.close(fd)
+        return True
+    except OSError:
+        return False
+
+
+def _clone(src: Path, dst: Path) -> Optional[str]:
+    """Materialize ``dst`` from ``src`` by hardlink, else reflink; None if neither."""
+    try:
+        os.link(src, dst)
+        return "hardlink"
+    except OSError:
+        pass
+    if _reflink(src, dst):
+        return "reflink"
+    return None
+
+
+class OutputTransaction:
+    """Stage outputs as temp files beside their targets, then publish together.
+
+    Nothing a reader can see changes until `commit`, which flushes every
+    staged file, renames each over its target with ``os.replace`` (so no
+    reader ever observes a partially written file) and finally flushes each
+    touched directory once. If staging or publishing fails, temp files are
+    removed and already-published targets are restored from hardlinked
+    backups, leaving the previous set of outputs in place.
+
+    With ``dedupe``, an output whose bytes match one already staged (e.g. the
+    Cline, Roo, Windsurf and Aider copies of a rule) is not written again:
+    its temp file is a hardlink to the first copy, or a reflink where
+    hardlinks are not possible, and only falls back to a plain write when
+    neither works. Unchanged outputs take part through `needs_link`.
+    """
+
+    def __init__(
+        self,
+        manifest: Optional[OutputManifest] = None,
+        fsync: bool = True,
+        dedupe: bool = False,
+    ):
+        self.manifest = manifest
+        self.fsync = fsync
+        self.dedupe = dedupe
+        self._staged: List[Tuple[Path, Path, RenderedOutput]] = []
+        self._canonical: Dict[str, Path] = {}
+        self._lock = threading.Lock()
+
+    def _temp_path(self, target: Path) -> Path:
+        return target.with_name(f".{target.name}.{secrets.token_hex(4)}{TMP_SUFFIX}")
+
+    def stage(self, target: Path, data: Union[bytes, RenderedOutput]) -> None:
+        """Write ``data`` to a temp file next to ``target`` without publishing it.
+
+        A `RenderedOutput` is streamed into the temp file, so large bodies
+        are copied in chunks rather than materialized.
+        """
+        output = data if isinstance(data, RenderedOutput) else RenderedOutput(data)
+        tmp = self._temp_path(target)
+        if self.dedupe:
+            with self._lock:
+                canonical = self._canonical.get(output.digest())
+            method = _clone(canonical, tmp) if canonical is not None else None
+            if method is not None:
+                with self._lock:
+                    self._staged.append((target, tmp, output))
+                logger.debug(f"Staged rule file: {target} ({method} of {canonical})")
+                return
+
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                output.write_to(f)
+            if target.exists():
+                shutil.copymode(target, tmp)
+        except BaseException:
+            _discard([tmp])
+            raise
+        with self._lock:
+            self._staged.append((target, tmp, output))
+            if self.dedupe:
+                self._canonical.setdefault(output.digest(), tmp)
+        logger.debug(f"Staged rule file: {target}")
+
+    def needs_link(self, target: Path, output: RenderedOutput) -> bool:
+        """Return True if unchanged ``target`` should be staged to share a copy.
+
+        Without ``dedupe`` this is always False. Otherwise the first unchanged
+        target with a given digest becomes the copy later outputs link to,
+        and a target that does not already share that copy's inode needs
+        staging, so turning ``dedupe`` on links existing outputs too. Targets
+        the manifest records as published with ``dedupe`` are left alone, so
+        filesystems without links are not rewritten on every run.
+        """
+        if not self.dedupe:
+            return False
+        with self._lock:
+            canonical = self._canonical.setdefault(output.digest(), target)
+        if canonical == target:
+            return False
+        if self.manifest is not None and self.manifest.is_deduped(target):
+            return False
+        try:
+            return not os.path.samefile(canonical, target)
+        except OSError:
+            return True
+
+    def __len__(self) -> int:
+        return len(self._staged)
+
+    def rollback(self) -> None:
+        """Discard every staged file without touching the targets."""
+        with self._lock:
+            staged, self._staged = self._staged, []
+            self._canonical.clear()
+        _discard([tmp for _, tmp, _ in staged])
+        if staged:
+            logger.info(f"Rolled back {len(staged)} staged rule files")
+
+    def _sync_files(self, paths: List[Path]) -> None:
+        for path in paths:
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def _sync_dirs(self, dirs: Set[Path]) -> None:
+        for directory in dirs:
+            try:
+                fd = os.open(directory, os.O_RDONLY)
+            except OSError:
+                continue  # e.g. Windows cannot open directories
+            try:
+                os.fsync(fd)
+            except OSError:
+                pass
+            finally:
+                os.close(fd)
+
+    def commit(self) -> None:
+        """Publish all staged files, or restore the previous outputs on failure."""
+        with self._lock:
+            # Publish in path order so logs do not depend on staging order.
+            staged, self._staged = sorted(self._staged, key=lambda s: str(s[0])), []
+            self._canonical.clear()
+        if not staged:
+            return
+
+        if self.fsync:
+            try:
+                self._sync_files([tmp for _, tmp, _ in staged])
+            except BaseException:
+                _discard([tmp for _, tmp, _ in staged])
+                raise
+
+        backups: List[Tuple[Path, Optional[Path]]] = []
+        try:
+            for target, tmp, _ in staged:
+                backup = None
+                if target.exists():
+                    backup = _backup(target)
+                backups.append((target, backup))
+                os.replace(tmp, target)
+        except BaseException:
+            logger.error("Publishing rule files failed; restoring previous outputs")
+            for target, backup in reversed(backups):
+                try:
+                    if backup is not None:
+                        os.replace(backup, target)
+                    elif target.exists():
+                        target.unlink()
+                except OSError as e:
+                    logger.error(f"Could not restore {target}: {e}")
+            _discard([tmp for _, tmp, _ in staged])
+            raise
+
+        _discard([backup for _, backup in backups if backup is not None])
+        if self.fsync:
+            self._sync_dirs({target.parent for target, _, _ in staged})
+
+        for target, _, output in staged:
+            if self.manifest is not None:
+                self.manifest.record(target, output, deduped=self.dedupe)
+            logger.info(f"Created rule file: {target}")
@@ -0,0 +1,298 @@
+"""Watch rule sources and recompile only the outputs that depend on them."""
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import ctypes
+import ctypes.util
+import fnmatch
+import logging
+import os
+import select
+import shutil
+import struct
+import sys
+import threading
+import time
+
+from . import file_ops
+from .fragments import get_fragment_resolver
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 1.0
+DEBOUNCE = 0.2
+
+# inotify(7) event bits; the file is complete once it is closed or renamed in.
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class PollingWatcher:
+    """Portable watcher that compares ``(mtime, size)`` of matching files."""
+
+    def __init__(
+        self, watches: List[Tuple[Path, str]], interval: float = POLL_INTERVAL
+    ):
+        self.watches = watches
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self) -> Dict[Path, Tuple[int, int]]:
+        snapshot = {}
+        for directory, pattern in self.watches:
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                if not fnmatch.fnmatch(entry.name, pattern):
+                    continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                snapshot[Path(entry.path)] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def wait(self, timeout: Optional[float] = None) -> Set[Path]:
+        """Block up to ``timeout`` seconds and return files that changed."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            current = self._scan()
+            changed = {
+                path for path, sig in current.items() if self._snapshot.get(path) != sig
+            }
+            self._snapshot = current
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            time.sleep(self.interval)
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """Linux inotify watcher over the directories holding rule sources."""
+
+    def __init__(self, watches: List[Tuple[Path, str]]):
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self._dirs: Dict[int, Tuple[Path, List[str]]] = {}
+        by_dir: Dict[Path, List[str]] = {}
+        for directory, pattern in watches:
+            by_dir.setdefault(directory, []).append(pattern)
+        for directory, patterns in by_dir.items():
+            if not directory.is_dir():
+                continue
+            wd = self._libc.inotify_add_watch(
+                self._fd, os.fsencode(directory), IN_CLOSE_WRITE | IN_MOVED_TO
+            )
+            if wd < 0:
+                self.close()
+                raise OSError(
+                    ctypes.get_errno(), f"inotify_add_watch failed for {directory}"
+                )
+            self._dirs[wd] = (directory, patterns)
+
+    def _read(self) -> Set[Path]:
+        changed = set()
+        buf = os.read(self._fd, 64 * 1024)
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(buf):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(buf, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(buf[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped; report every watched file as changed.
+                for directory, patterns in self._dirs.values():
+                    for pattern in patterns:
+                        changed.update(directory.glob(pattern))
+                continue
+            watched = self._dirs.get(wd)
+            if watched and any(fnmatch.fnmatch(name, p) for p in watched[1]):
+                changed.add(watched[0] / name)
+        return changed
+
+    def wait(self, timeout: Optional[float] = None) -> Set[Path]:
+        """Block up to ``timeout`` seconds and return files that changed."""
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed = self._read()
+        # Editors often save in several steps; coalesce them into one rebuild.
+        while select.select([self._fd], [], [], DEBOUNCE)[0]:
+            changed |= self._read()
+        return changed
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def make_watcher(watches: List[Tuple[Path, str]], use_inotify: bool = True):
+    """Return an inotify watcher where available, else a polling watcher."""
+    if use_inotify and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(watches)
+        except (OSError, AttributeError) as e:
+            logger.debug(f"inotify unavailable, falling back to polling: {e}")
+    return PollingWatcher(watches)
+
+
+def plan_rebuild(
+    changed: Iterable[Path],
+    global_rules: Path,
+    lang_rules_dir: Path,
+    workflows_dir: Path,
+    languages: List[str],
+    resolver: Optional[Any] = None,
+) -> Tuple[bool, List[str], List[Path]]:
+    """Map changed source files to the outputs that depend on them.
+
+    With ``resolver`` (a `crules.fragments.FragmentResolver`), an edited
+    fragment rebuilds the sources whose ``@include`` graph contains it.
+
+    Returns:
+        ``(rebuild_global, languages_to_rebuild, workflow_files_to_sync)``.
+        Language files that were not requested on the command line and
+        unrelated files are ignored.
+    """
+    rebuild_global = False
+    langs: List[str] = []
+    workflows: List[Path] = []
+    fragments: List[Path] = []
+    global_rules = global_rules.resolve()
+    lang_rules_dir = lang_rules_dir.resolve()
+    workflows_dir = workflows_dir.resolve()
+    fragments_dir = resolver.fragments_dir.resolve() if resolver is not None else None
+
+    for path in sorted(set(changed)):
+        resolved = path.resolve()
+        if resolved == global_rules:
+            rebuild_global = True
+        elif resolved.parent == lang_rules_dir and resolved.name.startswith("cursor."):
+            lang = resolved.name[len("cursor."):]
+            if lang in languages and lang not in langs:
+                langs.append(lang)
+        elif resolved.parent == workflows_dir and resolved.suffix == ".md":
+            workflows.append(path)
+        elif fragments_dir is not None and fragments_dir in resolved.parents:
+            fragments.append(resolved)
+
+    if fragments:
+        for name in resolver.dependents(fragments, ["global", *languages]):
+            if name == "global":
+                rebuild_global = True
+            elif name not in langs:
+                langs.append(name)
+    return rebuild_global, langs, workflows
+
+
+def rebuild(
+    config: Dict[str, Any],
+    changed: Iterable[Path],
+    languages: List[str],
+    root: Optional[Path] = None,
+) -> bool:
+    """Recompile only the outputs affected by ``changed`` source files."""
+    root = Path(root) if root is not None else Path(".")
+    global_rules = Path(config["global_rules_path"]).expanduser()
+    lang_rules_dir = Path(config["language_rules_dir"]).expanduser()
+    workflows_dir = Path("~/.config/crules/workflows").expanduser()
+    resolver = get_fragment_resolver(config.get("fragments_dir"))
+
+    rebuild_global, langs, workflows = plan_rebuild(
+        changed, global_rules, lang_rules_dir, workflows_dir, languages, resolver
+    )
+
+    modes_dir = root / ".crules" / "modes"
+    if workflows and modes_dir.is_dir():
+        for md_file in workflows:
+            if md_file.exists():
+                shutil.copy2(md_file, modes_dir / md_file.name)
+                logger.info(f"Synced {md_file.name} -> {modes_dir}")
+
+    if not (rebuild_global or langs):
+        return True
+
+    dedupe = bool(config.get("dedupe_paragraphs", False))
+    if config.get("token_budgets"):
+        # Budgets count the global rules loaded alongside every language, so
+        # check the whole set like a full deploy; unchanged files are skipped.
+        rebuild_global, langs = True, list(languages)
+    elif rebuild_global and dedupe:
+        # Deduped language outputs depend on the global paragraphs too.
+        langs = list(languages)
+    try:
+        sources = file_ops.load_rule_sources(
+            global_rules,
+            lang_rules_dir,
+            langs,
+            include_global=rebuild_global,
+            dedupe=dedupe,
+            fragments_dir=resolver.fragments_dir,
+        )
+    except ValueError as e:  # IncludeError, or a source that is not UTF-8
+        logger.error(f"Failed to load changed rule sources: {e}")
+        return False
+    names = ", ".join(name for name, _, _ in sources)
+    logger.info(f"Recompiling {names}")
+    return file_ops.deploy_rules(config, sources, root=root)
+
+
+def watch_rules(
+    config: Dict[str, Any],
+    languages: List[str],
+    root: Optional[Path] = None,
+    stop: Optional[threading.Event] = None,
+    use_inotify: bool = True,
+) -> None:
+    """Watch global, language, fragment and workflow sources until interrupted.
+
+    Args:
+        config: Configuration dict with ``enable_*`` flags already resolved.
+        languages: Languages whose outputs are kept up to date.
+        root: Repository to write into. Defaults to the current directory.
+        stop: Optional event that ends the loop when set.
+        use_inotify: Prefer inotify over polling when available.
+    """
+    global_rules = Path(config["global_rules_path"]).expanduser()
+    lang_rules_dir = Path(config["language_rules_dir"]).expanduser()
+    workflows_dir = Path("~/.config/crules/workflows").expanduser()
+    fragments_dir = get_fragment_resolver(config.get("fragments_dir")).fragments_dir
+    watches = [
+        (global_rules.parent, global_rules.name),
+        (lang_rules_dir, "cursor.*"),
+        (workflows_dir, "*.md"),
+    ]
+    # Watches are per directory, so cover fragment subdirectories that exist now.
+    if fragments_dir.is_dir():
+        watches += [(Path(d), "*") for d, _, _ in os.walk(fragments_dir)]
+
+    watcher = make_watcher(watches, use_inotify)
+    logger.info(f"Watching rule sources with {type(watcher).__name__} (Ctrl+C to stop)")
+    try:
+        while stop is None or not stop.is_set():
+            changed = watcher.wait(timeout=POLL_INTERVAL)
+            if not changed:
+                continue
+            try:
+                ok = rebuild(config, changed, languages, root)
+            except (OSError, ValueError) as e:
+                logger.error(f"Failed to read changed rule sources: {e}")
+                ok = False
+            if not ok:
+                logger.error("Recompile failed; waiting for the next change")
+    except KeyboardInterrupt:
+        logger.info("Stopped watching")
+    finally:
+        watcher.close()
@@ -0,0 +1,80 @@
+"""Shared fixtures for crules tests."""
+from importlib import resources
+import pytest
+from crules import targets
+
+
+@pytest.fixture
+def all_targets():
+    """Config flags enabling every built-in target."""
+    return {f"enable_{name}": True for name in targets.BUILTIN_NAMES}
+
+
+@pytest.fixture
+def make_rules_env(tmp_path, monkeypatch, all_targets):
+    """Build a rules directory in ``tmp_path`` and chdir into it.
+
+    The returned factory writes ``cursorrules`` and ``cursor.<lang>`` files and
+    returns ``(tmp_path, cfg, global_rules)``. ``cfg`` enables every built-in
+    target unless ``enable`` names a subset; extra keyword arguments are
+    added to it.
+    """
+    def make(
+        global_text="# Global rules content\n", languages=None, enable=None, **settings
+    ):
+        monkeypatch.chdir(tmp_path)
+        global_rules = tmp_path / "cursorrules"
+        global_rules.write_text(global_text)
+        for lang, text in (languages or {}).items():
+            (tmp_path / f"cursor.{lang}").write_text(text)
+        if enable is None:
+            cfg = dict(all_targets)
+        else:
+            cfg = {f"enable_{name}": True for name in enable}
+        cfg.update(
+            global_rules_path=str(global_rules),
+            language_rules_dir=str(tmp_path),
+            **settings,
+        )
+        return tmp_path, cfg, global_rules
+
+    return make
+
+
+@pytest.fixture
+def rules_env(make_rules_env):
+    return make_rules_env()
+
+
+@pytest.fixture
+def fleet_env(tmp_path, monkeypatch, all_targets):
+    """Fake HOME with global config plus three empty repositories."""
+    fake_home = tmp_path / "fakehome"
+    monkeypatch.setenv("HOME", str(fake_home))
+    monkeypatch.chdir(tmp_path)
+
+    config_base = fake_home / ".config" / "crules"
+    lang_rules_dir = config_base / "lang_rules"
+    workflows_dir = config_base / "workflows"
+    for d in (lang_rules_dir, workflows_dir):
+        d.mkdir(parents=True)
+    (config_base / "cursorrules").write_text("# Global rules content\n")
+    (lang_rules_dir / "cursor.python").write_text("# Python rules\n")
+
+    with resources.as_file(resources.files("crules.rules.workflows")) as wf_src:
+        for md in wf_src.glob("*.md"):
+            (workflows_dir / md.name).write_text(md.read_text())
+
+    repos = []
+    for name in ("alpha", "beta", "gamma"):
+        repo = tmp_path / "repos" / name
+        repo.mkdir(parents=True)
+        repos.append(repo)
+
+    cfg = {
+        "global_rules_path": str(config_base / "cursorrules"),
+        "language_rules_dir": str(lang_rules_dir),
+        "file_extension": ".mdc",
+        **all_targets,
+    }
+    return tmp_path, repos, cfg
@@ -434,6 +434,51 @@ class TestAiderManager:
         assert "docs/README.md" in text
         assert "  - .aider/rules/global.md" in text
 
+    def test_aider_conf_batched_run_edits_once(
+        self, test_config, chdir_tmp, monkeypatch
+    ):
+        manager = AiderManager(test_config)
+        manager.ensure_structure()
+        manager.batched = True
+        writes = []
+        real_write_text = Path.write_text
+
+        def counting_write_text(self, *args, **kwargs):
+            if self.name == ".aider.conf.yml":
+                writes.append(self)
+            return real_write_text(self, *args, **kwargs)
+
+        monkeypatch.setattr(Path, "write_text", counting_write_text)
+        for lang in ("global", "python", "bash", "lua"):
+            assert manager.create_rule_file(lang, "body", ["*"])
+        assert not (chdir_tmp / ".aider.conf.yml").exists()
+        manager.finalize()
+
+        assert len(writes) == 1
+        text = (chdir_tmp / ".aider.conf.yml").read_text()
+        for lang in ("global", "python", "bash", "lua"):
+            assert text.count(f"  - .aider/rules/{lang}.md\n") == 1
+
+    def test_aider_conf_prunes_stale_rules(self, test_config, chdir_tmp):
+        conf = chdir_tmp / ".aider.conf.yml"
+        conf.write_text(
+            "read:\n"
+            "  - docs/README.md  # keep\n"
+            "  - .aider/rules/cobol.md\n"
+            "  - '.aider/rules/python.md'\n"
+            "model: gpt-4\n"
+        )
+        manager = AiderManager(test_config)
+        manager.ensure_structure()
+        assert manager.create_rule_file("python", "body", ["*.py"])
+
+        assert conf.read_text() == (
+            "read:\n"
+            "  - docs/README.md  # keep\n"
+            "  - '.aider/rules/python.md'\n"
+            "model: gpt-4\n"
+        )
+
 
 # --------------- Universal preamble ---------------
 
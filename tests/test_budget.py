@@ -0,0 +1,139 @@
+"""Tests for budget module."""
+import pytest
+from crules import file_ops, watch
+from crules.budget import BudgetLedger, check_budgets, estimate_tokens, format_report
+from crules.render import UNIVERSAL_PREAMBLE
+
+
+@pytest.fixture
+def budget_env(make_rules_env):
+    return make_rules_env(
+        "# Global\n" + "g" * 400 + "\n",
+        {"python": "# Python\n" + "p" * 800 + "\n", "go": "# Go\n"},
+        enable=("cursor", "claude"),
+    )
+
+
+def test_estimate_tokens_rounds_up():
+    assert estimate_tokens(0) == 0
+    assert estimate_tokens(1) == 1
+    assert estimate_tokens(8) == 2
+    assert estimate_tokens(9) == 3
+
+
+class TestLedger:
+    def test_report_adds_global_to_each_file_type(self):
+        ledger = BudgetLedger({"global": ["*"], "python": ["*.python"]})
+        ledger.record("cursor", "global", "g.mdc", 400)
+        ledger.record("cursor", "python", "p.mdc", 200)
+
+        report = ledger.report()
+
+        entry = report["targets"]["cursor"]
+        assert entry["total_tokens"] == 150
+        assert entry["file_types"] == {"*.python": 150}
+        assert entry["peak_tokens"] == 150
+        assert report["total_tokens"] == 150
+
+    def test_global_only_is_loaded_for_every_file(self):
+        ledger = BudgetLedger()
+        ledger.record("claude", "global", "g.md", 40)
+
+        assert ledger.report()["targets"]["claude"]["file_types"] == {"*": 10}
+
+    def test_check_budgets_uses_target_then_wildcard(self):
+        ledger = BudgetLedger({"python": ["*.python"]})
+        for target in ("cursor", "claude"):
+            ledger.record(target, "global", "g", 400)
+            ledger.record(target, "python", "p", 400)
+        report = ledger.report()
+
+        assert check_budgets(report, {"*": 200}) == []
+        problems = check_budgets(report, {"*": 1000, "claude": 150})
+        assert len(problems) == 1
+        assert problems[0].startswith("claude: ~200 tokens loaded for *.python")
+        assert "[OVER BUDGET]" in format_report(report, {"claude": 150})
+
+
+class TestDeploy:
+    def test_ledger_records_every_output(self, budget_env):
+        root, cfg, global_rules = budget_env
+        ledger = BudgetLedger()
+
+        assert file_ops.write_rules_to_ai_dirs(
+            cfg, global_rules, root, ["python", "go"], ledger=ledger
+        )
+
+        report = ledger.report()
+        assert set(report["targets"]) == {"cursor", "claude"}
+        cursor = report["targets"]["cursor"]
+        assert {o["source"] for o in cursor["outputs"]} == {"global", "python", "go"}
+        size = (root / ".cursor/rules/python.mdc").stat().st_size
+        assert {o["source"]: o["bytes"] for o in cursor["outputs"]}["python"] == size
+        assert set(cursor["file_types"]) == {"*.python", "*.go"}
+        assert cursor["peak_tokens"] == cursor["file_types"]["*.python"]
+
+    def test_exceeded_budget_fails_without_writing(self, budget_env):
+        root, cfg, global_rules = budget_env
+        cfg["token_budgets"] = {"claude": 100}
+
+        assert not file_ops.write_rules_to_ai_dirs(cfg, global_rules, root, ["python"])
+
+        assert not (root / ".cursor").exists() or not any(
+            (root / ".cursor/rules").iterdir()
+        )
+        assert not (root / ".claude/rules/python.md").exists()
+
+    def test_budget_within_limit_writes(self, budget_env):
+        root, cfg, global_rules = budget_env
+        cfg["token_budgets"] = {"*": 100_000}
+
+        assert file_ops.write_rules_to_ai_dirs(cfg, global_rules, root, ["python"])
+
+        assert (root / ".claude/rules/python.md").exists()
+
+    def test_preamble_once_keeps_preamble_in_global_only(self, budget_env):
+        root, cfg, global_rules = budget_env
+        cfg["preamble_once"] = True
+        preamble = UNIVERSAL_PREAMBLE.decode()
+
+        assert file_ops.write_rules_to_ai_dirs(cfg, global_rules, root, ["python"])
+
+        for rules in (root / ".cursor/rules", root / ".claude/rules"):
+            assert preamble in next(rules.glob("global.*")).read_text()
+            python = next(rules.glob("python.*")).read_text()
+            assert preamble not in python
+            assert "# Python" in python
+
+    def test_preamble_once_reduces_language_tokens(self, budget_env):
+        root, cfg, global_rules = budget_env
+        every, once = BudgetLedger(), BudgetLedger()
+
+        assert file_ops.write_rules_to_ai_dirs(
+            cfg, global_rules, root, ["python"], ledger=every
+        )
+        cfg["preamble_once"] = True
+        assert file_ops.write_rules_to_ai_dirs(
+            cfg, global_rules, root, ["python"], ledger=once
+        )
+
+        saved = estimate_tokens(len(UNIVERSAL_PREAMBLE))
+        before = every.report()["targets"]["claude"]["file_types"]["*.python"]
+        after = once.report()["targets"]["claude"]["file_types"]["*.python"]
+        assert before - after in (saved - 1, saved, saved + 1)
+
+    def test_watch_rebuild_counts_global_rules(self, budget_env):
+        root, cfg, global_rules = budget_env
+        full = BudgetLedger()
+        assert file_ops.write_rules_to_ai_dirs(
+            cfg, global_rules, root, ["python"], ledger=full
+        )
+        peak = full.report()["targets"]["claude"]["peak_tokens"]
+        # The python output alone fits; python plus the global rules does not.
+        cfg["token_budgets"] = {"*": peak - 20}
+
+        python = root / "cursor.python"
+        python.write_text(python.read_text().replace("p", "q"))
+
+        assert not watch.rebuild(cfg, [python], ["python"], root=root)
+        assert "q" * 800 not in (root / ".claude/rules/python.md").read_text()
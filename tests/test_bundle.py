@@ -0,0 +1,72 @@
+"""Tests for bundle module."""
+from pathlib import Path
+import pytest
+import crules
+from crules import bundle, file_ops
+from crules.bundle import ResourceBundle, build_bundle, collect_members, load_bundle
+
+RULES_DIR = Path(crules.__file__).parent / "rules"
+
+
+def test_packaged_bundle_is_current():
+    """Run ``python -m crules.bundle`` after editing packaged rules."""
+    assert (RULES_DIR / bundle.BUNDLE_NAME).read_bytes() == build_bundle(
+        collect_members(RULES_DIR)
+    )
+
+
+def test_wheel_ships_members_only_in_the_bundle():
+    tomllib = pytest.importorskip("tomllib")
+    project = tomllib.loads((RULES_DIR.parents[2] / "pyproject.toml").read_text())
+    wheel = project["tool"]["hatch"]["build"]["targets"]["wheel"]
+
+    assert sorted(wheel["exclude"]) == sorted(
+        f"src/crules/rules/{pattern}" for pattern in bundle.MEMBER_PATTERNS
+    )
+    assert wheel["hooks"]["custom"]["path"] == "hatch_build.py"
+    assert "package-data" not in project["tool"].get("setuptools", {})
+
+
+def test_rebuilt_bundle_matches_committed_file(tmp_path):
+    """The build hook's `write_bundle` reproduces the committed bundle byte for byte."""
+    rebuilt = bundle.write_bundle(RULES_DIR, tmp_path / bundle.BUNDLE_NAME)
+
+    assert rebuilt.read_bytes() == (RULES_DIR / bundle.BUNDLE_NAME).read_bytes()
+
+
+def test_members_round_trip(tmp_path):
+    path = tmp_path / "test.bundle"
+    path.write_bytes(
+        build_bundle({"b.md": b"beta\r\n", "a.md": b"", "workflows/c.md": b"gamma"})
+    )
+    loaded = ResourceBundle.from_path(path)
+
+    assert loaded.names() == ["a.md", "b.md", "workflows/c.md"]
+    assert loaded.names("workflows/*") == ["workflows/c.md"]
+    assert loaded.read("b.md") == b"beta\r\n"
+    assert loaded.read("a.md") == b""
+    with pytest.raises(KeyError):
+        loaded.read("missing.md")
+
+
+def test_corrupt_member_is_rejected(tmp_path):
+    path = tmp_path / "test.bundle"
+    path.write_bytes(build_bundle({"a.md": b"alpha"}).replace(b"alpha", b"alphx"))
+
+    with pytest.raises(ValueError):
+        ResourceBundle.from_path(path).read("a.md")
+
+
+def test_setup_copies_members_as_raw_bytes(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    assert file_ops.setup_directory_structure()
+
+    base = tmp_path / ".config/crules"
+    for name in load_bundle().names():
+        if name.startswith("workflows/"):
+            dest = base / name
+        elif name == "default_cursorrules":
+            dest = base / "cursorrules"
+        else:
+            dest = base / "lang_rules" / name
+        assert dest.read_bytes() == (RULES_DIR / name).read_bytes(), name
@@ -0,0 +1,127 @@
+"""Tests for detect module."""
+import os
+import pytest
+from click.testing import CliRunner
+from crules import cli, detect
+from crules.detect import (
+    detect_languages,
+    is_ignored,
+    parse_ignore_file,
+    scan_extensions,
+)
+
+
+def _touch(path, text=""):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    root = tmp_path / "repo"
+    _touch(root / ".gitignore", "node_modules/\n*.log\n/build\n!keep.log\n")
+    _touch(root / "src/app.py")
+    _touch(root / "src/util.py")
+    _touch(root / "src/deep/x/y.PY")
+    _touch(root / "scripts/run.sh")
+    _touch(root / "node_modules/pkg/index.js")
+    _touch(root / "debug.log")
+    _touch(root / "keep.log")
+    _touch(root / "build/gen.js")
+    _touch(root / "docs/build/page.js")
+    _touch(root / "web/.gitignore", "*.min.js\n")
+    _touch(root / "web/main.js")
+    _touch(root / "web/vendor.min.js")
+    _touch(root / ".git/objects/ab.py")
+    return root
+
+
+def _scan(root, tmp_path):
+    return scan_extensions(root, cache_dir=tmp_path / "cache", workers=4)
+
+
+class TestIgnoreRules:
+    def test_pattern_forms(self, tmp_path):
+        ignore = tmp_path / ".gitignore"
+        ignore.write_text(
+            "# comment\n*.pyc\n/dist\nlogs/\ndocs/**/*.tmp\n!important.pyc\n"
+        )
+        stack = (("", tuple(parse_ignore_file(ignore))),)
+
+        assert is_ignored(stack, "a/b/c.pyc", False)
+        assert not is_ignored(stack, "a/important.pyc", False)
+        assert is_ignored(stack, "dist", True)
+        assert not is_ignored(stack, "src/dist", True)
+        assert is_ignored(stack, "src/logs", True)
+        assert not is_ignored(stack, "src/logs", False)
+        assert is_ignored(stack, "docs/a/b/x.tmp", False)
+        assert is_ignored(stack, "docs/x.tmp", False)
+        assert not is_ignored(stack, "x.tmp", False)
+
+
+class TestScanExtensions:
+    def test_histogram_honors_gitignore(self, repo, tmp_path):
+        assert _scan(repo, tmp_path) == {"py": 3, "sh": 1, "log": 1, "js": 2}
+
+    def test_repeat_scan_lists_nothing(self, repo, tmp_path, monkeypatch):
+        first = _scan(repo, tmp_path)
+        listed = []
+        real_scandir = os.scandir
+
+        def counting_scandir(path):
+            listed.append(path)
+            return real_scandir(path)
+
+        monkeypatch.setattr(detect.os, "scandir", counting_scandir)
+        assert _scan(repo, tmp_path) == first
+        assert listed == []
+
+    def test_new_file_invalidates_its_directory(self, repo, tmp_path):
+        _scan(repo, tmp_path)
+        _touch(repo / "src/deep/x/z.lua")
+
+        assert _scan(repo, tmp_path)["lua"] == 1
+
+    def test_gitignore_edit_rescans_subtree(self, repo, tmp_path):
+        _scan(repo, tmp_path)
+        (repo / ".gitignore").write_text("node_modules/\n/build\nsrc/deep/\n")
+        os.utime(repo / ".gitignore", ns=(1, 1))
+
+        histogram = _scan(repo, tmp_path)
+
+        assert histogram["py"] == 2
+        assert histogram["log"] == 2
+
+    def test_truncated_scan_is_not_cached(self, repo, tmp_path):
+        scan_extensions(repo, cache_dir=tmp_path / "cache", max_files=0)
+
+        assert not (tmp_path / "cache").exists() or not any(
+            (tmp_path / "cache").iterdir()
+        )
+
+
+def test_detect_languages_matches_available_rules():
+    histogram = {"py": 10, "pyi": 2, "sh": 3, "ts": 50, "lua": 1, "md": 40}
+
+    found = detect_languages(histogram, ["python", "bash", "lua", "java"])
+
+    assert found == [("python", 12), ("bash", 3), ("lua", 1)]
+    assert detect_languages(histogram, ["python", "bash"], min_files=5) == [
+        ("python", 12)
+    ]
+
+
+def test_cli_auto_compiles_detected_languages(repo, tmp_path, monkeypatch):
+    home = tmp_path / "home"
+    monkeypatch.setenv("HOME", str(home))
+    monkeypatch.chdir(repo)
+    lang_rules = home / ".config/crules/lang_rules"
+    _touch(home / ".config/crules/cursorrules", "# Global\n")
+    for lang in ("python", "bash", "java"):
+        _touch(lang_rules / f"cursor.{lang}", f"# {lang} rules\n")
+
+    result = CliRunner().invoke(cli.main, ["--auto", "-t", "cursor"])
+
+    assert result.exit_code == 0, result.output
+    created = sorted(p.name for p in (repo / ".cursor/rules").iterdir())
+    assert created == ["bash.mdc", "global.mdc", "python.mdc"]
@@ -0,0 +1,57 @@
+"""Tests for fleet module."""
+from crules import fleet
+
+
+class TestReadFleetPaths:
+    def test_mixes_directories_and_list_files(self, fleet_env):
+        tmp_path, repos, _ = fleet_env
+        listing = tmp_path / "repos.txt"
+        listing.write_text(
+            "# fleet\n"
+            "repos/beta\n"
+            "\n"
+            f"{repos[2]}  # absolute\n"
+            "repos/alpha\n"
+        )
+
+        paths = fleet.read_fleet_paths([str(repos[0]), str(listing)])
+
+        assert [p.name for p in paths] == ["alpha", "beta", "gamma"]
+
+
+class TestRunFleet:
+    def test_rules_mode_writes_every_repo(self, fleet_env):
+        _, repos, cfg = fleet_env
+
+        results = fleet.run_fleet(cfg, repos, ["python"], workers=2)
+
+        assert [r["ok"] for r in results] == [True, True, True]
+        for repo in repos:
+            assert (repo / ".cursor" / "rules" / "global.mdc").is_file()
+            assert (repo / ".aider" / "rules" / "python.md").is_file()
+            assert "- .aider/rules/python.md" in (repo / ".aider.conf.yml").read_text()
+            assert ".cursor/rules/*.mdc" in (repo / ".gitignore").read_text()
+
+    def test_bootstrap_mode_never_prompts(self, fleet_env, monkeypatch):
+        _, repos, cfg = fleet_env
+        (repos[0] / ".crules").mkdir()
+
+        def fail_confirm(*args, **kwargs):
+            raise AssertionError("fleet bootstrap must not prompt")
+
+        monkeypatch.setattr("click.confirm", fail_confirm)
+        results = fleet.run_fleet(cfg, repos, [], mode="bootstrap")
+
+        assert all(r["ok"] for r in results)
+        for repo in repos:
+            assert (repo / "AGENTS.md").is_file()
+            assert (repo / ".crules" / "modes" / "BOOTSTRAPPER.md").is_file()
+
+    def test_missing_repo_is_reported(self, fleet_env):
+        tmp_path, repos, cfg = fleet_env
+
+        results = fleet.run_fleet(cfg, [repos[0], tmp_path / "nope"], [])
+
+        assert results[0]["ok"] is True
+        assert results[1]["ok"] is False
+        assert results[1]["error"] == "not a directory"
@@ -0,0 +1,252 @@
+"""Tests for fragments module."""
+import os
+import threading
+from pathlib import Path
+import pytest
+from crules import file_ops, watch
+from crules.fragments import FragmentResolver, IncludeError, get_fragment_resolver
+from crules.render import RuleBody
+
+
+@pytest.fixture
+def fragments(tmp_path):
+    frag_dir = tmp_path / "fragments"
+    (frag_dir / "python").mkdir(parents=True)
+    (frag_dir / "testing.md").write_text("## Testing\nRun the suite.\n")
+    (frag_dir / "git.md").write_text("## Git\nSmall commits.\n@include testing\n")
+    (frag_dir / "python" / "typing.md").write_text("Use type hints.")
+    return frag_dir
+
+
+def _resolve(resolver, text, name="python", origin="cursor.python"):
+    return resolver.resolve(name, RuleBody.from_text(text), origin).text()
+
+
+class TestFragmentResolver:
+    def test_expands_nested_includes(self, fragments):
+        resolver = FragmentResolver(fragments)
+
+        text = _resolve(
+            resolver, "# Python\n@include git.md\n@include python/typing\nEnd.\n"
+        )
+
+        assert text == (
+            "# Python\n## Git\nSmall commits.\n"
+            "## Testing\nRun the suite.\nUse type hints.\nEnd.\n"
+        )
+        assert resolver.dependencies("python") == {
+            (fragments / name).resolve()
+            for name in ("git.md", "testing.md", "python/typing.md")
+        }
+
+    def test_body_without_includes_is_returned_as_is(self, fragments):
+        resolver = FragmentResolver(fragments)
+        body = RuleBody.from_text("# Go\nNo includes here.\n")
+
+        assert resolver.resolve("go", body, "cursor.go") is body
+        assert resolver.dependencies("go") == frozenset()
+
+    def test_includes_inside_fences_are_left_alone(self, fragments):
+        text = "```\n@include testing\n```\n"
+
+        assert _resolve(FragmentResolver(fragments), text) == text
+
+    def test_cycle_is_reported(self, fragments):
+        (fragments / "a.md").write_text("@include b\n")
+        (fragments / "b.md").write_text("@include a\n")
+
+        with pytest.raises(IncludeError, match="include cycle a.md -> b.md -> a.md"):
+            _resolve(FragmentResolver(fragments), "@include a\n")
+
+    def test_missing_and_escaping_includes_fail(self, fragments, tmp_path):
+        (tmp_path / "secret.md").write_text("no\n")
+        resolver = FragmentResolver(fragments)
+
+        with pytest.raises(
+            IncludeError, match=r"cursor.python:2: fragment 'nope' not found"
+        ):
+            _resolve(resolver, "# Python\n@include nope\n")
+        with pytest.raises(IncludeError, match="is outside"):
+            _resolve(resolver, "@include ../secret.md\n")
+
+    def test_edit_reexpands_only_dependents(self, fragments, monkeypatch):
+        resolver = FragmentResolver(fragments)
+        _resolve(resolver, "@include git\n", name="python")
+        _resolve(
+            resolver, "@include python/typing\n", name="rust", origin="cursor.rust"
+        )
+
+        reads = []
+        real_read_bytes = Path.read_bytes
+        monkeypatch.setattr(
+            Path, "read_bytes", lambda p: reads.append(p.name) or real_read_bytes(p)
+        )
+        testing = fragments / "testing.md"
+        testing.write_text("## Testing\nRun the whole suite.\n")
+        os.utime(testing, ns=(1, 1))
+
+        assert resolver.dependents([testing], ["global", "python", "rust"]) == [
+            "global",
+            "python",
+        ]
+        assert "Run the whole suite." in _resolve(resolver, "@include git\n")
+        assert "Use type hints." in _resolve(
+            resolver, "@include python/typing\n", name="rust"
+        )
+        # Unchanged fragments are only stat'ed, not read again.
+        assert reads == ["testing.md"]
+
+    def test_shared_resolver_per_directory(self, fragments):
+        assert get_fragment_resolver(fragments) is get_fragment_resolver(str(fragments))
+
+
+class TestCompile:
+    @pytest.fixture
+    def env(self, tmp_path, fragments, monkeypatch):
+        repo = tmp_path / "repo"
+        repo.mkdir()
+        monkeypatch.chdir(repo)
+        lang_dir = tmp_path / "lang_rules"
+        lang_dir.mkdir()
+        global_rules = tmp_path / "cursorrules"
+        global_rules.write_text("# Global\n")
+        (lang_dir / "cursor.python").write_text("# Python\n@include testing\n")
+        (lang_dir / "cursor.go").write_text("# Go\n")
+        cfg = {
+            "enable_claude": True,
+            "global_rules_path": str(global_rules),
+            "language_rules_dir": str(lang_dir),
+            "fragments_dir": str(fragments),
+        }
+        return repo, cfg, global_rules, lang_dir
+
+    def test_write_rules_expands_includes(self, env):
+        repo, cfg, global_rules, lang_dir = env
+
+        assert file_ops.write_rules_to_ai_dirs(
+            cfg, global_rules, lang_dir, ["python"], root=repo
+        )
+
+        assert (
+            "## Testing\nRun the suite.\n"
+            in (repo / ".claude/rules/python.md").read_text()
+        )
+
+    def test_unresolved_include_fails_compile(self, env):
+        repo, cfg, global_rules, lang_dir = env
+        (lang_dir / "cursor.python").write_text("@include nope\n")
+
+        assert not file_ops.write_rules_to_ai_dirs(
+            cfg, global_rules, lang_dir, ["python"], root=repo
+        )
+
+    def test_watch_rebuilds_languages_that_include_edited_fragment(
+        self, env, fragments
+    ):
+        repo, cfg, global_rules, lang_dir = env
+        assert file_ops.write_rules_to_ai_dirs(
+            cfg, global_rules, lang_dir, ["python", "go"], root=repo
+        )
+        resolver = get_fragment_resolver(cfg["fragments_dir"])
+
+        plan = watch.plan_rebuild(
+            [fragments / "testing.md"], global_rules, lang_dir, repo / "workflows",
+            ["python", "go"], resolver,
+        )
+
+        assert plan == (False, ["python"], [])
+
+    def test_sync_refreshes_when_global_fragment_changes(
+        self, env, fragments, tmp_path, monkeypatch
+    ):
+        repo, cfg, global_rules, _ = env
+        monkeypatch.setenv("HOME", str(tmp_path / "home"))
+        (tmp_path / "home/.config/crules/workflows").mkdir(parents=True)
+        (repo / ".crules/modes").mkdir(parents=True)
+        global_rules.write_text("# Global\n@include testing\n")
+        assert file_ops.sync_modes(cfg, root=repo)
+        assert "Run the suite." in (repo / ".claude/rules/global.md").read_text()
+
+        (fragments / "testing.md").write_text("## Testing\nRun it twice.\n")
+        assert file_ops.sync_modes(cfg, root=repo)
+
+        assert "Run it twice." in (repo / ".claude/rules/global.md").read_text()
+
+    def test_legacy_combine_expands_includes(self, env, fragments):
+        _, cfg, global_rules, lang_dir = env
+
+        combined = file_ops.combine_rules(
+            global_rules, lang_dir, ["python"], "\n---\n", fragments_dir=fragments
+        )
+
+        assert "@include" not in combined
+        assert combined.endswith(
+            "# Rules for python\n# Python\n## Testing\nRun the suite."
+        )
+
+
+class TestWatch:
+    @pytest.fixture
+    def watch_env(self, tmp_path, fragments, monkeypatch):
+        repo = tmp_path / "repo"
+        repo.mkdir()
+        monkeypatch.chdir(repo)
+        lang_dir = tmp_path / "lang_rules"
+        lang_dir.mkdir()
+        global_rules = tmp_path / "cursorrules"
+        global_rules.write_text("# Global\n")
+        (lang_dir / "cursor.python").write_text("# Python\n@include testing\n")
+        cfg = {
+            "enable_claude": True,
+            "global_rules_path": str(global_rules),
+            "language_rules_dir": str(lang_dir),
+            "fragments_dir": str(fragments),
+        }
+        assert file_ops.write_rules_to_ai_dirs(
+            cfg, global_rules, lang_dir, ["python"], root=repo
+        )
+        return repo, cfg, lang_dir
+
+    def test_missing_fragment_fails_rebuild(self, watch_env):
+        repo, cfg, lang_dir = watch_env
+        python = lang_dir / "cursor.python"
+        python.write_text("# Python\n@include tseting\n")
+
+        assert not watch.rebuild(cfg, [python], ["python"], root=repo)
+
+        assert "Run the suite." in (repo / ".claude/rules/python.md").read_text()
+
+    def test_cycle_fails_rebuild(self, watch_env, fragments):
+        repo, cfg, _ = watch_env
+        (fragments / "testing.md").write_text("@include git\n")
+
+        assert not watch.rebuild(cfg, [fragments / "testing.md"], ["python"], root=repo)
+
+    def test_watch_loop_survives_bad_include(self, watch_env, monkeypatch, caplog):
+        repo, cfg, lang_dir = watch_env
+        python = lang_dir / "cursor.python"
+        stop = threading.Event()
+        edits = [
+            lambda: python.write_text("@include nope\n"),
+            lambda: python.write_bytes(b"# Python \xff\n"),
+            lambda: python.write_text("# Python v2\n"),
+        ]
+
+        class FakeWatcher:
+            def wait(self, timeout=None):
+                if not edits:
+                    stop.set()
+                    return set()
+                edits.pop(0)()
+                return {python}
+
+            def close(self):
+                pass
+
+        monkeypatch.setattr(
+            watch, "make_watcher", lambda watches, use_inotify: FakeWatcher()
+        )
+        watch.watch_rules(cfg, ["python"], root=repo, stop=stop)
+
+        assert caplog.text.count("Recompile failed; waiting for the next change") == 2
+        assert "# Python v2" in (repo / ".claude/rules/python.md").read_text()
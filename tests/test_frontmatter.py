@@ -0,0 +1,110 @@
+"""Tests for frontmatter module."""
+import random
+import string
+import pytest
+import yaml
+from crules.ai_managers import ClaudeManager, CopilotManager, CursorManager
+from crules.frontmatter import render_frontmatter
+
+GOLDEN = [
+    (
+        {"description": "Rules for python development", "globs": ["*.py"]},
+        "---\ndescription: Rules for python development\nglobs: ['*.py']\n---\n\n",
+    ),
+    (
+        {"description": "Rules for global development", "paths": ["**/*"]},
+        "---\ndescription: Rules for global development\npaths: ['**/*']\n---\n\n",
+    ),
+    (
+        {"description": "Rules for ts development", "applyTo": ["**/*.ts", "src/a.b"]},
+        "---\napplyTo: ['**/*.ts', src/a.b]\n"
+        "description: Rules for ts development\n---\n\n",
+    ),
+    (
+        {"description": "Rules for y: z development", "globs": []},
+        "---\ndescription: 'Rules for y: z development'\nglobs: []\n---\n\n",
+    ),
+    (
+        {
+            "description": "Rules for x development",
+            "globs": ["src/components/**/*.tsx"] * 4,
+        },
+        "---\ndescription: Rules for x development\n"
+        "globs: [src/components/**/*.tsx, src/components/**/*.tsx, "
+        "src/components/**/*.tsx,\n"
+        "  src/components/**/*.tsx]\n---\n\n",
+    ),
+]
+
+UNUSUAL = [
+    "yes", "No", "on", "null", "~", "", " ", "a ", " a", "1", "1.5", ".inf", "0x1f",
+    "07", "2024-01-01", "1:30", "<<", "=", "*", "&a", "!b", "%a", "@a", "`a", "|a",
+    ">a", "#a", "a #b", "a#b", "a:b", "a: b", ":a", "?a", "a?", "- a", "-a", "---x",
+    "...y", "[a]", "{a}", "a,b", "a'b", "'q'", '"d"', "src/**/*.{ts,tsx}",
+    "docs/[abc]*.md", "a  b",
+]
+
+
+def _yaml_frontmatter(metadata):
+    text = yaml.dump(metadata, default_flow_style=None)
+    return f"---\n{text}---\n\n".encode("utf-8")
+
+
+class TestRenderFrontmatter:
+    @pytest.mark.parametrize("metadata,expected", GOLDEN)
+    def test_golden_output(self, metadata, expected):
+        assert render_frontmatter(metadata) == expected.encode("utf-8")
+        assert render_frontmatter(metadata) == _yaml_frontmatter(metadata)
+
+    @pytest.mark.parametrize("key", ["globs", "paths", "applyTo"])
+    def test_unusual_globs_match_yaml_dump(self, key):
+        for glob in UNUSUAL:
+            metadata = {
+                "description": f"Rules for {glob} development",
+                key: [glob, "*.py", glob],
+            }
+
+            assert render_frontmatter(metadata) == _yaml_frontmatter(metadata), glob
+
+    def test_wrapping_matches_yaml_dump(self):
+        rng = random.Random(7)
+        alphabet = string.ascii_lowercase + "  ./*-_:#,'?"
+        for _ in range(2000):
+            globs = [
+                "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 60)))
+                for _ in range(rng.randint(0, 12))
+            ]
+            metadata = {"description": "Rules for wrap development", "globs": globs}
+            assert render_frontmatter(metadata) == _yaml_frontmatter(metadata)
+
+    def test_unsupported_input_falls_back_to_yaml(self):
+        metadata = {
+            "description": "Règles für développement",
+            "globs": ["*.py", "a\tb"],
+        }
+
+        assert render_frontmatter(metadata) == _yaml_frontmatter(metadata)
+
+    def test_memoized_per_metadata(self):
+        metadata = {"description": "Rules for go development", "globs": ["*.go"]}
+
+        assert render_frontmatter(metadata) is render_frontmatter(dict(metadata))
+
+    @pytest.mark.parametrize(
+        "manager_cls", [CursorManager, ClaudeManager, CopilotManager]
+    )
+    def test_manager_output_matches_yaml_dump(self, tmp_path, manager_cls):
+        manager = manager_cls({}, tmp_path)
+        manager.ensure_structure()
+        captured = {}
+        original = manager._render_frontmatter
+
+        def capture(metadata):
+            captured.update(metadata)
+            return original(metadata)
+
+        manager._render_frontmatter = capture
+        assert manager.create_rule_file("python", "# py\n", ["*.py"])
+
+        out = next(p for p in manager.target_dir.iterdir() if p.is_file())
+        assert out.read_bytes().startswith(_yaml_frontmatter(captured))
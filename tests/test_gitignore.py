@@ -0,0 +1,90 @@
+"""Tests for gitignore module."""
+import pytest
+from crules import file_ops, gitignore
+from crules.gitignore import BLOCK_BEGIN, BLOCK_END, update_ignore_block
+
+
+@pytest.fixture
+def chdir_tmp(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+class TestUpdateIgnoreBlock:
+    def test_creates_fenced_block(self, chdir_tmp):
+        path = chdir_tmp / ".gitignore"
+
+        assert update_ignore_block(path, ["a/*.md", "b/*.md"])
+
+        assert path.read_text() == f"{BLOCK_BEGIN}\na/*.md\nb/*.md\n{BLOCK_END}\n"
+
+    def test_idempotent(self, chdir_tmp):
+        path = chdir_tmp / ".gitignore"
+        update_ignore_block(path, ["a/*.md"])
+        before = path.stat().st_mtime_ns
+
+        assert update_ignore_block(path, ["a/*.md"]) is False
+        assert path.stat().st_mtime_ns == before
+
+    def test_substring_is_not_a_match(self, chdir_tmp):
+        path = chdir_tmp / ".gitignore"
+        path.write_text(
+            "# .cursor/rules/*.mdc is ignored below\n.cursor/rules/*.mdc.bak\n"
+        )
+
+        assert update_ignore_block(path, [".cursor/rules/*.mdc"])
+
+        lines = path.read_text().splitlines()
+        assert lines.count(".cursor/rules/*.mdc") == 1
+
+    def test_existing_lines_outside_block_are_respected(self, chdir_tmp):
+        path = chdir_tmp / ".gitignore"
+        path.write_text("node_modules/\n\n# Crules specific\n.clinerules/*.md\n")
+
+        update_ignore_block(path, [".clinerules/*.md", ".roorules/*.md"])
+
+        text = path.read_text()
+        assert text.count(".clinerules/*.md") == 1
+        assert text.startswith("node_modules/\n")
+        assert text.endswith(f"{BLOCK_BEGIN}\n.roorules/*.md\n{BLOCK_END}\n")
+
+    def test_extends_block_in_place(self, chdir_tmp):
+        path = chdir_tmp / ".gitignore"
+        path.write_text(f"top\n{BLOCK_BEGIN}\na\n{BLOCK_END}\nbottom\n")
+
+        update_ignore_block(path, ["a", "b"])
+
+        assert path.read_text() == f"top\n{BLOCK_BEGIN}\na\nb\n{BLOCK_END}\nbottom\n"
+
+
+class TestSinglePassDeploy:
+    def test_deploy_writes_gitignore_once(self, chdir_tmp, monkeypatch, all_targets):
+        global_rules = chdir_tmp / "cursorrules"
+        global_rules.write_text("# Global\n")
+        cfg = all_targets
+        calls = []
+        real = gitignore.update_ignore_block
+
+        def counting(path, patterns):
+            calls.append(list(patterns))
+            return real(path, patterns)
+
+        monkeypatch.setattr(file_ops, "update_ignore_block", counting)
+        assert file_ops.write_rules_to_ai_dirs(cfg, global_rules, chdir_tmp, [])
+
+        assert len(calls) == 1
+        text = (chdir_tmp / ".gitignore").read_text()
+        for pattern in calls[0]:
+            assert text.count(f"\n{pattern}\n") == 1
+        assert ".crules/manifest.json" in calls[0]
+
+    def test_legacy_update_gitignore_uses_block(self, chdir_tmp):
+        (chdir_tmp / ".gitignore").write_text("*.pyc\n")
+
+        file_ops.update_gitignore()
+        file_ops.update_gitignore()
+
+        text = (chdir_tmp / ".gitignore").read_text()
+        assert text.count(".cursorrules\n") == 1
+        assert "# Cursor specific" not in text
+        assert BLOCK_BEGIN in text
@@ -0,0 +1,89 @@
+"""Tests for manifest module."""
+import json
+import os
+from pathlib import Path
+from crules import file_ops
+from crules.manifest import MANIFEST_PATH, OutputManifest
+
+
+def _output_mtimes(root: Path) -> dict:
+    return {
+        p: p.stat().st_mtime_ns
+        for d in (
+            ".cursor",
+            ".claude",
+            ".github",
+            ".clinerules",
+            ".roorules",
+            ".windsurf",
+            ".aider",
+        )
+        for p in (root / d).rglob("*")
+        if p.is_file()
+    }
+
+
+class TestOutputManifest:
+    def test_records_every_output(self, rules_env):
+        root, cfg, global_rules = rules_env
+
+        assert file_ops.write_rules_to_ai_dirs(cfg, global_rules, root, [])
+
+        data = json.loads((root / MANIFEST_PATH).read_text())
+        assert ".cursor/rules/global.mdc" in data["files"]
+        entry = data["files"][".aider/rules/global.md"]
+        assert set(entry) == {"sha256", "size", "mtime_ns"}
+        assert len(data["files"]) == 7
+
+    def test_unchanged_run_is_stat_only(self, rules_env, monkeypatch):
+        root, cfg, global_rules = rules_env
+        assert file_ops.write_rules_to_ai_dirs(cfg, global_rules, root, [])
+        before = _output_mtimes(root)
+
+        def no_io(self, *args, **kwargs):
+            raise AssertionError(f"unexpected I/O on {self}")
+
+        monkeypatch.setattr(Path, "read_bytes", no_io)
+        monkeypatch.setattr(Path, "write_bytes", no_io)
+        assert file_ops.write_rules_to_ai_dirs(cfg, global_rules, root, [])
+        monkeypatch.undo()
+
+        assert _output_mtimes(root) == before
+
+    def test_changed_source_rewrites(self, rules_env):
+        root, cfg, global_rules = rules_env
+        assert file_ops.write_rules_to_ai_dirs(cfg, global_rules, root, [])
+
+        global_rules.write_text("# New global rules\n")
+        assert file_ops.write_rules_to_ai_dirs(cfg, global_rules, root, [])
+
+        assert "# New global rules" in (root / ".cursor/rules/global.mdc").read_text()
+
+    def test_externally_edited_output_is_restored(self, rules_env):
+        root, cfg, global_rules = rules_env
+        assert file_ops.write_rules_to_ai_dirs(cfg, global_rules, root, [])
+        target = root / ".clinerules" / "global.md"
+        original = target.read_text()
+
+        target.write_text("hand edit\n")
+        assert file_ops.write_rules_to_ai_dirs(cfg, global_rules, root, [])
+
+        assert target.read_text() == original
+
+    def test_force_rewrites_identical_outputs(self, rules_env):
+        root, cfg, global_rules = rules_env
+        assert file_ops.write_rules_to_ai_dirs(cfg, global_rules, root, [])
+        target = root / ".roorules" / "global.md"
+        os.utime(target, ns=(1, 1))
+
+        assert file_ops.write_rules_to_ai_dirs(cfg, global_rules, root, [], force=True)
+
+        assert target.stat().st_mtime_ns != 1
+
+    def test_corrupt_manifest_is_ignored(self, rules_env):
+        root, _, _ = rules_env
+        path = root / MANIFEST_PATH
+        path.parent.mkdir(parents=True)
+        path.write_text("{not json")
+
+        assert OutputManifest.load(root).entries == {}
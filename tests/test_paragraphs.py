@@ -0,0 +1,163 @@
+"""Tests for paragraphs module."""
+import pytest
+from crules import file_ops, watch
+from crules.paragraphs import ParagraphIndex, new_dedupe_stats
+
+TESTING = (
+    "Always run the full test suite before committing and\n"
+    "fix every failure you introduce.\n"
+)
+GIT = (
+    "Write commit messages in the imperative mood and keep\n"
+    "each commit focused on one change.\n"
+)
+
+
+def _filter(global_text, lang_text, **kwargs):
+    index = ParagraphIndex(**kwargs)
+    index.add(global_text.splitlines(keepends=True))
+    stats = new_dedupe_stats()
+    return "".join(index.filter(lang_text.splitlines(keepends=True), stats)), stats
+
+
+class TestParagraphIndex:
+    def test_drops_global_paragraphs_with_their_gap(self):
+        kept, stats = _filter(
+            f"# Global\n\n{TESTING}\n{GIT}",
+            f"# Python\n\n{TESTING}\nUse type hints everywhere in new code.\n",
+        )
+
+        assert kept == "# Python\n\nUse type hints everywhere in new code.\n"
+        assert stats == {"paragraphs": 1, "bytes": len(TESTING) + 1}
+
+    def test_matches_rewrapped_and_recased_copies(self):
+        rewrapped = (
+            "  always run the FULL test suite\n"
+            "before committing and fix every   failure you introduce.\n"
+        )
+
+        kept, stats = _filter(TESTING, f"{rewrapped}\nKeep.\n")
+
+        assert kept == "Keep.\n"
+        assert stats["paragraphs"] == 1
+
+    def test_short_paragraphs_are_kept(self):
+        kept, stats = _filter("## Testing\n\n---\n", "## Testing\n\n---\n")
+
+        assert kept == "## Testing\n\n---\n"
+        assert stats["paragraphs"] == 0
+
+    def test_blank_lines_inside_fences_do_not_split(self):
+        fence = (
+            "```python\ndef test_example():\n\n    assert run_the_full_suite()\n```\n"
+        )
+
+        kept, _ = _filter(fence, f"Intro paragraph.\n\n{fence}")
+        assert kept == "Intro paragraph.\n\n"
+
+        # Only half of the fenced block matches, so the block is kept whole.
+        partial = (
+            "```python\ndef test_example():\n\n"
+            "    assert something_else_entirely()\n```\n"
+        )
+        kept, stats = _filter(fence, partial)
+        assert kept == partial
+        assert stats["paragraphs"] == 0
+
+    def test_crlf_line_endings_are_preserved(self):
+        lang = f"Keep this line.\r\n\r\n{TESTING.replace(chr(10), chr(13) + chr(10))}"
+
+        kept, stats = _filter(TESTING, lang)
+
+        assert kept == "Keep this line.\r\n\r\n"
+        assert stats["paragraphs"] == 1
+
+
+@pytest.fixture
+def dedupe_env(make_rules_env):
+    return make_rules_env(
+        f"# Global\n\n{TESTING}\n{GIT}",
+        {
+            "python": f"# Python\n\n{TESTING}\nUse type hints everywhere.\n",
+            "go": f"# Go\n\n{GIT}\nRun gofmt on save.\n",
+        },
+        enable=("claude",),
+        dedupe_paragraphs=True,
+    )
+
+
+class TestDedupeSources:
+    def test_load_rule_sources_leaves_global_and_drops_repeats(
+        self, dedupe_env, caplog
+    ):
+        root, _, global_rules = dedupe_env
+
+        with caplog.at_level("INFO"):
+            sources = file_ops.load_rule_sources(
+                global_rules, root, ["python", "go"], dedupe=True
+            )
+
+        bodies = {name: body.text() for name, body, _ in sources}
+        assert TESTING in bodies["global"] and GIT in bodies["global"]
+        assert bodies["python"] == "# Python\n\nUse type hints everywhere.\n"
+        assert bodies["go"] == "# Go\n\nRun gofmt on save.\n"
+        saved = len(TESTING) + len(GIT) + 2
+        assert (
+            f"dropped 2 paragraph(s) repeated from global rules, saving {saved} bytes"
+            in caplog.text
+        )
+
+    def test_without_dedupe_sources_are_unchanged(self, dedupe_env):
+        root, _, global_rules = dedupe_env
+
+        sources = file_ops.load_rule_sources(global_rules, root, ["python"])
+
+        assert TESTING in sources[1][1].text()
+
+    def test_write_rules_to_ai_dirs_uses_config(self, dedupe_env):
+        root, cfg, global_rules = dedupe_env
+
+        assert file_ops.write_rules_to_ai_dirs(cfg, global_rules, root, ["python"])
+
+        assert TESTING not in (root / ".claude/rules/python.md").read_text()
+        assert TESTING in (root / ".claude/rules/global.md").read_text()
+
+    def test_legacy_combine(self, dedupe_env):
+        root, _, global_rules = dedupe_env
+
+        combined = file_ops.combine_rules(
+            global_rules, root, ["python"], "\n---\n", dedupe=True
+        )
+
+        assert combined.count("Always run the full test suite") == 1
+        assert combined.endswith(
+            "# Rules for python\n# Python\n\nUse type hints everywhere."
+        )
+
+    def test_watch_recompiles_languages_when_global_changes(self, dedupe_env):
+        root, cfg, global_rules = dedupe_env
+        assert file_ops.write_rules_to_ai_dirs(cfg, global_rules, root, ["python"])
+
+        global_rules.write_text(f"# Global\n\n{GIT}")
+        assert watch.rebuild(cfg, [global_rules], ["python"], root=root)
+
+        assert TESTING in (root / ".claude/rules/python.md").read_text()
+
+    def test_streamed_bodies_stay_streamed(self, dedupe_env, monkeypatch):
+        root, _, global_rules = dedupe_env
+        for factory in (file_ops.RuleBody.from_path, file_ops.RuleBody.from_lines):
+            monkeypatch.setattr(factory.__func__, "__defaults__", (64,))
+        filler = "".join(
+            f"Python paragraph number {i} with enough words to count.\n\n"
+            for i in range(20)
+        )
+        (root / "cursor.python").write_text(f"{TESTING}\n{filler}")
+
+        sources = file_ops.load_rule_sources(
+            global_rules, root, ["python"], dedupe=True
+        )
+
+        python = sources[1][1]
+        assert not python.in_memory
+        assert python.path != root / "cursor.python"
+        assert python.text() == filler
@@ -0,0 +1,106 @@
+"""Tests for parallel module and the --jobs write path."""
+import logging
+import threading
+import pytest
+from crules import file_ops
+from crules.ai_managers import WindsurfManager
+from crules.parallel import OrderedPool
+
+
+@pytest.fixture
+def parallel_env(make_rules_env):
+    return make_rules_env(
+        "# Global\n", {lang: f"# {lang} rules\n" for lang in ("python", "go", "rust")}
+    )
+
+
+def _deploy(root, global_rules, cfg, jobs, monkeypatch):
+    root.mkdir()
+    monkeypatch.chdir(root)
+    cfg = dict(cfg, jobs=jobs)
+    return file_ops.write_rules_to_ai_dirs(
+        cfg, global_rules, global_rules.parent, ["python", "go", "rust"], root=root
+    )
+
+
+def _tree(root):
+    return {
+        p.relative_to(root).as_posix(): p.read_bytes()
+        for p in root.rglob("*")
+        if p.is_file() and p.name != "manifest.json"
+    }
+
+
+class TestOrderedPool:
+    def test_results_and_logs_in_submission_order(self, caplog):
+        log = logging.getLogger("crules.test")
+        second_done = threading.Event()
+
+        def first():
+            second_done.wait(5)
+            log.info("first")
+            return 1
+
+        def second():
+            log.info("second")
+            second_done.set()
+            return 2
+
+        with caplog.at_level(logging.INFO), OrderedPool(2) as pool:
+            futures = [pool.submit(first), pool.submit(second)]
+            results = [pool.result(f) for f in futures]
+
+        assert results == [1, 2]
+        assert [r.getMessage() for r in caplog.records] == ["first", "second"]
+
+    def test_exception_is_reraised_after_logs(self, caplog):
+        def boom():
+            logging.getLogger("crules.test").warning("about to fail")
+            raise ValueError("boom")
+
+        with caplog.at_level(logging.INFO), OrderedPool(2) as pool:
+            future = pool.submit(boom)
+            with pytest.raises(ValueError):
+                pool.result(future)
+
+        assert [r.getMessage() for r in caplog.records] == ["about to fail"]
+
+
+class TestParallelDeploy:
+    def test_matches_serial_output_and_logs(self, parallel_env, monkeypatch, caplog):
+        tmp_path, cfg, global_rules = parallel_env
+        with caplog.at_level(logging.INFO):
+            assert _deploy(tmp_path / "serial", global_rules, cfg, 1, monkeypatch)
+        serial_logs = [
+            r.getMessage().replace("/serial", "/ROOT") for r in caplog.records
+        ]
+        caplog.clear()
+        with caplog.at_level(logging.INFO):
+            assert _deploy(tmp_path / "parallel", global_rules, cfg, 8, monkeypatch)
+        parallel_logs = [
+            r.getMessage().replace("/parallel", "/ROOT") for r in caplog.records
+        ]
+
+        assert _tree(tmp_path / "parallel") == _tree(tmp_path / "serial")
+        assert parallel_logs == serial_logs
+
+    def test_failure_rolls_back_and_reports_in_order(
+        self, parallel_env, monkeypatch, caplog
+    ):
+        tmp_path, cfg, global_rules = parallel_env
+        real_create = WindsurfManager.create_rule_file
+
+        def failing_create(self, name, content, globs):
+            if name in ("go", "python"):
+                return False
+            return real_create(self, name, content, globs)
+
+        monkeypatch.setattr(WindsurfManager, "create_rule_file", failing_create)
+
+        assert not _deploy(tmp_path / "repo", global_rules, cfg, 8, monkeypatch)
+
+        assert not (tmp_path / "repo/.cursor/rules/global.mdc").exists()
+        assert (
+            "Failed to write 2 rule file(s): WindsurfManager/python, WindsurfManager/go"
+            in caplog.text
+        )
@@ -0,0 +1,246 @@
+"""Tests for render module and the streaming write paths."""
+import gc
+import hashlib
+import tempfile
+import pytest
+from crules import file_ops, render
+from crules.ai_managers import CursorManager
+from crules.render import (
+    UNIVERSAL_PREAMBLE,
+    RenderedBody,
+    RenderedOutput,
+    RuleBody,
+    render_body,
+)
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(render, "CHUNK_SIZE", 5)
+    monkeypatch.setattr(file_ops, "COMBINE_CHUNK_CHARS", 7)
+
+
+def _reference_combine(global_text, lang_texts, delimiter):
+    """The original in-memory combine, kept as the behavioural reference."""
+    parts = [global_text.strip()]
+    for lang, text in lang_texts.items():
+        content = text.strip().replace("# --- Delimiter ---", "")
+        content = "\n".join(
+            line
+            for line in content.splitlines()
+            if not line.strip().startswith("# Rules for")
+        )
+        parts.append(f"# Rules for {lang}\n{content}")
+    return delimiter.join(parts)
+
+
+class TestRuleBody:
+    def test_large_source_is_streamed(self, tmp_path, small_chunks):
+        src = tmp_path / "big"
+        src.write_bytes(b"0123456789" * 7)
+
+        body = RuleBody.from_path(src, stream_threshold=10)
+
+        assert not body.in_memory
+        assert body.size == 70
+        assert b"".join(bytes(c) for c in body.chunks()) == src.read_bytes()
+        assert body.digest() == hashlib.sha256(src.read_bytes()).digest()
+
+    def test_small_source_is_loaded(self, tmp_path):
+        src = tmp_path / "small"
+        src.write_bytes(b"rules\n")
+
+        body = RuleBody.from_path(src)
+
+        assert body.in_memory
+        assert body.text() == "rules\n"
+
+    def test_output_matches_file(self, tmp_path, small_chunks):
+        src = tmp_path / "big"
+        src.write_bytes(b"abcdefghij" * 3)
+        output = RenderedOutput(b"---\n", RuleBody.from_path(src, stream_threshold=1))
+        target = tmp_path / "out"
+
+        with open(target, "wb") as f:
+            output.write_to(f)
+
+        assert target.read_bytes() == b"---\n" + src.read_bytes()
+        assert output.matches_file(target)
+        target.write_bytes(b"---\n" + b"abcdefghij" * 2 + b"abcdefghiX")
+        assert not output.matches_file(target)
+
+
+    def test_spooled_lines_are_removed_with_the_last_body(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+        lines = [f"line {i}\n" for i in range(10)]
+
+        body = RuleBody.from_lines(lines, stream_threshold=16)
+        spool = body.path
+        assert not body.in_memory and spool.parent == tmp_path
+        rendered = render_body(body)
+        del body
+        gc.collect()
+
+        assert spool.exists()
+        assert b"".join(bytes(c) for c in rendered.chunks()).endswith(
+            "".join(lines).encode()
+        )
+        del rendered
+        gc.collect()
+        assert not spool.exists()
+
+    def test_deploy_leaves_no_spooled_files(self, make_rules_env, monkeypatch):
+        root, cfg, global_rules = make_rules_env(
+            "# Global\n\nAlways run the full test suite before committing a change.\n",
+            {
+                "python": "".join(
+                    f"Python rule number {i} in its own paragraph.\n\n"
+                    for i in range(20)
+                )
+            },
+            dedupe_paragraphs=True,
+        )
+        spool_dir = root / "spool"
+        spool_dir.mkdir()
+        monkeypatch.setattr(tempfile, "tempdir", str(spool_dir))
+        for factory in (RuleBody.from_path, RuleBody.from_lines):
+            monkeypatch.setattr(factory.__func__, "__defaults__", (64,))
+
+        assert file_ops.write_rules_to_ai_dirs(cfg, global_rules, root, ["python"])
+        gc.collect()
+
+        assert (
+            "Python rule number 19" in (root / ".cursor/rules/python.mdc").read_text()
+        )
+        assert list(spool_dir.iterdir()) == []
+
+
+class TestRenderBody:
+    def test_prepends_preamble_once(self):
+        body = render_body("# rules\n")
+
+        assert isinstance(body, RenderedBody)
+        assert body.text() == UNIVERSAL_PREAMBLE.decode() + "# rules\n"
+        assert render_body(body) is body
+
+    def test_streamed_body_keeps_preamble_as_prefix(self, tmp_path, small_chunks):
+        src = tmp_path / "big"
+        src.write_bytes(b"x" * 40)
+
+        body = render_body(RuleBody.from_path(src, stream_threshold=1))
+
+        assert not body.in_memory
+        assert body.size == len(UNIVERSAL_PREAMBLE) + 40
+        assert (
+            b"".join(bytes(c) for c in body.chunks()) == UNIVERSAL_PREAMBLE + b"x" * 40
+        )
+
+    def test_deploy_renders_each_source_once(self, tmp_path, monkeypatch, all_targets):
+        monkeypatch.chdir(tmp_path)
+        global_rules = tmp_path / "cursorrules"
+        global_rules.write_text("# Global\n")
+        (tmp_path / "cursor.python").write_text("# Python\n")
+        cfg = all_targets
+        calls = []
+
+        def counting(content, preamble=True):
+            calls.append(content)
+            return render_body(content, preamble)
+
+        monkeypatch.setattr(file_ops, "render_body", counting)
+        assert file_ops.write_rules_to_ai_dirs(cfg, global_rules, tmp_path, ["python"])
+
+        assert len(calls) == 2
+        text = (tmp_path / ".windsurf/rules/python.md").read_text()
+        assert text.endswith(UNIVERSAL_PREAMBLE.decode() + "# Python\n")
+
+
+class TestStreamingManagers:
+    def test_streamed_body_matches_in_memory_render(self, tmp_path, small_chunks):
+        src = tmp_path / "cursor.python"
+        src.write_text("# Python rules\n" * 20)
+        streamed = CursorManager({}, tmp_path / "a")
+        loaded = CursorManager({}, tmp_path / "b")
+        for manager in (streamed, loaded):
+            manager.ensure_structure()
+
+        assert streamed.create_rule_file(
+            "python", RuleBody.from_path(src, stream_threshold=1), ["*.py"]
+        )
+        assert loaded.create_rule_file("python", src.read_text(), ["*.py"])
+
+        a = (streamed.target_dir / "python.mdc").read_bytes()
+        assert a == (loaded.target_dir / "python.mdc").read_bytes()
+        assert a.endswith(src.read_bytes())
+
+    def test_deploy_streams_large_sources(self, tmp_path, monkeypatch, small_chunks):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(render, "STREAM_THRESHOLD", 8)
+        global_rules = tmp_path / "cursorrules"
+        global_rules.write_text("# Global rules streamed from disk\n")
+        cfg = {"enable_cursor": True, "enable_cline": True}
+
+        assert file_ops.write_rules_to_ai_dirs(cfg, global_rules, tmp_path, [])
+        assert file_ops.write_rules_to_ai_dirs(cfg, global_rules, tmp_path, [])
+
+        for out in (
+            tmp_path / ".cursor/rules/global.mdc",
+            tmp_path / ".clinerules/global.md",
+        ):
+            assert out.read_bytes().endswith(global_rules.read_bytes())
+
+
+class TestStreamingCombine:
+    @pytest.fixture(autouse=True)
+    def _in_tmp(self, tmp_path, monkeypatch):
+        # combine_rules updates ./.gitignore; keep it out of the checkout.
+        monkeypatch.chdir(tmp_path)
+
+    @pytest.mark.parametrize(
+        "global_text,lang_text",
+        [
+            (
+                "\n\n  # Global\nkeep  \n\n\n",
+                "# Rules for python\n\n- a\n# --- Delimiter ---\n- b  \n\n",
+            ),
+            ("one line", ""),
+            ("   \n\t\n", "  \n# Rules for x\n"),
+            ("a\n\n\nb\n", "x\n  # Rules for go\ny # --- Delimiter --- z\n" * 5),
+        ],
+    )
+    def test_matches_reference(self, tmp_path, small_chunks, global_text, lang_text):
+        global_rules = tmp_path / "cursorrules"
+        global_rules.write_text(global_text)
+        (tmp_path / "cursor.python").write_text(lang_text)
+        (tmp_path / "cursor.go").write_text(lang_text + "\n- go\n")
+        langs = {"python": lang_text, "go": lang_text + "\n- go\n"}
+        delimiter = "\n# --- Delimiter ---\n"
+        expected = _reference_combine(global_text, langs, delimiter)
+
+        assert (
+            file_ops.combine_rules(global_rules, tmp_path, list(langs), delimiter)
+            == expected
+        )
+
+        out = tmp_path / ".cursorrules"
+        file_ops.write_combined_rules(
+            out, global_rules, tmp_path, list(langs), delimiter
+        )
+        assert out.read_text() == expected
+
+    def test_failure_keeps_previous_output(self, tmp_path):
+        global_rules = tmp_path / "cursorrules"
+        global_rules.write_text("# Global\n")
+        out = tmp_path / ".cursorrules"
+        out.write_text("previous")
+
+        with pytest.raises(OSError):
+            file_ops.write_combined_rules(
+                out, global_rules, tmp_path, ["missing"], "\n"
+            )
+
+        assert out.read_text() == "previous"
+        assert sorted(p.name for p in tmp_path.iterdir()) == [
+            ".cursorrules",
+            "cursorrules",
+        ]
@@ -0,0 +1,83 @@
+"""Tests for incremental setup."""
+import pytest
+import yaml
+from click.testing import CliRunner
+from crules import cli, file_ops
+
+
+@pytest.fixture
+def home(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    return tmp_path / ".config/crules"
+
+
+def _setup(force=False):
+    report = file_ops.new_setup_report()
+    assert file_ops.setup_directory_structure(force=force, report=report)
+    return report
+
+
+class TestIncrementalSetup:
+    def test_first_run_creates_everything(self, home):
+        report = _setup()
+
+        assert report["created"]
+        assert report["updated"] == report["unchanged"] == report["skipped"] == []
+        assert str(home / "config.yaml") in report["created"]
+
+    def test_forced_rerun_writes_nothing_unchanged(self, home):
+        _setup()
+        python_rules = home / "lang_rules/cursor.python"
+        mtime = python_rules.stat().st_mtime_ns
+
+        report = _setup(force=True)
+
+        assert report["created"] == report["updated"] == report["skipped"] == []
+        assert str(python_rules) in report["unchanged"]
+        assert python_rules.stat().st_mtime_ns == mtime
+
+    def test_edited_files_skipped_unless_forced(self, home):
+        first = _setup()
+        python_rules = home / "lang_rules/cursor.python"
+        packaged = python_rules.read_bytes()
+        python_rules.write_text("# local edits\n")
+
+        assert _setup()["skipped"] == [str(python_rules)]
+        assert python_rules.read_text() == "# local edits\n"
+
+        report = _setup(force=True)
+        assert report["updated"] == [str(python_rules)]
+        assert python_rules.read_bytes() == packaged
+        assert len(report["unchanged"]) == len(first["created"]) - 1
+
+    def test_force_merges_config_keys(self, home):
+        _setup()
+        config_file = home / "config.yaml"
+        config_file.write_text(
+            "# my settings\n"
+            "enable_aider: false\n"
+            "file_extension: .md\n"
+        )
+
+        report = _setup(force=True)
+
+        assert report["updated"] == [str(config_file)]
+        text = config_file.read_text()
+        assert text.startswith("# my settings\nenable_aider: false\n")
+        merged = yaml.safe_load(text)
+        assert merged["enable_aider"] is False
+        assert merged["file_extension"] == ".md"
+        assert merged["project_rules_dir"] == ".cursor/rules"
+        assert merged["language_rules_dir"] == str(home / "lang_rules")
+
+
+def test_cli_prints_setup_report(home):
+    result = CliRunner().invoke(cli.main, ["--setup"])
+    assert result.exit_code == 0, result.output
+    assert "0 updated, 0 unchanged, 0 skipped" in result.output
+    assert "[CREATED]" in result.output
+
+    result = CliRunner().invoke(cli.main, ["--setup", "--force"])
+    assert result.exit_code == 0, result.output
+    assert "0 created, 0 updated" in result.output
+    assert "[CREATED]" not in result.output
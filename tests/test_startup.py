@@ -0,0 +1,74 @@
+"""Startup-time regression tests for the crules CLI.
+
+The budget below is documented in the README ("Startup budget"). Module
+checks are exact; the time budget is deliberately generous so it only trips
+on real regressions such as an eager PyYAML or manager import.
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+import crules
+
+# Cumulative microseconds for ``import crules.cli`` under ``-X importtime``.
+STARTUP_BUDGET_US = 200_000
+
+# Modules that must not load until a command actually needs them.
+DEFERRED_MODULES = (
+    "yaml",
+    "importlib.metadata",
+    "importlib.resources",
+    "crules.ai_managers",
+    "crules.budget",
+    "crules.detect",
+    "crules.fleet",
+    "crules.fragments",
+    "crules.watch",
+    "concurrent.futures",
+    "ctypes",
+)
+
+
+def _importtime(*args: str) -> dict:
+    env = os.environ.copy()
+    src = str(Path(crules.__file__).resolve().parents[1])
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [src, env.get("PYTHONPATH")]))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def test_cli_import_defers_heavy_modules():
+    modules = _importtime("-c", "import crules.cli")
+
+    assert "crules.cli" in modules
+    loaded = sorted(set(DEFERRED_MODULES) & set(modules))
+    assert loaded == []
+
+
+def test_cli_import_within_budget():
+    # Best of three to absorb cold caches on shared CI runners.
+    best = min(_importtime("-c", "import crules.cli")["crules.cli"] for _ in range(3))
+
+    assert best < STARTUP_BUDGET_US
+
+
+@pytest.mark.parametrize("flag", ["--version", "--help"])
+def test_info_flags_skip_yaml_and_managers(flag):
+    modules = _importtime("-m", "crules", flag)
+
+    assert "yaml" not in modules
+    assert "crules.ai_managers" not in modules
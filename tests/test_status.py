@@ -0,0 +1,131 @@
+"""Tests for --status reporting and the recursive health scan."""
+import json
+import os
+import pytest
+from click.testing import CliRunner
+from crules import cli, file_ops, fleet
+from crules.file_ops import MODE_FILES, agents_md_state, project_status, report_status
+
+
+def _make_repo(path, agents="[TEMPLATE]", modes=MODE_FILES, spec=True):
+    (path / ".crules" / "modes").mkdir(parents=True)
+    for name in modes:
+        (path / ".crules" / "modes" / name).write_text(f"# {name}\n")
+    if agents is not None:
+        (path / "AGENTS.md").write_text(f"# Agent System Status: {agents}\n\nbody\n")
+    if spec:
+        (path / "project_spec.md").write_text("# Spec\n")
+    return path
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    root = tmp_path / "src"
+    _make_repo(root / "team-a" / "svc1", agents="[CUSTOMIZED]")
+    _make_repo(root / "team-a" / "svc2", modes=("MANAGER.md",))
+    _make_repo(root / "team-b" / "deep" / "svc3", agents=None)
+    _make_repo(root / "team-b" / "node_modules" / "pkg")
+    plain = root / "team-b" / "plain"
+    (plain / ".git").mkdir(parents=True)
+    _make_repo(plain / "vendored")
+    compiled = root / "team-c" / "compiled-only"
+    (compiled / ".crules").mkdir(parents=True)
+    (compiled / ".crules" / "manifest.json").write_text("{}\n")
+    return root
+
+
+class TestProjectStatus:
+    def test_agents_md_state(self, tmp_path):
+        agents = tmp_path / "AGENTS.md"
+        assert agents_md_state(agents) == "missing"
+        agents.write_text("# Agent System Status: [CUSTOMIZED]\n")
+        assert agents_md_state(agents) == "customized"
+        agents.write_text("# Agents\n[TEMPLATE]\n")
+        assert agents_md_state(agents) == "unknown"
+
+    def test_reports_missing_modes(self, tmp_path):
+        status = project_status(_make_repo(tmp_path, modes=("MANAGER.md", "CODER.md")))
+
+        assert status["agents"] == "template"
+        assert status["missing_modes"] == ["GIT_POLICY.md", "BOOTSTRAPPER.md"]
+        assert not status["ok"]
+
+    def test_report_status_includes_project(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("HOME", str(tmp_path / "home"))
+        _make_repo(tmp_path / "repo")
+
+        status = report_status(root=tmp_path / "repo", include_global=False)
+
+        assert status["all_ok"]
+        assert status["project"]["agents"] == "template"
+        assert {c["scope"] for c in status["checks"]} == {"project"}
+
+
+class TestCompiledOnlyRepo:
+    def test_status_skips_project_checks(self, make_rules_env, monkeypatch):
+        root, cfg, global_rules = make_rules_env()
+        monkeypatch.setenv("HOME", str(root / "home"))
+        assert file_ops.write_rules_to_ai_dirs(cfg, global_rules, root, [])
+        assert (root / ".crules").is_dir()
+
+        status = report_status(root=root, include_global=False)
+
+        assert status["all_ok"]
+        assert status["project"] is None
+
+    def test_bootstrap_does_not_ask_to_rebootstrap(self, make_rules_env, monkeypatch):
+        root, cfg, global_rules = make_rules_env()
+        monkeypatch.setenv("HOME", str(root / "home"))
+        assert file_ops.write_rules_to_ai_dirs(cfg, global_rules, root, [])
+
+        def no_confirm(*args, **kwargs):
+            raise AssertionError("asked to re-bootstrap a compiled-only repo")
+
+        monkeypatch.setattr("click.confirm", no_confirm)
+        assert file_ops.bootstrap_swarm(cfg, root=root)
+
+
+class TestRecursiveScan:
+    def test_finds_repos_and_prunes(self, tree):
+        repos = fleet.find_crules_repos(tree, workers=4)
+
+        assert [p.relative_to(tree).as_posix() for p in repos] == [
+            "team-a/svc1", "team-a/svc2", "team-b/deep/svc3",
+        ]
+
+    def test_does_not_follow_symlinks(self, tree):
+        os.symlink(tree / "team-a", tree / "team-b" / "link")
+
+        assert len(fleet.find_crules_repos(tree)) == 3
+
+    def test_cli_json_report(self, tree):
+        result = CliRunner().invoke(
+            cli.main, ["--status", "--recursive", str(tree), "--json"]
+        )
+
+        assert result.exit_code != 0
+        output = result.output
+        status = json.loads(output[output.index("{"):output.rindex("}") + 1])
+        by_name = {os.path.basename(r["path"]): r for r in status["repos"]}
+        assert by_name["svc1"]["ok"] and by_name["svc1"]["agents"] == "customized"
+        assert by_name["svc2"]["missing_modes"] == [
+            "CODER.md",
+            "GIT_POLICY.md",
+            "BOOTSTRAPPER.md",
+        ]
+        assert by_name["svc3"]["agents"] == "missing"
+        assert not status["all_ok"]
+
+    def test_cli_table_report(self, tree):
+        result = CliRunner().invoke(cli.main, ["--status", "--recursive", str(tree)])
+
+        assert "3 repositories under" in result.output
+        assert "AGENTS.md: CUSTOMIZED" in result.output
+        assert "missing modes: CODER.md" in result.output
+
+    def test_recursive_requires_status(self, tree):
+        result = CliRunner().invoke(cli.main, ["--recursive", str(tree)])
+
+        assert result.exit_code != 0
+        assert "require --status" in result.output
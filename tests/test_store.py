@@ -0,0 +1,119 @@
+"""Tests for store module."""
+import os
+from pathlib import Path
+import pytest
+from crules import file_ops
+from crules.store import KEEP_VERSIONS, OutputStore, StoreTransaction, get_output_store
+
+
+@pytest.fixture
+def store_env(fleet_env):
+    tmp_path, repos, cfg = fleet_env
+    cfg.update(
+        output_store=True, output_store_dir=str(tmp_path / "store"), fsync_outputs=False
+    )
+    return cfg, Path(cfg["global_rules_path"]), repos[:2]
+
+
+def _deploy(cfg, global_rules, repo):
+    sources = file_ops.load_rule_sources(global_rules, global_rules.parent, [])
+    return file_ops.deploy_rules(cfg, sources, repo)
+
+
+def _store_dir(cfg):
+    return get_output_store(cfg).store_dir
+
+
+def _versions(store_dir):
+    return sorted(p.name for p in store_dir.iterdir()
+                  if p.is_dir() and not p.is_symlink() and not p.name.startswith("."))
+
+
+class TestStoreDeploy:
+    def test_targets_link_into_current(self, store_env):
+        cfg, global_rules, repos = store_env
+        for repo in repos:
+            assert _deploy(cfg, global_rules, repo)
+
+        target = repos[0] / ".cursor/rules/global.mdc"
+        assert target.is_symlink()
+        assert os.readlink(target) == str(
+            _store_dir(cfg) / "current/files/.cursor/rules/global.mdc"
+        )
+        assert "# Global rules content" in target.read_text()
+        assert len(_versions(_store_dir(cfg))) == 1
+
+    def test_publish_updates_every_linked_repo(self, store_env):
+        cfg, global_rules, repos = store_env
+        for repo in repos:
+            assert _deploy(cfg, global_rules, repo)
+        untouched = repos[1] / ".claude/rules/global.md"
+        before = untouched.lstat()
+
+        global_rules.write_text("# Global v2\n")
+        assert _deploy(cfg, global_rules, repos[0])
+
+        assert "# Global v2" in untouched.read_text()
+        assert untouched.lstat().st_ino == before.st_ino
+        assert len(_versions(_store_dir(cfg))) == 2
+
+    def test_unchanged_run_publishes_nothing(self, store_env):
+        cfg, global_rules, repos = store_env
+        assert _deploy(cfg, global_rules, repos[0])
+        current = os.readlink(_store_dir(cfg) / "current")
+
+        assert _deploy(cfg, global_rules, repos[0])
+
+        assert os.readlink(_store_dir(cfg) / "current") == current
+        assert len(_versions(_store_dir(cfg))) == 1
+
+    def test_leaving_store_mode_restores_regular_files(self, store_env):
+        cfg, global_rules, repos = store_env
+        assert _deploy(cfg, global_rules, repos[0])
+        store_dir = _store_dir(cfg)
+
+        cfg["output_store"] = False
+        assert _deploy(cfg, global_rules, repos[0])
+
+        target = repos[0] / ".cursor/rules/global.mdc"
+        assert not target.is_symlink()
+        assert "# Global rules content" in target.read_text()
+        assert (store_dir / "current/files/.cursor/rules/global.mdc").exists()
+
+
+    def test_settings_that_change_outputs_get_separate_profiles(self, store_env):
+        cfg, global_rules, repos = store_env
+        plain = dict(cfg)
+        once = dict(cfg, preamble_once=True, dedupe_paragraphs=True)
+        assert _deploy(plain, global_rules, repos[0])
+        assert _deploy(once, global_rules, repos[1])
+
+        assert _store_dir(plain) != _store_dir(once)
+        assert _store_dir(plain).parent == _store_dir(once).parent
+        a, b = (repo / ".cursor/rules/global.mdc" for repo in repos)
+        assert os.readlink(a) != os.readlink(b)
+        assert (
+            len(_versions(_store_dir(plain))) == len(_versions(_store_dir(once))) == 1
+        )
+
+
+class TestOutputStore:
+    def test_versions_merge_and_prune(self, tmp_path):
+        store = OutputStore(tmp_path / "store", fsync=False)
+        repo = tmp_path / "repo"
+        (repo / "rules").mkdir(parents=True)
+        for i in range(KEEP_VERSIONS + 2):
+            txn = StoreTransaction(store, repo)
+            txn.stage(repo / f"rules/{i}.md", f"rule {i}".encode())
+            txn.commit()
+
+        files = sorted(
+            p.name for p in (tmp_path / "store/current/files/rules").iterdir()
+        )
+        assert files == [f"{i}.md" for i in range(KEEP_VERSIONS + 2)]
+        assert len(_versions(tmp_path / "store")) == KEEP_VERSIONS
+
+    def test_rejects_targets_outside_root(self, tmp_path):
+        txn = StoreTransaction(OutputStore(tmp_path / "store"), tmp_path / "repo")
+        with pytest.raises(ValueError):
+            txn.stage(tmp_path / "elsewhere.md", b"x")
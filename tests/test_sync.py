@@ -0,0 +1,117 @@
+"""Tests for change-detecting sync."""
+import os
+import pytest
+from crules import file_ops
+
+
+@pytest.fixture
+def sync_env(tmp_path, monkeypatch, all_targets):
+    """Fake HOME with global rules and two workflow files, plus a repo."""
+    fake_home = tmp_path / "fakehome"
+    monkeypatch.setenv("HOME", str(fake_home))
+    config_base = fake_home / ".config" / "crules"
+    workflows_dir = config_base / "workflows"
+    workflows_dir.mkdir(parents=True)
+    (config_base / "cursorrules").write_text("# Global v1\n")
+    (workflows_dir / "MANAGER.md").write_text("# Manager\n")
+    (workflows_dir / "CODER.md").write_text("# Coder\n")
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    cfg = {
+        "global_rules_path": str(config_base / "cursorrules"),
+        "language_rules_dir": str(config_base / "lang_rules"),
+        **all_targets,
+    }
+    return repo, cfg, config_base
+
+
+def _mtimes(repo):
+    return {p: p.stat().st_mtime_ns for p in repo.rglob("*") if p.is_file()}
+
+
+class TestChangeDetectingSync:
+    def test_unchanged_sync_touches_nothing(self, sync_env, monkeypatch):
+        repo, cfg, _ = sync_env
+        assert file_ops.sync_modes(dict(cfg), root=repo)
+        before = _mtimes(repo)
+
+        def no_deploy(*args, **kwargs):
+            raise AssertionError("re-rendered unchanged outputs")
+
+        monkeypatch.setattr(file_ops, "write_rules_to_ai_dirs", no_deploy)
+        assert file_ops.sync_modes(dict(cfg), root=repo)
+
+        assert _mtimes(repo) == before
+
+    def test_only_modified_mode_file_is_copied(self, sync_env, caplog):
+        repo, cfg, config_base = sync_env
+        assert file_ops.sync_modes(dict(cfg), root=repo)
+        (config_base / "workflows/CODER.md").write_text("# Coder v2\n")
+
+        caplog.set_level("INFO")
+        assert file_ops.sync_modes(dict(cfg), root=repo)
+
+        assert (repo / ".crules/modes/CODER.md").read_text() == "# Coder v2\n"
+        assert "Synced CODER.md" in caplog.text
+        assert "Synced MANAGER.md" not in caplog.text
+        assert (
+            "1 mode file(s) updated, 1 unchanged; IDE rule folders already up to date"
+            in caplog.text
+        )
+
+    def test_touched_but_identical_rules_are_not_rerendered(
+        self, sync_env, monkeypatch
+    ):
+        repo, cfg, config_base = sync_env
+        assert file_ops.sync_modes(dict(cfg), root=repo)
+        os.utime(config_base / "cursorrules", ns=(1, 1))
+        monkeypatch.setattr(file_ops, "write_rules_to_ai_dirs", None)
+
+        assert file_ops.sync_modes(dict(cfg), root=repo)
+
+    def test_changed_rules_rerender(self, sync_env):
+        repo, cfg, config_base = sync_env
+        assert file_ops.sync_modes(dict(cfg), root=repo)
+        (config_base / "cursorrules").write_text("# Global v2\n")
+
+        assert file_ops.sync_modes(dict(cfg), root=repo)
+
+        assert "# Global v2" in (repo / ".cursor/rules/global.mdc").read_text()
+
+    def test_deleted_output_is_restored(self, sync_env):
+        repo, cfg, _ = sync_env
+        assert file_ops.sync_modes(dict(cfg), root=repo)
+        (repo / ".claude/rules/global.md").unlink()
+
+        assert file_ops.sync_modes(dict(cfg), root=repo)
+
+        assert (repo / ".claude/rules/global.md").exists()
+
+    def test_deleted_language_output_keeps_fast_path(self, sync_env, monkeypatch):
+        repo, cfg, config_base = sync_env
+        (config_base / "lang_rules").mkdir()
+        (config_base / "lang_rules" / "cursor.python").write_text("# Python\n")
+        assert file_ops.write_rules_to_ai_dirs(
+            dict(cfg),
+            config_base / "cursorrules",
+            config_base / "lang_rules",
+            ["python"],
+            root=repo,
+        )
+        assert file_ops.sync_modes(dict(cfg), root=repo)
+        (repo / ".claude/rules/python.md").unlink()
+        monkeypatch.setattr(file_ops, "write_rules_to_ai_dirs", None)
+
+        assert file_ops.sync_modes(dict(cfg), root=repo)
+        assert file_ops.sync_modes(dict(cfg), root=repo)
+
+    def test_changed_targets_rerender(self, sync_env):
+        repo, cfg, _ = sync_env
+        cfg["enable_aider"] = False
+        assert file_ops.sync_modes(dict(cfg), root=repo)
+        assert not (repo / ".aider/rules/global.md").exists()
+
+        cfg["enable_aider"] = True
+        assert file_ops.sync_modes(dict(cfg), root=repo)
+
+        assert (repo / ".aider/rules/global.md").exists()
@@ -0,0 +1,122 @@
+"""Tests for targets module."""
+import importlib.metadata
+import sys
+import textwrap
+import pytest
+from click.testing import CliRunner
+from crules import cli, file_ops, targets
+from crules.ai_managers import ClaudeManager, CursorManager
+
+PLUGIN = textwrap.dedent('''
+    from crules.ai_managers import BaseAIManager
+
+    class AcmeManager(BaseAIManager):
+        def __init__(self, config, root=None):
+            super().__init__(config, root)
+            self.target_dir = self.root / ".acme"
+
+        def ensure_structure(self):
+            self.target_dir.mkdir(parents=True, exist_ok=True)
+
+        def ignore_patterns(self):
+            return [".acme/"]
+
+        def create_rule_file(self, name, content, globs):
+            return self._write_file_with_frontmatter(
+                self.target_dir / f"{name}.md",
+                content,
+                {"description": name, "globs": globs},
+            )
+''')
+
+
+@pytest.fixture
+def acme_plugin(tmp_path, monkeypatch):
+    (tmp_path / "acme_target.py").write_text(PLUGIN)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    ep = importlib.metadata.EntryPoint(
+        name="acme", value="acme_target:AcmeManager", group=targets.ENTRY_POINT_GROUP
+    )
+
+    def fake_entry_points(**kwargs):
+        assert kwargs == {"group": targets.ENTRY_POINT_GROUP}
+        return [ep]
+
+    monkeypatch.setattr(importlib.metadata, "entry_points", fake_entry_points)
+    targets.plugin_targets.cache_clear()
+    sys.modules.pop("acme_target", None)
+    yield
+    targets.plugin_targets.cache_clear()
+    sys.modules.pop("acme_target", None)
+
+
+class TestRegistry:
+    def test_builtin_order_and_defaults(self):
+        cfg = {"enable_claude": False}
+        targets.apply_defaults(cfg)
+
+        names = [spec.name for spec in targets.enabled_targets(cfg)]
+
+        assert names == ["cursor", "copilot", "cline", "roo", "windsurf", "aider"]
+
+    def test_create_managers_for_enabled_targets(self, tmp_path):
+        managers = targets.create_managers(
+            {"enable_claude": True, "enable_cursor": True}, tmp_path
+        )
+
+        assert [type(m) for m in managers] == [CursorManager, ClaudeManager]
+        assert all(m.root == tmp_path for m in managers)
+
+    def test_select_disables_everything_else(self):
+        cfg = {"enable_cursor": True, "enable_acme": True}
+
+        targets.select(cfg, ["roo"])
+
+        assert [spec.name for spec in targets.enabled_targets(cfg)] == ["roo"]
+        assert cfg["enable_acme"] is False
+
+
+class TestPluginTargets:
+    def test_plugin_imported_only_when_enabled(
+        self, tmp_path, monkeypatch, acme_plugin
+    ):
+        monkeypatch.chdir(tmp_path)
+        global_rules = tmp_path / "cursorrules"
+        global_rules.write_text("# Global\n")
+
+        assert file_ops.write_rules_to_ai_dirs(
+            {"enable_cursor": True}, global_rules, tmp_path, []
+        )
+        assert "acme_target" not in sys.modules
+
+        cfg = {"enable_cursor": True, "enable_acme": True}
+        assert file_ops.write_rules_to_ai_dirs(cfg, global_rules, tmp_path, [])
+        assert "acme_target" in sys.modules
+        assert (tmp_path / ".acme/global.md").read_text().endswith("# Global\n")
+
+    def test_cli_accepts_plugin_target(self, acme_plugin):
+        assert cli._validate_targets(None, None, ("ACME", "cursor")) == (
+            "acme",
+            "cursor",
+        )
+
+    def test_plugin_cannot_shadow_builtin(self, monkeypatch):
+        ep = importlib.metadata.EntryPoint(
+            name="cursor", value="elsewhere:Manager", group=targets.ENTRY_POINT_GROUP
+        )
+        monkeypatch.setattr(importlib.metadata, "entry_points", lambda **kw: [ep])
+        targets.plugin_targets.cache_clear()
+        try:
+            assert targets.plugin_targets() == {}
+            assert (
+                targets.get_target("cursor").manager
+                == "crules.ai_managers:CursorManager"
+            )
+        finally:
+            targets.plugin_targets.cache_clear()
+
+    def test_unknown_cli_target_is_rejected(self, acme_plugin):
+        result = CliRunner().invoke(cli.main, ["-t", "nope", "python"])
+
+        assert result.exit_code != 0
+        assert "unknown target 'nope'" in result.output
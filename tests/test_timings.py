@@ -0,0 +1,74 @@
+"""Tests for timings module."""
+import json
+import pytest
+from click.testing import CliRunner
+from crules import cli, timings
+
+
+@pytest.fixture(autouse=True)
+def _reset_recorder():
+    yield
+    timings.disable()
+
+
+class TestSpans:
+    def test_disabled_span_is_shared_noop(self):
+        assert timings.span("a") is timings.span("b")
+        with timings.span("a"):
+            pass
+
+    def test_enabled_spans_are_recorded_and_summarized(self):
+        recorder = timings.enable()
+        for _ in range(3):
+            with timings.span("render.yaml", file="x.md"):
+                pass
+        with timings.span("write.publish"):
+            pass
+
+        rows = timings.summarize(recorder)
+
+        assert [(r["name"], r["count"]) for r in rows] == [
+            ("render.yaml", 3),
+            ("write.publish", 1),
+        ]
+        assert "render.yaml" in timings.format_summary(recorder)
+
+    def test_timed_decorator(self):
+        @timings.timed("phase")
+        def work(x):
+            return x * 2
+
+        assert work(2) == 4
+        recorder = timings.enable()
+        assert work(3) == 6
+        assert [e[0] for e in recorder.events] == ["phase"]
+
+    def test_chrome_trace_format(self, tmp_path):
+        recorder = timings.enable()
+        with timings.span("gitignore", path=".gitignore"):
+            pass
+        out = tmp_path / "trace.json"
+
+        timings.write_chrome_trace(recorder, out)
+
+        event = json.loads(out.read_text())["traceEvents"][0]
+        assert event["ph"] == "X"
+        assert event["name"] == "gitignore"
+        assert event["cat"] == "gitignore"
+        assert event["args"] == {"path": ".gitignore"}
+        assert event["dur"] >= 0
+
+
+class TestCliTimings:
+    def test_timings_flag_prints_summary_and_trace(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("HOME", str(tmp_path))
+        monkeypatch.chdir(tmp_path)
+        trace = tmp_path / "trace.json"
+
+        result = CliRunner().invoke(cli.main, ["--list", "--trace", str(trace)])
+
+        assert result.exit_code == 0, result.output
+        assert "crules timings" in result.output
+        assert "config.load" in result.output
+        names = {e["name"] for e in json.loads(trace.read_text())["traceEvents"]}
+        assert {"crules", "config.load"} <= names
@@ -0,0 +1,196 @@
+"""Tests for transaction module."""
+import os
+import pytest
+from crules import file_ops, transaction
+from crules.ai_managers import WindsurfManager
+from crules.transaction import TMP_SUFFIX, OutputTransaction
+
+
+@pytest.fixture
+def versioned_env(make_rules_env):
+    return make_rules_env("# Global v1\n", {"python": "# Python v1\n"})
+
+
+def _leftovers(root):
+    return [p for p in root.rglob("*") if p.name.endswith((TMP_SUFFIX, ".crules-bak"))]
+
+
+class TestOutputTransaction:
+    def test_stage_is_invisible_until_commit(self, tmp_path):
+        target = tmp_path / "out.md"
+        target.write_text("old")
+        txn = OutputTransaction()
+
+        txn.stage(target, b"new")
+        assert target.read_text() == "old"
+
+        txn.commit()
+        assert target.read_text() == "new"
+        assert _leftovers(tmp_path) == []
+
+    def test_rollback_discards_staged_files(self, tmp_path):
+        txn = OutputTransaction()
+        txn.stage(tmp_path / "a.md", b"a")
+
+        txn.rollback()
+
+        assert list(tmp_path.iterdir()) == []
+
+    def test_new_files_respect_umask(self, tmp_path):
+        old = os.umask(0o022)
+        try:
+            txn = OutputTransaction(fsync=False)
+            txn.stage(tmp_path / "a.md", b"a")
+            txn.commit()
+        finally:
+            os.umask(old)
+
+        assert (tmp_path / "a.md").stat().st_mode & 0o777 == 0o644
+
+    def test_publish_failure_restores_previous_outputs(self, tmp_path, monkeypatch):
+        first, second = tmp_path / "first.md", tmp_path / "second.md"
+        first.write_text("first v1")
+        txn = OutputTransaction()
+        txn.stage(first, b"first v2")
+        txn.stage(second, b"second v2")
+        real_replace = os.replace
+        calls = []
+
+        def flaky_replace(src, dst):
+            calls.append(dst)
+            if len(calls) == 2:
+                raise OSError("disk full")
+            return real_replace(src, dst)
+
+        monkeypatch.setattr(transaction.os, "replace", flaky_replace)
+        with pytest.raises(OSError):
+            txn.commit()
+        monkeypatch.undo()
+
+        assert first.read_text() == "first v1"
+        assert not second.exists()
+        assert _leftovers(tmp_path) == []
+
+
+class TestTransactionalDeploy:
+    def test_failing_manager_rolls_back_whole_set(self, versioned_env, monkeypatch):
+        root, cfg, global_rules = versioned_env
+        assert file_ops.write_rules_to_ai_dirs(cfg, global_rules, root, ["python"])
+        global_rules.write_text("# Global v2\n")
+
+        real_create = WindsurfManager.create_rule_file
+
+        def failing_create(self, name, content, globs):
+            if name == "python":
+                return False
+            return real_create(self, name, content, globs)
+
+        monkeypatch.setattr(WindsurfManager, "create_rule_file", failing_create)
+        assert not file_ops.write_rules_to_ai_dirs(cfg, global_rules, root, ["python"])
+
+        for path in root.glob(".*/**/global*"):
+            assert "# Global v1" in path.read_text(), path
+        assert _leftovers(root) == []
+
+    def test_deploy_publishes_atomically(self, versioned_env, monkeypatch):
+        root, cfg, global_rules = versioned_env
+        published = []
+        real_replace = os.replace
+
+        def recording_replace(src, dst):
+            published.append(str(src))
+            return real_replace(src, dst)
+
+        monkeypatch.setattr(transaction.os, "replace", recording_replace)
+        assert file_ops.write_rules_to_ai_dirs(cfg, global_rules, root, ["python"])
+
+        staged = [
+            src
+            for src in published
+            if src.endswith(TMP_SUFFIX) and ".gitignore" not in src
+        ]
+        assert len(staged) == 14
+
+
+class TestDedupe:
+    SHARED = (".clinerules/global.md", ".roorules/global.md",
+              ".windsurf/rules/global.md", ".aider/rules/global.md")
+
+    def test_identical_outputs_share_one_inode(self, versioned_env):
+        root, cfg, global_rules = versioned_env
+        cfg["dedupe_outputs"] = True
+        assert file_ops.write_rules_to_ai_dirs(cfg, global_rules, root, ["python"])
+
+        stats = [(root / rel).stat() for rel in self.SHARED]
+        assert len({s.st_ino for s in stats}) == 1
+        assert stats[0].st_nlink >= len(self.SHARED)
+        assert all("# Global v1" in (root / rel).read_text() for rel in self.SHARED)
+        assert (root / ".claude/rules/global.md").stat().st_ino != stats[0].st_ino
+        assert _leftovers(root) == []
+
+    def test_disabled_by_default(self, versioned_env):
+        root, cfg, global_rules = versioned_env
+        assert file_ops.write_rules_to_ai_dirs(cfg, global_rules, root, ["python"])
+
+        inodes = {(root / rel).stat().st_ino for rel in self.SHARED}
+        assert len(inodes) == len(self.SHARED)
+
+    def test_falls_back_to_write_when_links_fail(self, versioned_env, monkeypatch):
+        root, cfg, global_rules = versioned_env
+        cfg["dedupe_outputs"] = True
+
+        def no_link(src, dst):
+            raise OSError("cross-device link")
+
+        monkeypatch.setattr(transaction.os, "link", no_link)
+        monkeypatch.setattr(transaction, "_reflink", lambda src, dst: False)
+        assert file_ops.write_rules_to_ai_dirs(cfg, global_rules, root, ["python"])
+
+        contents = {(root / rel).read_text() for rel in self.SHARED}
+        assert len(contents) == 1 and "# Global v1" in contents.pop()
+        assert _leftovers(root) == []
+
+    def test_rewrite_replaces_linked_set(self, versioned_env):
+        root, cfg, global_rules = versioned_env
+        cfg["dedupe_outputs"] = True
+        assert file_ops.write_rules_to_ai_dirs(cfg, global_rules, root, ["python"])
+        global_rules.write_text("# Global v2\n")
+
+        assert file_ops.write_rules_to_ai_dirs(cfg, global_rules, root, ["python"])
+
+        for rel in self.SHARED:
+            assert "# Global v2" in (root / rel).read_text(), rel
+        assert _leftovers(root) == []
+
+    def test_enabling_dedupe_links_existing_outputs(self, versioned_env):
+        root, cfg, global_rules = versioned_env
+        assert file_ops.write_rules_to_ai_dirs(cfg, global_rules, root, ["python"])
+        assert len({(root / rel).stat().st_ino for rel in self.SHARED}) == len(
+            self.SHARED
+        )
+
+        cfg["dedupe_outputs"] = True
+        assert file_ops.write_rules_to_ai_dirs(cfg, global_rules, root, ["python"])
+
+        assert len({(root / rel).stat().st_ino for rel in self.SHARED}) == 1
+        assert all("# Global v1" in (root / rel).read_text() for rel in self.SHARED)
+        assert _leftovers(root) == []
+
+    def test_unlinkable_outputs_are_not_rewritten_every_run(
+        self, versioned_env, monkeypatch
+    ):
+        root, cfg, global_rules = versioned_env
+        assert file_ops.write_rules_to_ai_dirs(cfg, global_rules, root, ["python"])
+
+        def no_link(src, dst):
+            raise OSError("cross-device link")
+
+        monkeypatch.setattr(transaction.os, "link", no_link)
+        monkeypatch.setattr(transaction, "_reflink", lambda src, dst: False)
+        cfg["dedupe_outputs"] = True
+        assert file_ops.write_rules_to_ai_dirs(cfg, global_rules, root, ["python"])
+        before = {rel: (root / rel).stat().st_mtime_ns for rel in self.SHARED}
+
+        assert file_ops.write_rules_to_ai_dirs(cfg, global_rules, root, ["python"])
+
+        assert {rel: (root / rel).stat().st_mtime_ns for rel in self.SHARED} == before
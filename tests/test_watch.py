@@ -0,0 +1,148 @@
+"""Tests for watch module."""
+import os
+import sys
+import pytest
+from crules import file_ops, watch
+
+
+@pytest.fixture
+def watch_env(tmp_path, monkeypatch, all_targets):
+    """Fake HOME with global, language and workflow sources plus a repo."""
+    fake_home = tmp_path / "fakehome"
+    monkeypatch.setenv("HOME", str(fake_home))
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    monkeypatch.chdir(repo)
+
+    config_base = fake_home / ".config" / "crules"
+    lang_rules_dir = config_base / "lang_rules"
+    workflows_dir = config_base / "workflows"
+    for d in (lang_rules_dir, workflows_dir):
+        d.mkdir(parents=True)
+    (config_base / "cursorrules").write_text("# Global rules content\n")
+    (lang_rules_dir / "cursor.python").write_text("# Python rules\n")
+    (lang_rules_dir / "cursor.bash").write_text("# Bash rules\n")
+    (workflows_dir / "CODER.md").write_text("# Coder\n")
+
+    cfg = {
+        "global_rules_path": str(config_base / "cursorrules"),
+        "language_rules_dir": str(lang_rules_dir),
+        **all_targets,
+    }
+    return repo, cfg, config_base
+
+
+def _mtimes(repo, name):
+    return {
+        p: p.stat().st_mtime_ns
+        for p in repo.rglob(f"{name}.*")
+        if p.is_file() and ".crules" not in p.parts
+    }
+
+
+class TestPlanRebuild:
+    def test_maps_sources_to_outputs(self, watch_env):
+        _, cfg, base = watch_env
+        changed = [
+            base / "lang_rules" / "cursor.python",
+            base / "lang_rules" / "cursor.lua",
+            base / "workflows" / "CODER.md",
+            base / "config.yaml",
+        ]
+
+        plan = watch.plan_rebuild(
+            changed,
+            base / "cursorrules",
+            base / "lang_rules",
+            base / "workflows",
+            ["python"],
+        )
+
+        assert plan == (False, ["python"], [base / "workflows" / "CODER.md"])
+
+    def test_global_change(self, watch_env):
+        _, _, base = watch_env
+
+        plan = watch.plan_rebuild(
+            [base / "cursorrules"], base / "cursorrules", base / "lang_rules",
+            base / "workflows", ["python"],
+        )
+
+        assert plan == (True, [], [])
+
+
+class TestRebuild:
+    def test_language_edit_rewrites_only_that_language(self, watch_env):
+        repo, cfg, base = watch_env
+        assert file_ops.write_rules_to_ai_dirs(
+            cfg, base / "cursorrules", base / "lang_rules", ["python", "bash"]
+        )
+        global_before = _mtimes(repo, "global")
+        bash_before = _mtimes(repo, "bash")
+        lang_file = base / "lang_rules" / "cursor.python"
+        lang_file.write_text("# Python rules v2\n")
+
+        assert watch.rebuild(cfg, [lang_file], ["python", "bash"])
+
+        python_outputs = _mtimes(repo, "python")
+        assert len(python_outputs) == 7
+        for path in python_outputs:
+            assert "Python rules v2" in path.read_text()
+        assert _mtimes(repo, "global") == global_before
+        assert _mtimes(repo, "bash") == bash_before
+
+    def test_global_edit_rewrites_only_global(self, watch_env):
+        repo, cfg, base = watch_env
+        assert file_ops.write_rules_to_ai_dirs(
+            cfg, base / "cursorrules", base / "lang_rules", ["python"]
+        )
+        python_before = _mtimes(repo, "python")
+        (base / "cursorrules").write_text("# Global rules v2\n")
+
+        assert watch.rebuild(cfg, [base / "cursorrules"], ["python"])
+
+        assert "Global rules v2" in (repo / ".cursor/rules/global.mdc").read_text()
+        assert _mtimes(repo, "python") == python_before
+
+    def test_workflow_edit_syncs_mode(self, watch_env):
+        repo, cfg, base = watch_env
+        (repo / ".crules" / "modes").mkdir(parents=True)
+        workflow = base / "workflows" / "CODER.md"
+        workflow.write_text("# Coder v2\n")
+
+        assert watch.rebuild(cfg, [workflow], [])
+
+        assert (repo / ".crules" / "modes" / "CODER.md").read_text() == "# Coder v2\n"
+
+
+class TestWatchers:
+    def _bump(self, path, text):
+        path.write_text(text)
+        st = path.stat()
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+    def test_polling_watcher_reports_changes(self, watch_env):
+        _, _, base = watch_env
+        watcher = watch.PollingWatcher(
+            [(base / "lang_rules", "cursor.*")], interval=0.01
+        )
+
+        assert watcher.wait(timeout=0) == set()
+        self._bump(base / "lang_rules" / "cursor.python", "# changed\n")
+        assert watcher.wait(timeout=1) == {base / "lang_rules" / "cursor.python"}
+
+    @pytest.mark.skipif(
+        not sys.platform.startswith("linux"), reason="inotify is Linux-only"
+    )
+    def test_inotify_watcher_reports_changes(self, watch_env):
+        _, _, base = watch_env
+        try:
+            watcher = watch.InotifyWatcher([(base / "lang_rules", "cursor.*")])
+        except OSError as e:
+            pytest.skip(f"inotify unavailable: {e}")
+        try:
+            (base / "lang_rules" / "notes.txt").write_text("ignored\n")
+            (base / "lang_rules" / "cursor.bash").write_text("# changed\n")
+            assert watcher.wait(timeout=2) == {base / "lang_rules" / "cursor.bash"}
+        finally:
+            watcher.close()